@@ -3,23 +3,40 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Tuple, Optional, List
 from llm_interface import LLMInterface
-from claude_llm import ClaudeLLM
-from openai_llm import OpenAILLM
+from llm_registry import get_llm
 from db import ActionDatabase
+from recurrence import parse_recurrence, parse_time_of_day, next_occurrence
+from prefilter import Prefilter, PrefilterStats
+from thread_context import ThreadContextBuilder
+from metrics import DECISIONS, DECISION_DURATION
 import pandas as pd
+from datetime import datetime, timezone
 import json
 import re
+import time
+import asyncio
+import contextvars
+
+# Responses starting with one of these are refusals, so streaming stops as soon as one is seen
+REJECTION_PHRASES = [
+    "I apologize",
+    "I'm sorry",
+    "I don't feel comfortable",
+    "I cannot",
+    "I will not"
+]
 
 class BaseAgent(ABC):
+    # Subjects the agent is keen on; used by _should_respond overrides and the keyword prefilter
+    topics: List[str] = []
+
     def __init__(self, llm_type: str, action_db: ActionDatabase, slack_interactor, name: str, personality: str, goal: str, workspace_name: str, cooldown_period: pd.Timedelta = pd.Timedelta(hours=1)):
-        if llm_type == "claude":
-            self.llm = ClaudeLLM()
-        elif llm_type == "openai":
-            self.llm = OpenAILLM()
-        else:
-            raise ValueError(f"Invalid LLM type: {llm_type}")
+        # Shared with every other agent using the same provider, in every workspace
+        self.llm = get_llm(llm_type)
+        self.llm_type = llm_type
         self.action_db = action_db
         self.slack_interactor = slack_interactor
+        self._current_thread = contextvars.ContextVar(f'current_thread_{id(self)}', default=None)
         self.current_thread = None
         self.name = name
         self.personality = personality
@@ -27,6 +44,20 @@ class BaseAgent(ABC):
         self.workspace_name = workspace_name
         self.cooldown = {}
         self.cooldown_period = cooldown_period
+        self.prefilter: Optional[Prefilter] = None
+        self.prefilter_threshold = 0.0
+        self.prefilter_stats = PrefilterStats(name)
+        self.context_builder: Optional[ThreadContextBuilder] = None
+
+    @property
+    def current_thread(self) -> Optional[Dict[str, Any]]:
+        # A context variable is separate per OS thread and per asyncio task, so one agent can
+        # evaluate several threads concurrently either way
+        return self._current_thread.get()
+
+    @current_thread.setter
+    def current_thread(self, thread: Optional[Dict[str, Any]]) -> None:
+        self._current_thread.set(thread)
 
     def get_name(self) -> str:
         return self.name
@@ -34,13 +65,71 @@ class BaseAgent(ABC):
     def read_thread(self, thread: Dict[str, Any]) -> None:
         self.current_thread = thread
 
+    def set_prefilter(self, prefilter: Optional[Prefilter], threshold: float) -> None:
+        self.prefilter = prefilter
+        self.prefilter_threshold = threshold
+
     def decide_action(self) -> Tuple[bool, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
         if not self.current_thread or not self._should_respond():
             return False, None, None
 
+        if self.prefilter is not None and self.prefilter.score(self, self.current_thread) < self.prefilter_threshold:
+            self.prefilter_stats.record(passed=False)
+            return False, None, None
+
+        action_needed, immediate_action, delayed_action = self._decide_with_llm()
+        if self.prefilter is not None:
+            self.prefilter_stats.record(passed=True, acted=action_needed)
+        return action_needed, immediate_action, delayed_action
+
+    async def adecide_action(self, thread: Optional[Dict[str, Any]] = None) -> Tuple[bool, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Async decide_action. Run each call as its own task (e.g. with asyncio.gather) so they
+        do not share current_thread.
+        """
+        if thread is not None:
+            self.read_thread(thread)
+        if not self.current_thread or not self._should_respond():
+            return False, None, None
+
+        if self.prefilter is not None and await self.prefilter.ascore(self, self.current_thread) < self.prefilter_threshold:
+            self.prefilter_stats.record(passed=False)
+            return False, None, None
+
+        start = time.perf_counter()
+        if self.context_builder is not None and self.context_builder.summarizer is not None:
+            # Summarizing old history is a blocking LLM call
+            prompt = await asyncio.to_thread(self._generate_prompt)
+        else:
+            prompt = self._generate_prompt()
+        llm_response = await self.llm.agenerate_json_response(prompt, system=self._system_prompt(), stop_prefixes=REJECTION_PHRASES)
+        action_needed, immediate_action, delayed_action = self._decision_from_response(llm_response)
+        self._record_decision(start, immediate_action, delayed_action)
+        if self.prefilter is not None:
+            self.prefilter_stats.record(passed=True, acted=action_needed)
+        return action_needed, immediate_action, delayed_action
+
+    def _decide_with_llm(self) -> Tuple[bool, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        start = time.perf_counter()
         prompt = self._generate_prompt()
-        llm_response = self.llm.generate_response(prompt)
-        
+        llm_response = self.llm.generate_json_response(prompt, system=self._system_prompt(), stop_prefixes=REJECTION_PHRASES)
+        decision = self._decision_from_response(llm_response)
+        self._record_decision(start, decision[1], decision[2])
+        return decision
+
+    def _record_decision(self, start: float, immediate_action: Optional[Dict[str, Any]], delayed_action: Optional[Dict[str, Any]]) -> None:
+        if immediate_action and delayed_action:
+            outcome = 'both'
+        elif immediate_action:
+            outcome = 'reply'
+        elif delayed_action:
+            outcome = 'schedule'
+        else:
+            outcome = 'none'
+        DECISIONS.inc(agent=self.name, outcome=outcome)
+        DECISION_DURATION.observe(time.perf_counter() - start, agent=self.name)
+
+    def _decision_from_response(self, llm_response: str) -> Tuple[bool, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
         if self._is_rejection_response(llm_response):
             return False, None, None
 
@@ -59,9 +148,32 @@ class BaseAgent(ABC):
     def schedule_delayed_action(self, action: Dict[str, Any]) -> None:
         thread_id = self.current_thread['thread_ts']
         channel = self.current_thread['channel']
-        execution_time = self._parse_execution_time(action['execution_time'])
+        if action.get('cancel'):
+            scheduled = self._scheduled_action()
+            if scheduled is not None:
+                self.action_db.remove_action(thread_id, scheduled['description'])
+            return
+        recurrence = parse_recurrence(action['execution_time'])
+        if recurrence:
+            execution_time = next_occurrence(recurrence, pd.Timestamp.now())
+        else:
+            execution_time = self._parse_execution_time(action['execution_time'])
         # This will replace any existing action for this agent in this thread
-        self.action_db.add_action(thread_id, channel, action['description'], execution_time, self.name)
+        self.action_db.add_action(thread_id, channel, action['description'], execution_time, self.name, recurrence=recurrence)
+
+    def respond_to_due_task(self, thread: Dict[str, Any], description: str) -> Optional[str]:
+        self.read_thread(thread)
+        prompt = self._generate_prompt(due_task_description=description)
+        llm_response = self.llm.generate_json_response(prompt, system=self._system_prompt(), stop_prefixes=REJECTION_PHRASES)
+        if self._is_rejection_response(llm_response):
+            print(f"LLM rejected generating a response for due task in thread: {thread['thread_ts']}")
+            return None
+        actions = self._extract_actions_from_response(llm_response)
+        immediate_action = next((a for a in actions if a['type'] == 'immediate'), None)
+        if not immediate_action:
+            print(f"No immediate action generated for due task in thread: {thread['thread_ts']}")
+            return None
+        return immediate_action['response']
 
     def _should_respond(self) -> bool:
         thread_id = self.current_thread['thread_ts']
@@ -81,16 +193,15 @@ class BaseAgent(ABC):
     def _update_cooldown(self, thread_id: str) -> None:
         self.cooldown[thread_id] = pd.Timestamp.now()
 
-    def _generate_prompt(self, due_task_description: Optional[str] = None) -> str:
-        formatted_messages = self._format_thread_messages()
-        due_task_prompt = f"\nDue task to execute: {due_task_description}" if due_task_description else ""
+    def _system_prompt(self) -> str:
+        # Everything here is fixed per agent, so LLMs that support prompt caching can reuse it across calls
         return f"""
         You are an AI agent bot named Agentflow with the following characteristics:
         Personality: {self.personality}
         Goal: {self.goal}
-        Username: {self.name}{due_task_prompt}
+        Username: {self.name}
 
-        Analyze the following conversation carefully. Consider the entire thread history when making decisions. Determine if any immediate action is needed or if a delayed task should be scheduled. Consider the following:
+        Analyze the conversation you are given carefully. Each message shows when it was posted, in local time, and the current time is given above the conversation. Consider the entire thread history when making decisions. Determine if any immediate action is needed or if a delayed task should be scheduled. Consider the following:
 
         1. Immediate actions: Tasks that need to be done right away based on the conversation context.
         2. Delayed tasks: Any task that needs to be performed in the future, including check-ins, reminders, or scheduled actions.
@@ -112,12 +223,29 @@ class BaseAgent(ABC):
             }},
             "delayed_action": {{
                 "needed": boolean,
+                "cancel": boolean,
                 "description": "Description of the delayed task, including check-ins or scheduled actions",
-                "execution_time": "When to perform the task (use only these formats: '5 minutes', '2 hours', '1 day', '9am tomorrow', or 'daily at 9am')"
+                "execution_time": "When to perform the task (use only these formats: '5 minutes', '2 hours', '1 day', '9am tomorrow', or for recurring tasks 'daily at 9am', 'weekdays at 9am', 'every monday at 10am', 'every 2 hours')"
             }}
         }}
 
+        You have at most one scheduled task per thread; if you have one, it is shown above the conversation. A new delayed task replaces it. To stop it without scheduling another (for example when asked to stop a recurring reminder), set "needed" to false and "cancel" to true.
+
         If you feel that responding would be inappropriate or goes against your personality or goals, set both "needed" fields to false.
+        """
+
+    def _generate_prompt(self, due_task_description: Optional[str] = None) -> str:
+        formatted_messages = self._format_thread_messages()
+        due_task_prompt = f"Due task to execute: {due_task_description}\n\n        " if due_task_description else ""
+        current_time = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')
+        scheduled_prompt = ""
+        scheduled = self._scheduled_action()
+        if scheduled is not None:
+            repeats = ", repeats" if scheduled.get('recurrence') else ""
+            next_at = pd.Timestamp(scheduled['execution_time']).strftime('%Y-%m-%d %H:%M')
+            scheduled_prompt = f"\n        Your scheduled task in this thread: {scheduled['description']} (next at {next_at}{repeats})"
+        return f"""
+        {due_task_prompt}Current time: {current_time}{scheduled_prompt}
 
         Conversation:
         {formatted_messages}
@@ -125,15 +253,14 @@ class BaseAgent(ABC):
         JSON response:
         """
 
+    def _scheduled_action(self) -> Optional[Dict[str, Any]]:
+        if not self.current_thread:
+            return None
+        return next((action for action in self.action_db.get_actions(self.current_thread['thread_ts'])
+                     if action['agent_name'] == self.name), None)
+
     def _is_rejection_response(self, response: str) -> bool:
-        rejection_phrases = [
-            "I apologize",
-            "I'm sorry",
-            "I don't feel comfortable",
-            "I cannot",
-            "I will not"
-        ]
-        return any(phrase.lower() in response.lower() for phrase in rejection_phrases)
+        return any(phrase.lower() in response.lower() for phrase in REJECTION_PHRASES)
 
     def _extract_actions_from_response(self, raw_response: str) -> List[Dict[str, Any]]:
         try:
@@ -155,6 +282,13 @@ class BaseAgent(ABC):
                         'description': parsed_response['delayed_action']['description'],
                         'execution_time': parsed_response['delayed_action']['execution_time']
                     })
+                elif parsed_response.get('delayed_action', {}).get('cancel', False):
+                    actions.append({
+                        'type': 'delayed',
+                        'cancel': True,
+                        'description': parsed_response['delayed_action'].get('description') or 'Cancel the scheduled task',
+                        'execution_time': 'Cancelled'
+                    })
                 return actions
             else:
                 raise ValueError("No JSON found in the response")
@@ -165,6 +299,7 @@ class BaseAgent(ABC):
 
     def _parse_execution_time(self, time_str: str) -> pd.Timestamp:
         now = pd.Timestamp.now()
+        original = time_str
         time_str = time_str.lower()
         
         if 'minute' in time_str:
@@ -195,47 +330,42 @@ class BaseAgent(ABC):
             else:
                 return (now + pd.Timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
         elif 'daily' in time_str:
-            time_parts = time_str.split()
-            time_index = next((i for i, part in enumerate(time_parts) if ':' in part or 'am' in part or 'pm' in part), None)
-            
-            if time_index is not None:
-                time_part = time_parts[time_index]
-                if ':' in time_part:
-                    hour, minute = map(int, time_part.replace('am', '').replace('pm', '').split(':'))
-                else:
-                    hour = int(time_part.replace('am', '').replace('pm', ''))
-                    minute = 0
-                
-                if 'pm' in time_part and hour < 12:
-                    hour += 12
-                
-                next_occurrence = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                if next_occurrence <= now:
-                    next_occurrence += pd.Timedelta(days=1)
-                return next_occurrence
-            else:
-                return now.replace(hour=9, minute=0, second=0, microsecond=0) + pd.Timedelta(days=1)
-        else:
+            return next_occurrence(parse_recurrence(time_str), now)
+
+        # A bare clock time such as 9am or 10:30 means its next occurrence
+        clock = parse_time_of_day(time_str) if re.fullmatch(r'(?:at\s+)?\d{1,2}(?::\d{2})?\s*(?:am|pm)?', time_str.strip()) else None
+        if clock is not None:
+            hour, minute = clock
+            try:
+                execution_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            except ValueError:
+                raise ValueError(f"Unable to parse execution time: {time_str}")
+            if execution_time <= now:
+                execution_time += pd.Timedelta(days=1)
+            return execution_time
+
+        try:
+            # Absolute times must be full ISO dates, such as 2024-08-17T09:00:00
+            execution_time = pd.Timestamp(datetime.fromisoformat(original.strip()))
+        except ValueError:
             raise ValueError(f"Unable to parse execution time: {time_str}")
+        if execution_time.tzinfo is not None:
+            # The schedule holds naive local times, so 2024-08-17T09:00:00Z becomes 9am UTC in local time
+            execution_time = pd.Timestamp(execution_time.to_pydatetime().astimezone()).tz_localize(None)
+        if execution_time < now:
+            raise ValueError(f"Execution time is in the past: {original}")
+        return execution_time
 
     def _format_thread_messages(self) -> str:
         if not self.current_thread:
             return ""
-        formatted_messages = []
-        for message in self.current_thread['messages']:
-            user_type = "Bot" if message.get('is_bot', False) else "Human"
-            username = message['username'] if message.get('is_bot', False) else message['user']
-            
-            # Convert minutes to a more readable format
-            minutes_ago = message['minutes_ago']
-            if minutes_ago < 60:
-                time_ago = f"{minutes_ago} minutes ago"
-            elif minutes_ago < 1440:  # Less than 24 hours
-                hours_ago = minutes_ago // 60
-                time_ago = f"{hours_ago} hours ago"
-            else:
-                days_ago = minutes_ago // 1440
-                time_ago = f"{days_ago} days ago"
-            
-            formatted_messages.append(f"{user_type} {username} ({time_ago}): {message['text']}")
-        return "\n".join(formatted_messages)
\ No newline at end of file
+        if self.context_builder is not None:
+            return self.context_builder.build(self.current_thread, self._format_message, self.llm_type)
+        return "\n".join(self._format_message(message) for message in self.current_thread['messages'])
+
+    def _format_message(self, message: Dict[str, Any]) -> str:
+        user_type = "Bot" if message.get('is_bot', False) else "Human"
+        username = message['username'] if message.get('is_bot', False) else message['user']
+        # Message timestamps are naive UTC; the prompt shows them in local time next to the current time
+        posted_at = pd.Timestamp(message['ts']).to_pydatetime().replace(tzinfo=timezone.utc).astimezone().strftime('%Y-%m-%d %H:%M')
+        return f"{user_type} {username} ({posted_at}): {message['text']}"
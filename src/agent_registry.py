@@ -0,0 +1,54 @@
+# agent_registry.py
+
+import importlib
+from typing import Dict, Any, Optional
+import pandas as pd
+from agent_interface import BaseAgent
+
+# Built-in agents by config name, as module:Class so a module is only imported when a workspace uses it
+AGENT_CLASSES: Dict[str, str] = {
+    'ProjectManagerAgent': 'project_manager_agent:ProjectManagerAgent',
+    'SarcasticAgent': 'sarcastic_agent:SarcasticAgent',
+    'PaulGrahamAgent': 'paul_graham_agent:PaulGrahamAgent',
+    'DrunkAgent': 'drunk_agent:DrunkAgent',
+}
+
+def register_agent(name: str, target: str) -> None:
+    AGENT_CLASSES[name] = target
+
+def resolve_agent_class(target: str) -> type:
+    module_name, _, class_name = target.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+class ConfiguredAgent(BaseAgent):
+    """An agent defined as data in the config's agent_types section rather than as a class."""
+
+    def __init__(self, llm_type: str, action_db, slack_interactor, workspace_name: str, definition: Dict[str, Any]):
+        super().__init__(
+            llm_type,
+            action_db,
+            slack_interactor,
+            name=definition['display_name'],
+            personality=definition['personality'],
+            goal=definition['goal'],
+            workspace_name=workspace_name,
+            cooldown_period=pd.Timedelta(minutes=definition.get('cooldown_minutes', 60))
+        )
+        self.topics = list(definition.get('topics') or [])
+
+def create_agent(agent_config: Dict[str, Any], agent_types: Dict[str, Dict[str, Any]], action_db, slack_interactor,
+                 workspace_name: str) -> Optional[BaseAgent]:
+    """
+    Builds the agent a workspace's agent entry names: a data-defined type from agent_types (which
+    may point at its own class), or a built-in. Returns None for unknown names.
+    """
+    agent_name = agent_config['name']
+    llm_type = agent_config['llm_type']
+    definition = agent_types.get(agent_name)
+    if definition is not None:
+        if definition.get('class'):
+            return resolve_agent_class(definition['class'])(llm_type, action_db, slack_interactor, workspace_name=workspace_name)
+        return ConfiguredAgent(llm_type, action_db, slack_interactor, workspace_name, dict(definition, display_name=definition.get('display_name', agent_name)))
+    if agent_name in AGENT_CLASSES:
+        return resolve_agent_class(AGENT_CLASSES[agent_name])(llm_type, action_db, slack_interactor, workspace_name=workspace_name)
+    return None
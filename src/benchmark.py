@@ -0,0 +1,261 @@
+# benchmark.py
+#
+# Offline end-to-end benchmark of Runner.run_one_loop against a synthetic workspace, a fake
+# WebClient and a fake LLM:
+#
+#   python src/benchmark.py --messages 1000 100000 1000000
+#
+# Each history size is seeded and then measured in its own process, so the peak RSS reported
+# for a size is that of the measured loops and not of seeding or of a larger size run before.
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import yaml
+from fake_llm import FakeLLM, NO_ACTION_RESPONSE, reply_response, parse_latency
+from fake_slack import SyntheticWorkspace, FakeWebClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKSPACE_NAME = 'bench'
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def benchmark_config(args: argparse.Namespace) -> Dict[str, Any]:
+    with open(os.path.join(ROOT, 'config.template.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['workspaces'] = [{
+        'name': WORKSPACE_NAME,
+        'bot_token': 'xoxb-bench',
+        'user_token': 'xoxp-bench',
+        'agents': [{'name': name, 'llm_type': 'claude'} for name in args.agents.split(',')],
+        'message_store_path': f'messages_{WORKSPACE_NAME}.db',
+    }]
+    if not args.slack_rate_limits:
+        # The client-side limiter would otherwise pace every call at Slack's published tiers
+        config['workspaces'][0]['rate_limits'] = {method: 1e9 for method in FakeWebClient.tier_limits()}
+    # Nothing in the measured loop may reach a real API
+    config['llm_cache'] = {'enabled': False}
+    config['context'] = dict(config.get('context') or {}, summarizer_llm_type=None)
+    if (config.get('prefilter') or {}).get('type') == 'llm':
+        config['prefilter']['type'] = 'keyword'
+    config['runner'] = dict(config['runner'], sleep_period=args.sleep_period, decision_concurrency=args.decision_concurrency)
+    return config
+
+def make_workspace(args: argparse.Namespace) -> SyntheticWorkspace:
+    return SyntheticWorkspace(messages=args.messages[0], channels=args.channels, users=args.users,
+                              reply_fraction=args.reply_fraction, days=args.days, message_rate=args.message_rate,
+                              end_time=args.end_time, seed=args.seed)
+
+def make_llm(args: argparse.Namespace) -> FakeLLM:
+    rng = random.Random(args.seed)
+    def respond(prompt: str) -> str:
+        return reply_response("On it!") if rng.random() < args.reply_rate else NO_ACTION_RESPONSE
+    return FakeLLM(respond, latency=parse_latency(args.llm_latency))
+
+def seed_store(slack_interactor, workspace: SyntheticWorkspace, chunk_size: int = 100_000) -> int:
+    """
+    Write the workspace's generated history and thread reply state into the interactor's
+    message store, as if the bot had been running all along.
+    """
+    users = slack_interactor.fetch_user_list()
+    channels = pd.DataFrame(slack_interactor.directory.channels(), columns=['id', 'name']).rename({'name': 'channel_name'}, axis=1)
+    stored = 0
+    for raw in workspace.raw_messages(chunk_size):
+        stored += len(slack_interactor.message_store.append(slack_interactor.enrich_messages(raw, users, channels)))
+    slack_interactor.message_store.update_thread_states(workspace.thread_states())
+    return stored
+
+def attach_fakes(runner, client: FakeWebClient, llm: FakeLLM):
+    for slack_interactor in runner.slack_interactors.values():
+        slack_interactor.user_client = client
+        slack_interactor.bot_client = client
+    for agents in runner.agents.values():
+        for agent in agents:
+            agent.llm = llm
+
+def measure_loops(runner, workspace: SyntheticWorkspace, client: FakeWebClient, llm: FakeLLM,
+                  loops: int, sleep_period: float, quiet_output: bool = True) -> List[Dict[str, Any]]:
+    results = []
+    for _ in range(loops):
+        arrived = workspace.advance(sleep_period)
+        api_calls = dict(client.calls)
+        llm_calls = llm.calls
+        start = time.perf_counter()
+        with quiet(quiet_output):
+            runner.run_one_loop()
+        wall = time.perf_counter() - start
+        api_by_method = {method: count - api_calls.get(method, 0) for method, count in client.calls.items()
+                         if count - api_calls.get(method, 0)}
+        results.append({
+            'wall_seconds': wall,
+            'new_messages': arrived,
+            'api_calls': sum(api_by_method.values()),
+            'api_calls_by_method': api_by_method,
+            'llm_calls': llm.calls - llm_calls,
+        })
+    return results
+
+def run_seed(args: argparse.Namespace) -> Dict[str, Any]:
+    from slack_interactor import SlackInteractor
+    from config import CONFIG
+    workspace = make_workspace(args)
+    slack_interactor = SlackInteractor(CONFIG['workspaces'][0])
+    slack_interactor.user_client = FakeWebClient(workspace)
+    start = time.perf_counter()
+    with quiet():
+        stored = seed_store(slack_interactor, workspace)
+    slack_interactor.message_store.close()
+    return {'seeded_messages': stored, 'seed_seconds': time.perf_counter() - start}
+
+def run_measure(args: argparse.Namespace) -> Dict[str, Any]:
+    from runner import Runner
+    workspace = make_workspace(args)
+    client = FakeWebClient(workspace, rate_limits=FakeWebClient.tier_limits() if args.slack_rate_limits else None,
+                           latency=args.api_latency)
+    llm = make_llm(args)
+    with quiet():
+        runner = Runner()
+    attach_fakes(runner, client, llm)
+    setup_rss = peak_rss_mb()
+    loops = measure_loops(runner, workspace, client, llm, args.loops, args.sleep_period, quiet_output=not args.verbose)
+    return {'loops': loops, 'setup_peak_rss_mb': setup_rss, 'peak_rss_mb': peak_rss_mb()}
+
+def run_worker(args: argparse.Namespace):
+    os.chdir(args.workdir)
+    if not os.path.exists('config.yaml'):
+        with open('config.yaml', 'w') as f:
+            yaml.safe_dump(benchmark_config(args), f)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from config import load_config
+    load_config('config.yaml')
+    result = run_seed(args) if args.worker == 'seed' else run_measure(args)
+    print(json.dumps(result))
+
+def spawn(stage: str, messages: int, workdir: str, argv: List[str]) -> Dict[str, Any]:
+    command = [sys.executable, os.path.abspath(__file__), *argv, '--messages', str(messages), '--worker', stage, '--workdir', workdir]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{stage} worker for {messages} messages failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize(messages: int, seed: Dict[str, Any], measured: Dict[str, Any]) -> Dict[str, Any]:
+    loops = measured['loops']
+    walls = [loop['wall_seconds'] for loop in loops]
+    return {
+        'messages': messages,
+        'seed_seconds': seed['seed_seconds'],
+        'loop_seconds_median': statistics.median(walls),
+        'loop_seconds_max': max(walls),
+        'new_messages_per_loop': statistics.mean(loop['new_messages'] for loop in loops),
+        'api_calls_per_loop': statistics.mean(loop['api_calls'] for loop in loops),
+        'llm_calls_per_loop': statistics.mean(loop['llm_calls'] for loop in loops),
+        'setup_peak_rss_mb': measured['setup_peak_rss_mb'],
+        'peak_rss_mb': measured['peak_rss_mb'],
+        'loops': loops,
+    }
+
+def print_table(summaries: List[Dict[str, Any]]):
+    header = f"{'messages':>10} {'seed s':>8} {'loop s':>8} {'max s':>8} {'new/loop':>9} {'api/loop':>9} {'llm/loop':>9} {'rss MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for s in summaries:
+        rss = f"{s['peak_rss_mb']:.0f}" if s['peak_rss_mb'] is not None else 'n/a'
+        print(f"{s['messages']:>10} {s['seed_seconds']:>8.1f} {s['loop_seconds_median']:>8.3f} {s['loop_seconds_max']:>8.3f} "
+              f"{s['new_messages_per_loop']:>9.1f} {s['api_calls_per_loop']:>9.1f} {s['llm_calls_per_loop']:>9.1f} {rss:>8}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark Runner.run_one_loop against a synthetic workspace")
+    parser.add_argument('--messages', type=int, nargs='+', default=[1000, 100_000, 1_000_000], help="history sizes to measure")
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--reply-fraction', type=float, default=0.5, help="share of messages posted in threads")
+    parser.add_argument('--days', type=float, default=30, help="days of history the messages are spread over")
+    parser.add_argument('--message-rate', type=float, default=2.0, help="new messages per minute during the measured loops")
+    parser.add_argument('--loops', type=int, default=5)
+    parser.add_argument('--sleep-period', type=float, default=300, help="simulated seconds between loops")
+    parser.add_argument('--agents', default='ProjectManagerAgent,SarcasticAgent')
+    parser.add_argument('--llm-latency', default='lognormal:0.8:0.5', help="seconds, or lognormal:<median>[:<sigma>]")
+    parser.add_argument('--reply-rate', type=float, default=0.1, help="share of LLM decisions that reply")
+    parser.add_argument('--decision-concurrency', type=int, default=1)
+    parser.add_argument('--api-latency', type=float, default=0.0, help="seconds added to every Slack API call")
+    parser.add_argument('--slack-rate-limits', action='store_true', help="enforce Slack's tier limits on both sides")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the full results to this file")
+    parser.add_argument('--keep', action='store_true', help="keep the working directory")
+    parser.add_argument('--verbose', action='store_true', help="show the runner's output")
+    parser.add_argument('--worker', choices=['seed', 'measure'], help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--end-time', type=float, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return
+    # Both workers of a size have to generate the same history, so they share its end time
+    end_time = time.time() - args.loops * args.sleep_period
+    passthrough = [arg for arg in argv if arg not in ('--keep', '--verbose')]
+    passthrough = _without_option(_without_option(passthrough, '--messages'), '--json') + ['--end-time', str(end_time)]
+    root = tempfile.mkdtemp(prefix='agentflow-bench-')
+    summaries = []
+    try:
+        for messages in args.messages:
+            workdir = os.path.join(root, str(messages))
+            os.makedirs(workdir)
+            print(f"Seeding {messages} messages...", flush=True)
+            seed = spawn('seed', messages, workdir, passthrough)
+            print(f"Measuring {args.loops} loops over {messages} messages...", flush=True)
+            summaries.append(summarize(messages, seed, spawn('measure', messages, workdir, passthrough)))
+    finally:
+        if args.keep:
+            print(f"Working files kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    print_table(summaries)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summaries, f, indent=2)
+
+def _without_option(argv: List[str], option: str) -> List[str]:
+    # Drops an option and the values following it
+    result = []
+    skipping = False
+    for arg in argv:
+        if arg == option or arg.startswith(f"{option}="):
+            skipping = arg == option
+            continue
+        if skipping and not arg.startswith('--'):
+            continue
+        skipping = False
+        result.append(arg)
+    return result
+
+if __name__ == "__main__":
+    main()
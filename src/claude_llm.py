@@ -1,25 +1,121 @@
 # claude_llm.py
 
 from config import CONFIG
+import time
 import anthropic
-from llm_interface import LLMInterface
+from typing import AsyncIterator, Iterator, Optional
+from llm_interface import LLMInterface, estimate_tokens
 
 class ClaudeLLM(LLMInterface):
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=CONFIG['anthropic']['api_key'])
-        self.model = "claude-3-opus-20240229"
+    provider = 'claude'
+    # Anthropic ignores cache breakpoints on prefixes shorter than this many tokens
+    min_cacheable_tokens = 1024
 
-    def generate_response(self, prompt: str) -> str:
+    def __init__(self, client=None, model: Optional[str] = None, rate_limiter=None, async_client=None):
+        self.client = client or anthropic.Anthropic(api_key=CONFIG['anthropic']['api_key'])
+        self.async_client = async_client or anthropic.AsyncAnthropic(api_key=CONFIG['anthropic']['api_key'])
+        self.model = model or "claude-3-opus-20240229"
+        self.max_tokens = 1024
+        self.rate_limiter = rate_limiter
+        if 'haiku' in self.model:
+            self.min_cacheable_tokens = 2048
+
+    def _throttle(self, prompt: str, system: Optional[str]) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimate_tokens(prompt) + estimate_tokens(system or '') + self.max_tokens)
+
+    async def _athrottle(self, prompt: str, system: Optional[str]) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimate_tokens(prompt) + estimate_tokens(system or '') + self.max_tokens)
+
+    def _record_response(self, start: float, response) -> None:
+        usage = getattr(response, 'usage', None)
+        # Cached prompt prefixes are reported apart from the rest of the input
+        input_tokens = sum(getattr(usage, field, 0) or 0 for field in ('input_tokens', 'cache_creation_input_tokens'))
+        self._record_call(start, True, input_tokens, getattr(usage, 'output_tokens', 0) or 0,
+                          cache_read_tokens=getattr(usage, 'cache_read_input_tokens', 0) or 0)
+
+    def _request(self, prompt: str, system: Optional[str]) -> dict:
+        request = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+        if system:
+            request["system"] = [{"type": "text", "text": system}]
+            # The system block is the same on every call for an agent, so it is marked as a cache breakpoint
+            # when it is long enough to be cached at all. Runs of indentation cost far fewer tokens than
+            # four characters each, so they are collapsed first to keep the estimate from overshooting
+            if estimate_tokens(' '.join(system.split())) >= self.min_cacheable_tokens:
+                request["system"][0]["cache_control"] = {"type": "ephemeral"}
+        return request
+
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = None
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            self._throttle(prompt, system)
+            start = time.perf_counter()
+            response = self.client.messages.create(**self._request(prompt, system))
+            self._record_response(start, response)
             print(f"Claude {self.model} prompt:\n{prompt}\nresponse:\n{response}")
             return response.content[0].text.strip()
         except Exception as e:
+            if start is not None:
+                self._record_call(start, False)
             print(f"Error generating response: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    def generate_response_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        self._throttle(prompt, system)
+        start = time.perf_counter()
+        received = []
+        ok = False
+        try:
+            # Leaving the with block (including when the consumer stops early) closes the HTTP stream
+            with self.client.messages.stream(**self._request(prompt, system)) as stream:
+                for text in stream.text_stream:
+                    received.append(text)
+                    yield text
+            ok = True
+        except GeneratorExit:
+            # The consumer stopped reading early, e.g. once the JSON object closed
+            ok = True
+            raise
+        finally:
+            self._record_stream(start, ok, prompt, system, received)
+        print(f"Claude {self.model} prompt:\n{prompt}\nstreamed response:\n{''.join(received)}")
+
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = None
+        try:
+            await self._athrottle(prompt, system)
+            start = time.perf_counter()
+            response = await self.async_client.messages.create(**self._request(prompt, system))
+            self._record_response(start, response)
+            print(f"Claude {self.model} prompt:\n{prompt}\nresponse:\n{response}")
+            return response.content[0].text.strip()
+        except Exception as e:
+            if start is not None:
+                self._record_call(start, False)
+            print(f"Error generating response: {e}")
+            return ""
+
+    async def agenerate_response_stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        await self._athrottle(prompt, system)
+        start = time.perf_counter()
+        received = []
+        ok = False
+        try:
+            async with self.async_client.messages.stream(**self._request(prompt, system)) as stream:
+                async for text in stream.text_stream:
+                    received.append(text)
+                    yield text
+            ok = True
+        except GeneratorExit:
+            ok = True
+            raise
+        finally:
+            self._record_stream(start, ok, prompt, system, received)
+        print(f"Claude {self.model} prompt:\n{prompt}\nstreamed response:\n{''.join(received)}")
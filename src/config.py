@@ -1,8 +1,12 @@
 import yaml
 from typing import Dict, Any
 
-def load_config() -> Dict[str, Any]:
-    with open('config.yaml', 'r') as config_file:
-        return yaml.safe_load(config_file)
+# Filled in by load_config; modules hold on to this dict, so it is updated in place
+CONFIG: Dict[str, Any] = {}
 
-CONFIG = load_config()
+def load_config(path: str = 'config.yaml') -> Dict[str, Any]:
+    with open(path, 'r') as config_file:
+        config = yaml.safe_load(config_file) or {}
+    CONFIG.clear()
+    CONFIG.update(config)
+    return CONFIG
@@ -1,43 +1,139 @@
 # db.py
 
+import os
 import json
+import bisect
+import threading
 import pandas as pd
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+from recurrence import next_occurrence
 
 class ActionDatabase:
-    def __init__(self, workspace_name):
+    """
+    Scheduled actions for one workspace. actions_<workspace>.json holds a snapshot and every
+    mutation after it is appended to actions_<workspace>.log, so a change costs one small
+    fsynced write. On startup the log is replayed over the snapshot; once it grows past
+    compact_after records it is folded back into a new snapshot, written atomically.
+    """
+
+    def __init__(self, workspace_name, compact_after: int = 1000):
         self.file_path = f'actions_{workspace_name}.json'
+        self.log_path = f'actions_{workspace_name}.log'
+        self.compact_after = compact_after
+        self.lock = threading.RLock()
+        self.log_records = 0
         self.actions = self.load_actions()
+        # Sorted (execution_time, thread_id, agent_name) index, so due lookups are a bisect instead of a scan
+        self.schedule: List[Tuple[pd.Timestamp, str, str]] = sorted(
+            (pd.Timestamp(action['execution_time']), thread_id, action['agent_name'])
+            for thread_id, actions in self.actions.items()
+            for action in actions
+        )
+        self.log_file = open(self.log_path, 'a')
 
     def load_actions(self) -> Dict[str, List[Dict[str, Any]]]:
         try:
             with open(self.file_path, 'r') as f:
                 data = json.load(f)
-            return {str(k): v for k, v in data.items()}
+            actions = {str(k): v for k, v in data.items()}
+        except FileNotFoundError:
+            actions = {}
+        self.log_records = 0
+        try:
+            with open(self.log_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append; everything before it is intact
+                        print(f"Skipping unreadable record in {self.log_path}")
+                        continue
+                    self._apply(actions, record)
+                    self.log_records += 1
         except FileNotFoundError:
-            return {}
+            pass
+        return actions
+
+    @staticmethod
+    def _apply(actions: Dict[str, List[Dict[str, Any]]], record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply one log record to an actions dict and return the actions it displaced.
+        """
+        thread_id = record['thread_id']
+        existing = actions.get(thread_id, [])
+        if record['op'] == 'add':
+            action = record['action']
+            removed = [a for a in existing if a['agent_name'] == action['agent_name']]
+            # Enforce one delayed action per agent per thread constraint
+            actions[thread_id] = [a for a in existing if a['agent_name'] != action['agent_name']] + [action]
+        elif record['op'] == 'remove':
+            removed = [a for a in existing if a['description'] == record['description']]
+            remaining = [a for a in existing if a['description'] != record['description']]
+            if remaining:
+                actions[thread_id] = remaining
+            else:
+                actions.pop(thread_id, None)
+        else:
+            raise ValueError(f"Unknown action log op: {record['op']}")
+        return removed
+
+    def _append_log(self, *records: Dict[str, Any]):
+        self.log_file.write(''.join(json.dumps(record, default=str) + '\n' for record in records))
+        self.log_file.flush()
+        os.fsync(self.log_file.fileno())
+        self.log_records += len(records)
+        if self.log_records >= self.compact_after:
+            self.save_actions()
 
     def save_actions(self):
-        serializable_actions = {str(k): v for k, v in self.actions.items()}
-        with open(self.file_path, 'w') as f:
-            json.dump(serializable_actions, f, indent=2, default=str)
+        with self.lock:
+            serializable_actions = {str(k): v for k, v in self.actions.items()}
+            tmp_path = f'{self.file_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(serializable_actions, f, indent=2, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            # Replaying the log over the new snapshot is idempotent, so a crash before truncation is harmless
+            self.log_file.close()
+            self.log_file = open(self.log_path, 'w')
+            self.log_records = 0
+
+    def close(self):
+        with self.lock:
+            self.log_file.close()
 
-    def add_action(self, thread_id: str, channel: str, description: str, execution_time: pd.Timestamp, agent_name: str):
+    def _commit(self, record: Dict[str, Any]):
+        # Caller holds the lock; applies the record in memory and keeps the schedule in step
+        thread_id = record['thread_id']
+        for displaced in self._apply(self.actions, record):
+            self._unindex(thread_id, displaced)
+        if record['op'] == 'add':
+            action = record['action']
+            bisect.insort(self.schedule, (pd.Timestamp(action['execution_time']), thread_id, action['agent_name']))
+
+    @staticmethod
+    def _add_record(thread_id: str, channel: str, description: str, execution_time: pd.Timestamp, agent_name: str,
+                    recurrence: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if execution_time.tzinfo is not None:
+            # Checked before anything is applied: the schedule holds naive local times and cannot mix the two
+            raise ValueError(f"Execution time must be naive local time: {execution_time}")
         action = {
             "channel": channel,
             "description": description,
             "execution_time": execution_time.isoformat(),
             "agent_name": agent_name
         }
-        thread_id_str = str(thread_id)
-        if thread_id_str not in self.actions:
-            self.actions[thread_id_str] = []
-        
-        # Enforce one delayed action per agent per thread constraint
-        self.actions[thread_id_str] = [a for a in self.actions[thread_id_str] if a['agent_name'] != agent_name]
-        self.actions[thread_id_str].append(action)
-        
-        self.save_actions()
+        if recurrence:
+            action["recurrence"] = recurrence
+        return {'op': 'add', 'thread_id': str(thread_id), 'action': action}
+
+    def add_action(self, thread_id: str, channel: str, description: str, execution_time: pd.Timestamp, agent_name: str,
+                   recurrence: Optional[Dict[str, Any]] = None):
+        record = self._add_record(thread_id, channel, description, execution_time, agent_name, recurrence)
+        with self.lock:
+            self._commit(record)
+            self._append_log(record)
         print(f"Debug - Added action for {agent_name} due at: {execution_time}")
 
     def get_actions(self, thread_id: str) -> List[Dict[str, Any]]:
@@ -45,21 +141,68 @@ class ActionDatabase:
 
     def remove_action(self, thread_id: str, description: str):
         thread_id_str = str(thread_id)
-        if thread_id_str in self.actions:
-            self.actions[thread_id_str] = [action for action in self.actions[thread_id_str] if action['description'] != description]
-            if not self.actions[thread_id_str]:
-                del self.actions[thread_id_str]
-            self.save_actions()
-            return True
-        return False
+        with self.lock:
+            if thread_id_str in self.actions:
+                record = {'op': 'remove', 'thread_id': thread_id_str, 'description': description}
+                self._commit(record)
+                self._append_log(record)
+                return True
+            return False
+
+    def complete_action(self, thread_id: str, action: Dict[str, Any], now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+        """
+        Called once a due action has run. Recurring actions are re-armed for their next
+        occurrence after now (missed occurrences are skipped), one-off actions are removed.
+        Returns the next execution time, or None if the action was removed.
+        """
+        return self.complete_actions([(thread_id, action)], now)[0]
+
+    def complete_actions(self, completed: List[Tuple[str, Dict[str, Any]]], now: Optional[pd.Timestamp] = None) -> List[Optional[pd.Timestamp]]:
+        """
+        complete_action for a batch of executed actions, written to the log with a single fsync.
+        """
+        now = now or pd.Timestamp.now()
+        records = []
+        next_times = []
+        with self.lock:
+            for thread_id, action in completed:
+                thread_id_str = str(thread_id)
+                recurrence = action.get('recurrence')
+                if recurrence:
+                    execution_time = next_occurrence(recurrence, now)
+                    record = self._add_record(thread_id_str, action['channel'], action['description'], execution_time, action['agent_name'], recurrence)
+                else:
+                    execution_time = None
+                    if thread_id_str not in self.actions:
+                        next_times.append(None)
+                        continue
+                    record = {'op': 'remove', 'thread_id': thread_id_str, 'description': action['description']}
+                self._commit(record)
+                records.append(record)
+                next_times.append(execution_time)
+            if records:
+                self._append_log(*records)
+        return next_times
+
+    def _unindex(self, thread_id: str, action: Dict[str, Any]):
+        entry = (pd.Timestamp(action['execution_time']), thread_id, action['agent_name'])
+        index = bisect.bisect_left(self.schedule, entry)
+        if index < len(self.schedule) and self.schedule[index] == entry:
+            del self.schedule[index]
 
     def get_due_actions(self, current_time: pd.Timestamp) -> List[Tuple[str, Dict[str, Any]]]:
-        due_actions = []
-        for thread_id, actions in self.actions.items():
-            for action in actions:
-                if pd.Timestamp(action['execution_time']) <= current_time:
-                    due_actions.append((thread_id, action))
-        return due_actions
+        with self.lock:
+            due_count = bisect.bisect_right(self.schedule, current_time, key=lambda entry: entry[0])
+            due_actions = []
+            for _, thread_id, agent_name in self.schedule[:due_count]:
+                action = next(a for a in self.actions[thread_id] if a['agent_name'] == agent_name)
+                due_actions.append((thread_id, action))
+            return due_actions
+
+    def next_due_time(self, after: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+        with self.lock:
+            index = 0 if after is None else bisect.bisect_right(self.schedule, after, key=lambda entry: entry[0])
+            return self.schedule[index][0] if index < len(self.schedule) else None
 
     def get_all_thread_ids(self) -> List[str]:
         return list(self.actions.keys())
@@ -71,4 +214,4 @@ class ActionDatabase:
                 action_copy = action.copy()
                 action_copy['thread_id'] = thread_id
                 all_actions.append(action_copy)
-        return all_actions
\ No newline at end of file
+        return all_actions
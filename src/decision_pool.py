@@ -0,0 +1,91 @@
+# decision_pool.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Tuple
+from profiler import phase
+
+class DecisionPool:
+    """
+    Runs agents' decide_action calls concurrently. Each LLM provider gets its own worker pool
+    sized to its limit, and a shared semaphore caps the number of calls in flight overall.
+    """
+
+    def __init__(self, max_concurrency: int, provider_concurrency: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.provider_concurrency = provider_concurrency or {}
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.executors: Dict[str, ThreadPoolExecutor] = {}
+        self.lock = threading.Lock()
+
+    def _executor(self, provider: str) -> ThreadPoolExecutor:
+        with self.lock:
+            if provider not in self.executors:
+                workers = self.provider_concurrency.get(provider, self.max_concurrency)
+                self.executors[provider] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"decide-{provider}")
+            return self.executors[provider]
+
+    def _decide(self, agent, thread: Dict[str, Any]):
+        with self.semaphore, phase('decide'):
+            # current_thread is thread-local on agents, so this does not disturb other workers
+            agent.read_thread(thread)
+            return agent.decide_action()
+
+    def submit(self, agent, thread: Dict[str, Any]) -> Future:
+        return self._executor(agent.llm_type).submit(self._decide, agent, thread)
+
+    def _respond_to_due_task(self, agent, thread: Dict[str, Any], description: str):
+        with self.semaphore:
+            return agent.respond_to_due_task(thread, description)
+
+    def submit_due_task(self, agent, thread: Dict[str, Any], description: str) -> Future:
+        return self._executor(agent.llm_type).submit(self._respond_to_due_task, agent, thread, description)
+
+    def shutdown(self):
+        with self.lock:
+            for executor in self.executors.values():
+                executor.shutdown(wait=False)
+            self.executors = {}
+
+class AsyncDecisionPool:
+    """
+    Same interface as DecisionPool, but decisions run as tasks on one event loop in a background
+    thread using the agents' adecide_action, so hundreds can be in flight without a thread each.
+    """
+
+    def __init__(self, max_concurrency: int, provider_concurrency: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.provider_concurrency = provider_concurrency or {}
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="decide-async", daemon=True)
+        self.thread.start()
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphores(self, provider: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        # Only called on the loop thread, so no locking is needed
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        if provider not in self.provider_semaphores:
+            self.provider_semaphores[provider] = asyncio.Semaphore(self.provider_concurrency.get(provider, self.max_concurrency))
+        return self.semaphore, self.provider_semaphores[provider]
+
+    async def _decide(self, agent, thread: Dict[str, Any]):
+        semaphore, provider_semaphore = self._semaphores(agent.llm_type)
+        async with provider_semaphore, semaphore:
+            return await agent.adecide_action(thread)
+
+    async def _respond_to_due_task(self, agent, thread: Dict[str, Any], description: str):
+        semaphore, provider_semaphore = self._semaphores(agent.llm_type)
+        async with provider_semaphore, semaphore:
+            return await asyncio.to_thread(agent.respond_to_due_task, thread, description)
+
+    def submit(self, agent, thread: Dict[str, Any]) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._decide(agent, thread), self.loop)
+
+    def submit_due_task(self, agent, thread: Dict[str, Any], description: str) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._respond_to_due_task(agent, thread, description), self.loop)
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,104 @@
+# fake_llm.py
+
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Union
+from llm_interface import LLMInterface
+
+NO_ACTION_RESPONSE = json.dumps({
+    "immediate_action": {"needed": False},
+    "delayed_action": {"needed": False}
+})
+
+def reply_response(text: str) -> str:
+    return json.dumps({
+        "immediate_action": {"needed": True, "description": "Reply", "response": text, "execution_time": "Immediately"},
+        "delayed_action": {"needed": False}
+    })
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: Optional[int] = None) -> Callable[[], float]:
+    """
+    Latency sampler with the long right tail of real LLM APIs: half the calls finish within
+    median seconds and a few take several times as long.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    def sample() -> float:
+        with lock:
+            return median * rng.lognormvariate(0.0, sigma)
+    return sample
+
+def parse_latency(spec: str) -> Union[float, Callable[[], float]]:
+    """
+    Parse a latency given as seconds ('0.8') or as 'lognormal:<median>[:<sigma>]'.
+    """
+    kind, _, params = spec.partition(':')
+    if kind == 'lognormal':
+        values = [float(value) for value in params.split(':') if value]
+        return lognormal_latency(*values)
+    return float(spec)
+
+class FakeLLM(LLMInterface):
+    """
+    Offline LLM for tests and benchmarks. Answers with a fixed response, or with whatever the
+    responder callable returns for the prompt, after a simulated latency (fixed seconds, or a
+    callable drawing one per call such as lognormal_latency). Streams are split into
+    chunk_size pieces so early termination can be observed.
+    """
+
+    provider = 'fake'
+
+    def __init__(self, response: Union[str, Callable[[str], str]] = NO_ACTION_RESPONSE,
+                 latency: Union[float, Callable[[], float]] = 0.0,
+                 chunk_size: int = 16, model: str = "fake-llm"):
+        self.response = response
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.model = model
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.prompts: List[str] = []
+        self.chunks_streamed = 0
+
+    def _respond(self, prompt: str, system: Optional[str], start: float) -> str:
+        with self.lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+        response = self.response(prompt) if callable(self.response) else self.response
+        self._record_stream(start, True, prompt, system, [response])
+        return response
+
+    def _latency(self) -> float:
+        return self.latency() if callable(self.latency) else self.latency
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = time.perf_counter()
+        time.sleep(self._latency())
+        return self._respond(prompt, system, start)
+
+    def generate_response_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        start = time.perf_counter()
+        time.sleep(self._latency())
+        for chunk in self._chunks(self._respond(prompt, system, start)):
+            with self.lock:
+                self.chunks_streamed += 1
+            yield chunk
+
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = time.perf_counter()
+        await asyncio.sleep(self._latency())
+        return self._respond(prompt, system, start)
+
+    async def agenerate_response_stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        await asyncio.sleep(self._latency())
+        for chunk in self._chunks(self._respond(prompt, system, start)):
+            with self.lock:
+                self.chunks_streamed += 1
+            yield chunk
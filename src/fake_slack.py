@@ -0,0 +1,392 @@
+# fake_slack.py
+
+import base64
+import bisect
+import math
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+from slack_rate_limiter import SlackRateLimiter, METHOD_TIERS, SPECIAL_LIMITS
+
+MESSAGE_TEMPLATES = [
+    "Can someone review the deploy checklist before Friday?",
+    "{mention} please send the Q3 numbers when you get a chance",
+    "Reminder: standup moves to 10am tomorrow",
+    "lol",
+    "Thanks, that fixed it!",
+    "Who owns the flaky integration test?",
+    "Pushed the fix, CI is green now",
+    "Let's sync on the roadmap next week",
+    "Sounds good",
+    "Any update on the customer escalation? {mention}",
+    "I'll take a look after lunch",
+    "Meeting notes are in the doc",
+]
+
+# Channel index and microsecond timestamp packed into one sortable int64
+CHANNEL_SHIFT = 51
+TS_MASK = (1 << CHANNEL_SHIFT) - 1
+
+def slack_ts(micros: int) -> str:
+    return f"{micros // 1_000_000}.{micros % 1_000_000:06d}"
+
+def ts_micros(ts: str) -> int:
+    seconds, _, fraction = str(ts).partition('.')
+    return int(seconds) * 1_000_000 + int((fraction + '000000')[:6])
+
+class SyntheticWorkspace:
+    """
+    Deterministic message history for an offline workspace: top-level messages spread over
+    the last days, a reply_fraction of all messages in threads with a long-tailed length, and
+    channels with skewed traffic. History is held column-wise in numpy arrays (about 32 bytes
+    a message) so a million messages stay small next to the bot being measured. advance()
+    adds live traffic at message_rate messages a minute.
+    """
+
+    def __init__(self, messages: int = 1000, channels: int = 20, users: int = 50, bots: int = 2,
+                 reply_fraction: float = 0.5, days: float = 30, message_rate: float = 2.0,
+                 end_time: Optional[float] = None, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.channel_ids = [f"C{i:05d}" for i in range(channels)]
+        self.channel_names = [f"channel-{i}" for i in range(channels)]
+        self.channel_index = {**{channel_id: i for i, channel_id in enumerate(self.channel_ids)},
+                              **{name: i for i, name in enumerate(self.channel_names)}}
+        self.user_ids = [f"U{i:05d}" for i in range(users)] + [f"B{i:03d}" for i in range(bots)]
+        self.n_users = users
+        self.n_bots = bots
+        self.reply_fraction = reply_fraction
+        self.message_rate = message_rate
+        self.lock = threading.RLock()
+        end_us = int((end_time if end_time is not None else time.time()) * 1_000_000)
+        self._generate(messages, int(days * 86400 * 1_000_000), end_us)
+        self.clock_us = end_us
+        # Messages added after generation: sorted (ts, channel, thread_ts, user, text) per channel
+        self.live: Dict[int, List[Tuple[int, int, int, str, str]]] = {}
+        self.live_replies: Dict[Tuple[int, int], List[int]] = {}
+        self.recent_parents: Deque[Tuple[int, int]] = deque(self._recent_base_parents(200), maxlen=200)
+
+    def _posters(self, count: int) -> np.ndarray:
+        posters = self.rng.integers(0, self.n_users, count)
+        if self.n_bots:
+            from_bot = self.rng.random(count) < 0.02
+            posters[from_bot] = self.n_users + self.rng.integers(0, self.n_bots, int(from_bot.sum()))
+        return posters.astype(np.int32)
+
+    def _generate(self, messages: int, span_us: int, end_us: int):
+        n_top = max(1, int(round(messages * (1 - self.reply_fraction)))) if messages else 0
+        n_reply = messages - n_top
+        channels = len(self.channel_ids)
+        weights = 1.0 / np.arange(1, channels + 1)
+        # Leave room to make every timestamp unique below end_us
+        latest = end_us - messages - 1
+        top_ts = self.rng.integers(latest - span_us, latest, n_top)
+        top_channel = self.rng.choice(channels, n_top, p=weights / weights.sum())
+        parent = np.full(messages, -1, dtype=np.int64)
+        reply_ts = np.empty(0, dtype=np.int64)
+        if n_reply:
+            threaded = np.flatnonzero(self.rng.random(n_top) < 0.2)
+            if len(threaded) == 0:
+                threaded = np.array([0])
+            popularity = self.rng.pareto(1.5, len(threaded)) + 1
+            parent[n_top:] = self.rng.choice(threaded, n_reply, p=popularity / popularity.sum())
+            delay = self.rng.exponential(3600 * 1_000_000, n_reply).astype(np.int64) + 1
+            reply_ts = np.minimum(top_ts[parent[n_top:]] + delay, latest)
+        ts = np.concatenate([top_ts, reply_ts]).astype(np.int64)
+        # Stable sort then add the rank: timestamps become unique and replies stay after parents
+        order = np.argsort(ts, kind='stable')
+        ts[order] = ts[order] + np.arange(messages)
+        is_reply = parent >= 0
+        channel = np.concatenate([top_channel, top_channel[parent[n_top:]]]).astype(np.int64)
+        thread_ts = np.zeros(messages, dtype=np.int64)
+        thread_ts[is_reply] = ts[parent[is_reply]]
+        reply_count = np.bincount(parent[is_reply], minlength=messages)
+        latest_reply = np.zeros(messages, dtype=np.int64)
+        np.maximum.at(latest_reply, parent[is_reply], ts[is_reply])
+        has_replies = reply_count > 0
+        thread_ts[has_replies] = ts[has_replies]
+
+        keys = (channel << CHANNEL_SHIFT) | ts
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.thread_ts = thread_ts[order]
+        self.users = self._posters(messages)
+        self.texts = self.rng.integers(0, len(MESSAGE_TEMPLATES), messages).astype(np.int16)
+        parents = np.flatnonzero(has_replies[order]).astype(np.int32)
+        self.parent_index = parents
+        self.parent_reply_count = reply_count[order][parents].astype(np.int32)
+        self.parent_latest_reply = latest_reply[order][parents]
+        top = np.flatnonzero((self.thread_ts == 0) | (self.thread_ts == (self.keys & TS_MASK))).astype(np.int32)
+        self.top_index = top
+        self.top_keys = self.keys[top]
+        replies = np.flatnonzero((self.thread_ts != 0) & (self.thread_ts != (self.keys & TS_MASK)))
+        reply_keys = ((self.keys[replies] >> CHANNEL_SHIFT) << CHANNEL_SHIFT) | self.thread_ts[replies]
+        # keys are already in (channel, ts) order, so a stable sort keeps replies in time order
+        reply_order = np.argsort(reply_keys, kind='stable')
+        self.reply_index = replies[reply_order].astype(np.int32)
+        self.reply_keys = reply_keys[reply_order]
+
+    def _recent_base_parents(self, count: int) -> List[Tuple[int, int]]:
+        latest = np.argsort(self.top_keys & TS_MASK)[-count:]
+        return [(int(self.top_keys[i] >> CHANNEL_SHIFT), int(self.top_keys[i] & TS_MASK)) for i in latest]
+
+    def __len__(self) -> int:
+        return len(self.keys) + sum(len(messages) for messages in self.live.values())
+
+    def _text(self, template: int, poster: int) -> str:
+        return MESSAGE_TEMPLATES[template].format(mention=f"<@{self.user_ids[(poster + 1) % self.n_users]}>")
+
+    def _base_message(self, i: int) -> Dict[str, Any]:
+        channel = int(self.keys[i] >> CHANNEL_SHIFT)
+        ts = int(self.keys[i] & TS_MASK)
+        poster = int(self.users[i])
+        message = {'type': 'message', 'ts': slack_ts(ts), 'user': self.user_ids[poster], 'text': self._text(int(self.texts[i]), poster)}
+        if poster >= self.n_users:
+            message['bot_id'] = self.user_ids[poster]
+        thread_ts = int(self.thread_ts[i])
+        live = self.live_replies.get((channel, ts))
+        if thread_ts == ts or live:
+            position = np.searchsorted(self.parent_index, i)
+            is_parent = position < len(self.parent_index) and self.parent_index[position] == i
+            count = int(self.parent_reply_count[position]) if is_parent else 0
+            latest = int(self.parent_latest_reply[position]) if is_parent else 0
+            if live:
+                count += live[0]
+                latest = max(latest, live[1])
+            message.update(thread_ts=slack_ts(ts), reply_count=count, latest_reply=slack_ts(latest))
+        elif thread_ts:
+            message['thread_ts'] = slack_ts(thread_ts)
+        return message
+
+    def _live_message(self, channel: int, entry: Tuple[int, int, int, str, str]) -> Dict[str, Any]:
+        ts, _, thread_ts, user, text = entry
+        message = {'type': 'message', 'ts': slack_ts(ts), 'user': user, 'text': text}
+        if user in self.user_ids[self.n_users:]:
+            message['bot_id'] = user
+        live = self.live_replies.get((channel, ts))
+        if live:
+            message.update(thread_ts=slack_ts(ts), reply_count=live[0], latest_reply=slack_ts(live[1]))
+        elif thread_ts:
+            message['thread_ts'] = slack_ts(thread_ts)
+        return message
+
+    def _add_live(self, channel: int, ts: int, thread_ts: int, user: str, text: str):
+        bisect.insort(self.live.setdefault(channel, []), (ts, channel, thread_ts, user, text))
+        if thread_ts:
+            state = self.live_replies.setdefault((channel, thread_ts), [0, 0])
+            state[0] += 1
+            state[1] = max(state[1], ts)
+        else:
+            self.recent_parents.append((channel, ts))
+
+    def advance(self, seconds: float) -> int:
+        """
+        Add the traffic of the next seconds of simulated time (never past the real clock) and
+        return how many messages arrived.
+        """
+        with self.lock:
+            end_us = min(self.clock_us + int(seconds * 1_000_000), int(time.time() * 1_000_000))
+            count = min(int(self.rng.poisson(self.message_rate * seconds / 60)), max(0, end_us - self.clock_us))
+            if count:
+                offsets = np.sort(self.rng.choice(end_us - self.clock_us, count, replace=False))
+                posters = self._posters(count)
+                templates = self.rng.integers(0, len(MESSAGE_TEMPLATES), count)
+                is_reply = self.rng.random(count) < self.reply_fraction
+                for offset, poster, template, reply in zip(offsets, posters, templates, is_reply):
+                    ts = self.clock_us + int(offset)
+                    if reply and self.recent_parents:
+                        channel, thread_ts = self.recent_parents[int(self.rng.integers(0, len(self.recent_parents)))]
+                    else:
+                        channel, thread_ts = int(self.rng.integers(0, len(self.channel_ids))), 0
+                    self._add_live(channel, ts, thread_ts, self.user_ids[poster], self._text(int(template), int(poster)))
+            self.clock_us = end_us
+            return count
+
+    def post(self, channel: str, text: str, thread_ts: Optional[str] = None, user: Optional[str] = None) -> Dict[str, Any]:
+        with self.lock:
+            channel_index = self.channel_index[channel.lstrip('#')]
+            messages = self.live.get(channel_index)
+            ts = max(int(time.time() * 1_000_000), (messages[-1][0] + 1) if messages else 0)
+            user = user or (self.user_ids[self.n_users] if self.n_bots else self.user_ids[0])
+            self._add_live(channel_index, ts, ts_micros(thread_ts) if thread_ts else 0, user, text)
+            return {'channel': self.channel_ids[channel_index], 'ts': slack_ts(ts)}
+
+    def history(self, channel: str, oldest: Optional[str] = None) -> List[Any]:
+        """
+        Top-level messages of a channel newer than oldest, newest first, as a lazy list of
+        base indexes and live entries.
+        """
+        channel_index = self.channel_index[channel]
+        oldest_us = ts_micros(oldest) if oldest else 0
+        live = [entry for entry in reversed(self.live.get(channel_index, []))
+                if entry[0] > oldest_us and (not entry[2] or entry[2] == entry[0])]
+        low = np.searchsorted(self.top_keys, (channel_index << CHANNEL_SHIFT) | oldest_us, side='right')
+        high = np.searchsorted(self.top_keys, (channel_index << CHANNEL_SHIFT) | TS_MASK, side='right')
+        return live + [int(i) for i in self.top_index[low:high][::-1]]
+
+    def replies(self, channel: str, ts: str) -> Optional[List[Any]]:
+        channel_index = self.channel_index[channel]
+        thread_us = ts_micros(ts)
+        key = (channel_index << CHANNEL_SHIFT) | thread_us
+        position = np.searchsorted(self.keys, key)
+        parent: List[Any] = [int(position)] if position < len(self.keys) and self.keys[position] == key else []
+        live = self.live.get(channel_index, [])
+        if not parent:
+            parent = [entry for entry in live if entry[0] == thread_us and not entry[2]]
+            if not parent:
+                return None
+        low = np.searchsorted(self.reply_keys, key, side='left')
+        high = np.searchsorted(self.reply_keys, key, side='right')
+        base = [int(i) for i in self.reply_index[low:high]]
+        return parent + base + [entry for entry in live if entry[2] == thread_us and entry[0] != thread_us]
+
+    def message(self, channel: str, item: Any) -> Dict[str, Any]:
+        if isinstance(item, tuple):
+            return self._live_message(item[1], item)
+        return self._base_message(item)
+
+    def members(self) -> List[Dict[str, Any]]:
+        return [{'id': user_id, 'name': f"user{i}", 'real_name': f"user {i}", 'is_bot': i >= self.n_users, 'deleted': False}
+                for i, user_id in enumerate(self.user_ids)]
+
+    def channels(self) -> List[Dict[str, Any]]:
+        return [{'id': channel_id, 'name': name, 'is_channel': True, 'is_archived': False}
+                for channel_id, name in zip(self.channel_ids, self.channel_names)]
+
+    def raw_messages(self, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        The generated history in the frame shape SlackInteractor fetches, for seeding a
+        MessageStore without going through the API.
+        """
+        columns = ['type', 'subtype', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username']
+        for start in range(0, len(self.keys), chunk_size):
+            rows = []
+            for i in range(start, min(start + chunk_size, len(self.keys))):
+                message = self._base_message(i)
+                rows.append((message['type'], np.nan, message['ts'], message['user'], message.get('thread_ts', np.nan),
+                             message['text'], self.channel_ids[int(self.keys[i] >> CHANNEL_SHIFT)], np.nan))
+            yield pd.DataFrame(rows, columns=columns)
+
+    def thread_states(self) -> List[Tuple[str, str, int, str]]:
+        # Normalized the way SlackInteractor.find_changed_threads compares them
+        return [(self.channel_ids[int(self.keys[i] >> CHANNEL_SHIFT)], f"{float(slack_ts(int(self.keys[i] & TS_MASK))):.6f}",
+                 int(count), f"{float(slack_ts(int(latest))):.6f}")
+                for i, count, latest in zip(self.parent_index, self.parent_reply_count, self.parent_latest_reply)]
+
+class FakeWebClient:
+    """
+    In-process stand-in for slack_sdk's WebClient over a SyntheticWorkspace. Pages like Slack
+    (opaque cursor in response_metadata.next_cursor, limit capped at MAX_PAGE_SIZE, history
+    newest first, replies oldest first). With rate_limits, a call over its method's per-minute
+    budget gets a 429 ratelimited error with a Retry-After header. Every call is counted.
+    """
+
+    MAX_PAGE_SIZE = 1000
+
+    def __init__(self, workspace: SyntheticWorkspace, rate_limits: Optional[Dict[str, float]] = None, latency: float = 0.0):
+        self.workspace = workspace
+        self.rate_limits = rate_limits
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.windows: Dict[str, Deque[float]] = {}
+
+    @staticmethod
+    def tier_limits() -> Dict[str, float]:
+        limiter = SlackRateLimiter()
+        return {method: limiter.limit_for(method) for method in list(METHOD_TIERS) + list(SPECIAL_LIMITS)}
+
+    def total_calls(self) -> int:
+        with self.lock:
+            return sum(self.calls.values())
+
+    def _response(self, method: str, data: Dict[str, Any], status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> SlackResponse:
+        return SlackResponse(client=self, http_verb='POST', api_url=f"https://slack.com/api/{method}", req_args={},
+                             data=data, headers=headers or {}, status_code=status_code)
+
+    def _error(self, method: str, error: str, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+        response = self._response(method, {'ok': False, 'error': error}, status_code, headers)
+        raise SlackApiError(f"The request to the Slack API failed. (url: {response.api_url})", response)
+
+    def _call(self, method: str):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.calls[method] += 1
+            limit = (self.rate_limits or {}).get(method)
+            if not limit:
+                return
+            now = time.monotonic()
+            window = self.windows.setdefault(method, deque())
+            while window and window[0] <= now - 60:
+                window.popleft()
+            if len(window) >= limit:
+                self.rate_limited[method] += 1
+                retry_after = str(max(1, math.ceil(window[0] + 60 - now)))
+                self._error(method, 'ratelimited', 429, {'Retry-After': retry_after})
+            window.append(now)
+
+    @staticmethod
+    def _cursor(offset: int) -> str:
+        return base64.b64encode(f"offset:{offset}".encode()).decode()
+
+    @staticmethod
+    def _offset(cursor: Optional[str]) -> int:
+        return int(base64.b64decode(cursor).decode().split(':')[1]) if cursor else 0
+
+    def _page(self, method: str, field: str, items: List[Any], limit: Optional[int], cursor: Optional[str],
+              render=lambda item: item, **extra) -> SlackResponse:
+        offset = self._offset(cursor)
+        limit = min(limit or 100, self.MAX_PAGE_SIZE)
+        page = items[offset:offset + limit]
+        more = offset + limit < len(items)
+        data = {'ok': True, field: [render(item) for item in page], 'response_metadata': {'next_cursor': self._cursor(offset + limit) if more else ''}}
+        data.update(extra)
+        if field == 'messages':
+            data['has_more'] = more
+        return self._response(method, data)
+
+    def conversations_list(self, types: str = 'public_channel', exclude_archived: bool = False, limit: Optional[int] = None,
+                           cursor: Optional[str] = None, **kwargs) -> SlackResponse:
+        self._call('conversations.list')
+        return self._page('conversations.list', 'channels', self.workspace.channels(), limit, cursor)
+
+    def users_list(self, limit: Optional[int] = None, cursor: Optional[str] = None, **kwargs) -> SlackResponse:
+        self._call('users.list')
+        return self._page('users.list', 'members', self.workspace.members(), limit, cursor)
+
+    def conversations_history(self, channel: str, oldest: Optional[str] = None, limit: Optional[int] = None,
+                              cursor: Optional[str] = None, **kwargs) -> SlackResponse:
+        self._call('conversations.history')
+        if channel not in self.workspace.channel_index:
+            self._error('conversations.history', 'channel_not_found')
+        with self.workspace.lock:
+            items = self.workspace.history(channel, oldest)
+            return self._page('conversations.history', 'messages', items, limit, cursor,
+                              render=lambda item: self.workspace.message(channel, item))
+
+    def conversations_replies(self, channel: str, ts: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              **kwargs) -> SlackResponse:
+        self._call('conversations.replies')
+        if channel not in self.workspace.channel_index:
+            self._error('conversations.replies', 'channel_not_found')
+        with self.workspace.lock:
+            items = self.workspace.replies(channel, ts)
+            if items is None:
+                self._error('conversations.replies', 'thread_not_found')
+            return self._page('conversations.replies', 'messages', items, limit, cursor,
+                              render=lambda item: self.workspace.message(channel, item))
+
+    def chat_postMessage(self, channel: str, text: str, thread_ts: Optional[str] = None, username: Optional[str] = None,
+                         **kwargs) -> SlackResponse:
+        self._call('chat.postMessage')
+        if channel.lstrip('#') not in self.workspace.channel_index:
+            self._error('chat.postMessage', 'channel_not_found')
+        posted = self.workspace.post(channel, text, thread_ts)
+        return self._response('chat.postMessage', {'ok': True, 'channel': posted['channel'], 'ts': posted['ts'],
+                                                   'message': {'text': text, 'username': username, 'ts': posted['ts']}})
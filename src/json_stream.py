@@ -0,0 +1,113 @@
+# json_stream.py
+
+from typing import AsyncIterable, Iterable, Optional, Sequence
+
+class JsonObjectScanner:
+    """
+    Incremental brace matcher for streamed LLM output. It tracks nesting depth outside of
+    string literals, so the end of the first top-level JSON object is known as soon as its
+    closing brace arrives.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """
+        Scan the next chunk and return the offset just past the closing brace, or None if
+        the object is still open.
+        """
+        for index, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif not self.started:
+                # Quotes in any prose before the object are not JSON strings
+                continue
+            elif char == '"':
+                self.in_string = True
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return index + 1
+        return None
+
+def starts_with_any(text: str, prefixes: Sequence[str]) -> Optional[bool]:
+    """
+    True if text begins with one of the prefixes (case-insensitive), False once it cannot,
+    and None while it is still too short to tell.
+    """
+    text = text.lstrip().lower()
+    undecided = False
+    for prefix in prefixes:
+        prefix = prefix.lower()
+        if text.startswith(prefix):
+            return True
+        if prefix.startswith(text):
+            undecided = True
+    return None if undecided else False
+
+class JsonCollector:
+    """
+    Accumulates streamed chunks until the first top-level JSON object closes, or until the
+    text is seen to start with one of stop_prefixes.
+    """
+
+    def __init__(self, stop_prefixes: Sequence[str] = ()):
+        self.scanner = JsonObjectScanner()
+        self.stop_prefixes = stop_prefixes
+        self.check_prefixes = bool(stop_prefixes)
+        self.text = ''
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add a chunk and return True once no more are needed.
+        """
+        end = self.scanner.feed(chunk)
+        if end is not None:
+            self.text += chunk[:end]
+            return True
+        self.text += chunk
+        if self.check_prefixes:
+            starts = starts_with_any(self.text, self.stop_prefixes)
+            if starts:
+                return True
+            self.check_prefixes = starts is None
+        return False
+
+def collect_json_object(chunks: Iterable[str], stop_prefixes: Sequence[str] = ()) -> str:
+    """
+    Join streamed chunks with a JsonCollector. Stopping early closes the stream.
+    """
+    collector = JsonCollector(stop_prefixes)
+    try:
+        for chunk in chunks:
+            if collector.feed(chunk):
+                break
+        return collector.text
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+async def acollect_json_object(chunks: AsyncIterable[str], stop_prefixes: Sequence[str] = ()) -> str:
+    collector = JsonCollector(stop_prefixes)
+    try:
+        async for chunk in chunks:
+            if collector.feed(chunk):
+                break
+        return collector.text
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose:
+            await aclose()
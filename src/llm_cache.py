@@ -0,0 +1,144 @@
+# llm_cache.py
+
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional, Sequence
+from llm_interface import LLMInterface
+from metrics import LLM_CACHE
+
+class LLMResponseCache:
+    """
+    On-disk cache of LLM responses keyed by a hash of the model and the full request. Entries
+    older than ttl_seconds are treated as misses, and once there are more than max_entries the
+    least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: Optional[float] = 24 * 3600, max_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    created_at REAL,
+                    last_used REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def make_key(model: str, *parts: Optional[str]) -> str:
+        digest = hashlib.sha256(model.encode())
+        for part in parts:
+            # Length-prefixed so ('ab', 'c') and ('a', 'bc') hash differently
+            part = part or ''
+            digest.update(f'{len(part)}:'.encode())
+            digest.update(part.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT response, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                with self.conn:
+                    self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                LLM_CACHE.inc(result='miss')
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            LLM_CACHE.inc(result='hit')
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)', (key, model, response, now, now))
+            excess = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.conn.execute("""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_used LIMIT ?
+                    )
+                """, (excess,))
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class CachedLLM(LLMInterface):
+    """
+    Wraps any LLMInterface so byte-identical requests are answered from an LLMResponseCache.
+    Empty responses are what the LLMs return on errors, and refusals (containing one of
+    `rejection_phrases`, or a JSON call's stop prefixes) may not happen on a retry, so neither
+    is cached.
+    """
+
+    def __init__(self, llm: LLMInterface, cache: LLMResponseCache, rejection_phrases: Sequence[str] = ()):
+        self.llm = llm
+        self.cache = cache
+        self.model = getattr(llm, 'model', type(llm).__name__)
+        self.rejection_phrases = tuple(rejection_phrases)
+
+    def _cacheable(self, response: str, stop_prefixes: Sequence[str]) -> bool:
+        lowered = response.lower()
+        return bool(response) and not any(phrase.lower() in lowered for phrase in (*self.rejection_phrases, *stop_prefixes))
+
+    def _cached(self, key: str, generate, stop_prefixes: Sequence[str] = ()) -> str:
+        response = self.cache.get(key)
+        if response is None:
+            response = generate()
+            if self._cacheable(response, stop_prefixes):
+                self.cache.put(key, self.model, response)
+        return response
+
+    async def _acached(self, key: str, agenerate, stop_prefixes: Sequence[str] = ()) -> str:
+        response = self.cache.get(key)
+        if response is None:
+            response = await agenerate()
+            if self._cacheable(response, stop_prefixes):
+                self.cache.put(key, self.model, response)
+        return response
+
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        key = self.cache.make_key(self.model, 'response', system, prompt)
+        return self._cached(key, lambda: self.llm.generate_response(prompt, system=system))
+
+    def generate_response_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        yield self.generate_response(prompt, system=system)
+
+    def generate_json_response(self, prompt: str, system: Optional[str] = None, stop_prefixes: Sequence[str] = ()) -> str:
+        # Keyed separately from generate_response because the stream may have been cut short
+        key = self.cache.make_key(self.model, 'json', system, prompt, '\n'.join(stop_prefixes))
+        return self._cached(key, lambda: self.llm.generate_json_response(prompt, system=system, stop_prefixes=stop_prefixes), stop_prefixes)
+
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        key = self.cache.make_key(self.model, 'response', system, prompt)
+        return await self._acached(key, lambda: self.llm.agenerate_response(prompt, system=system))
+
+    async def agenerate_response_stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        yield await self.agenerate_response(prompt, system=system)
+
+    async def agenerate_json_response(self, prompt: str, system: Optional[str] = None, stop_prefixes: Sequence[str] = ()) -> str:
+        key = self.cache.make_key(self.model, 'json', system, prompt, '\n'.join(stop_prefixes))
+        return await self._acached(key, lambda: self.llm.agenerate_json_response(prompt, system=system, stop_prefixes=stop_prefixes),
+                                   stop_prefixes)
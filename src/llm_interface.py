@@ -1,17 +1,74 @@
 # llm_interface.py
 
+import time
+import asyncio
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+from json_stream import collect_json_object, acollect_json_object
+from metrics import record_llm_call
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
 
 class LLMInterface(ABC):
+    # Label for this LLM's metrics
+    provider = 'llm'
+
     @abstractmethod
-    def generate_response(self, prompt: str) -> str:
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
         """
         Generate a response based on the given prompt.
 
         Args:
             prompt (str): The input prompt for the language model.
+            system (str, optional): Static instructions sent ahead of the prompt. Implementations
+                may cache them, so they should not change between calls.
 
         Returns:
             str: The generated response from the language model.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def generate_response_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield the response in chunks as it is generated. LLMs without streaming support
+        yield the whole response at once.
+        """
+        yield self.generate_response(prompt, system=system)
+
+    def generate_json_response(self, prompt: str, system: Optional[str] = None, stop_prefixes: Sequence[str] = ()) -> str:
+        """
+        Stream a response that is expected to be a single JSON object and stop generating as
+        soon as the object closes, or as soon as the response starts with one of stop_prefixes.
+        """
+        try:
+            return collect_json_object(self.generate_response_stream(prompt, system=system), stop_prefixes).strip()
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return ""
+
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        """
+        Async counterpart of generate_response. LLMs without an async client run the blocking
+        call on a worker thread.
+        """
+        return await asyncio.to_thread(self.generate_response, prompt, system)
+
+    async def agenerate_response_stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        yield await self.agenerate_response(prompt, system=system)
+
+    async def agenerate_json_response(self, prompt: str, system: Optional[str] = None, stop_prefixes: Sequence[str] = ()) -> str:
+        try:
+            return (await acollect_json_object(self.agenerate_response_stream(prompt, system=system), stop_prefixes)).strip()
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return ""
+
+    def _record_call(self, start: float, ok: bool, input_tokens: int = 0, output_tokens: int = 0, cache_read_tokens: int = 0) -> None:
+        record_llm_call(self.provider, getattr(self, 'model', None) or 'default', time.perf_counter() - start, ok, input_tokens, output_tokens,
+                        cache_read_tokens)
+
+    def _record_stream(self, start: float, ok: bool, prompt: str, system: Optional[str], received: List[str]) -> None:
+        # Streams carry no usage block, so their tokens are estimated
+        self._record_call(start, ok, estimate_tokens(prompt) + estimate_tokens(system or ''), estimate_tokens(''.join(received)))
@@ -0,0 +1,98 @@
+# llm_registry.py
+
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Tuple
+from config import CONFIG
+from llm_interface import LLMInterface
+from slack_rate_limiter import TokenBucket
+
+class LLMRateLimiter:
+    """
+    Requests- and tokens-per-minute budget for one provider, shared by every agent in every
+    workspace. Buckets hold ten seconds' worth of budget so a restart cannot burst a whole minute.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute, burst=max(1.0, requests_per_minute / 6)) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst=tokens_per_minute / 6) if tokens_per_minute else None
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        wait = 0.0
+        with self.lock:
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve())
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class LLMRegistry:
+    """
+    Hands out one LLM per (provider, model), all of a provider's LLMs sharing a single API
+    client (and so its connection pool) and a single LLMRateLimiter. A provider's SDK is only
+    imported once something asks for one of its LLMs.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.limits = limits or {}
+        self.lock = threading.Lock()
+        self.clients: Dict[Tuple[str, bool], Any] = {}
+        self.rate_limiters: Dict[str, LLMRateLimiter] = {}
+        self.llms: Dict[Tuple[str, Optional[str]], LLMInterface] = {}
+
+    def rate_limiter(self, llm_type: str) -> LLMRateLimiter:
+        with self.lock:
+            if llm_type not in self.rate_limiters:
+                limits = self.limits.get(llm_type) or {}
+                self.rate_limiters[llm_type] = LLMRateLimiter(limits.get('requests_per_minute'), limits.get('tokens_per_minute'))
+            return self.rate_limiters[llm_type]
+
+    def _client(self, llm_type: str, asynchronous: bool = False):
+        key = (llm_type, asynchronous)
+        if key not in self.clients:
+            import anthropic
+            client_class = anthropic.AsyncAnthropic if asynchronous else anthropic.Anthropic
+            self.clients[key] = client_class(api_key=CONFIG['anthropic']['api_key'])
+        return self.clients[key]
+
+    def get(self, llm_type: str, model: Optional[str] = None) -> LLMInterface:
+        key = (llm_type, model)
+        rate_limiter = self.rate_limiter(llm_type)
+        with self.lock:
+            if key not in self.llms:
+                if llm_type == "claude":
+                    from claude_llm import ClaudeLLM
+                    self.llms[key] = ClaudeLLM(client=self._client(llm_type), model=model, rate_limiter=rate_limiter,
+                                               async_client=self._client(llm_type, asynchronous=True))
+                elif llm_type == "openai":
+                    # The openai module keeps one requests session per thread, so there is no client to share
+                    from openai_llm import OpenAILLM
+                    self.llms[key] = OpenAILLM(model=model, rate_limiter=rate_limiter)
+                else:
+                    raise ValueError(f"Invalid LLM type: {llm_type}")
+            return self.llms[key]
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> LLMRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMRegistry(CONFIG.get('llm_limits'))
+        return _registry
+
+def get_llm(llm_type: str, model: Optional[str] = None) -> LLMInterface:
+    return get_registry().get(llm_type, model)
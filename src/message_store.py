@@ -0,0 +1,192 @@
+# message_store.py
+
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+class MessageStore:
+    """
+    Append-only SQLite store for a workspace's message history, keyed by (channel_id, ts, user)
+    and indexed by thread. Timestamps are stored as integer nanoseconds so they round-trip
+    exactly to the pd.Timestamp values used by SlackInteractor.
+    """
+
+    COLUMNS = ['type', 'subtype', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username',
+               'text_clean', 'text_len', 'user_name', 'is_bot', 'channel_name']
+    TIME_COLUMNS = ['ts', 'thread_ts']
+    VALUE_COLUMNS = [c for c in COLUMNS if c not in ('ts', 'thread_ts', 'channel_id')]
+    SELECT_COLUMNS = ['channel_id', 'ts', 'thread_ts'] + VALUE_COLUMNS
+    MAX_VARIABLES = 500
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    channel_id TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    user TEXT,
+                    thread_ts INTEGER,
+                    thread_key INTEGER NOT NULL,
+                    type TEXT,
+                    subtype TEXT,
+                    text TEXT,
+                    username TEXT,
+                    text_clean TEXT,
+                    text_len INTEGER,
+                    user_name TEXT,
+                    is_bot INTEGER,
+                    channel_name TEXT
+                )
+            """)
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS messages_key ON messages (channel_id, ts, IFNULL(user, ''))")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS messages_thread ON messages (thread_key)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS threads (
+                    channel_id TEXT NOT NULL,
+                    thread_ts TEXT NOT NULL,
+                    reply_count INTEGER,
+                    latest_reply TEXT,
+                    fetched_at REAL,
+                    PRIMARY KEY (channel_id, thread_ts)
+                )
+            """)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM messages LIMIT 1').fetchone() is None
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    @staticmethod
+    def _to_nanos(values: pd.Series) -> List[Any]:
+        values = pd.to_datetime(values)
+        return [None if pd.isna(value) else int(value.value) for value in values]
+
+    def _to_rows(self, messages: pd.DataFrame) -> List[Tuple]:
+        messages = messages.reindex(columns=self.COLUMNS)
+        ts = self._to_nanos(messages['ts'])
+        thread_ts = self._to_nanos(messages['thread_ts'])
+        others = messages[self.VALUE_COLUMNS].astype(object).where(messages[self.VALUE_COLUMNS].notna(), None)
+        others['is_bot'] = [None if value is None else int(bool(value)) for value in others['is_bot']]
+        others['text_len'] = [None if value is None else int(value) for value in others['text_len']]
+        rows = []
+        for channel_id, message_ts, message_thread_ts, values in zip(messages['channel_id'], ts, thread_ts, others.itertuples(index=False, name=None)):
+            thread_key = message_thread_ts if message_thread_ts is not None else message_ts
+            rows.append((channel_id, message_ts, message_thread_ts, thread_key) + tuple(values))
+        return rows
+
+    def _insert_sql(self) -> str:
+        columns = ['channel_id', 'ts', 'thread_ts', 'thread_key'] + self.VALUE_COLUMNS
+        placeholders = ', '.join('?' for _ in columns)
+        return f"INSERT OR IGNORE INTO messages ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def append(self, messages: pd.DataFrame) -> pd.DataFrame:
+        """
+        Insert the rows that are not stored yet and return them, in the order given.
+        """
+        if messages is None or messages.empty:
+            return messages.iloc[0:0] if messages is not None else pd.DataFrame(columns=self.COLUMNS)
+        sql = self._insert_sql()
+        inserted = []
+        with self.lock, self.conn:
+            for row in self._to_rows(messages):
+                inserted.append(self.conn.execute(sql, row).rowcount == 1)
+        return messages[np.array(inserted, dtype=bool)]
+
+    def _frame(self, rows: List[Tuple]) -> pd.DataFrame:
+        # Built as object so nanosecond ints are not squeezed through float64 when a column has NULLs
+        frame = pd.DataFrame(rows, columns=self.SELECT_COLUMNS, dtype=object)
+        for column in self.TIME_COLUMNS:
+            frame[column] = pd.to_datetime(frame[column].astype('Int64'), unit='ns')
+        frame = frame.infer_objects()
+        frame['is_bot'] = frame['is_bot'].map(lambda value: value if value is None or pd.isna(value) else bool(value))
+        for column in frame.columns[frame.dtypes == object]:
+            frame[column] = frame[column].where(frame[column].notna(), np.nan)
+        return frame[self.COLUMNS]
+
+    def _select(self, where: str = '', params: Iterable[Any] = ()) -> pd.DataFrame:
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(self.SELECT_COLUMNS)} FROM messages {where}", tuple(params)).fetchall()
+        return self._frame(rows)
+
+    def load_all(self) -> pd.DataFrame:
+        return self._select('ORDER BY ts DESC')
+
+    def load_threads(self, thread_keys: Iterable[pd.Timestamp]) -> pd.DataFrame:
+        keys = sorted({int(pd.Timestamp(key).value) for key in thread_keys if not pd.isna(key)})
+        frames = []
+        for i in range(0, len(keys), self.MAX_VARIABLES):
+            chunk = keys[i:i + self.MAX_VARIABLES]
+            frames.append(self._select(f"WHERE thread_key IN ({', '.join('?' for _ in chunk)})", chunk))
+        if not frames:
+            return self._frame([])
+        return pd.concat(frames, ignore_index=True)
+
+    def channel_for_thread(self, thread_key: pd.Timestamp) -> Optional[Tuple[str, str]]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT channel_id, channel_name FROM messages WHERE thread_key = ? LIMIT 1',
+                (int(pd.Timestamp(thread_key).value),)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def thread_parents(self) -> List[Tuple[str, pd.Timestamp]]:
+        with self.lock:
+            rows = self.conn.execute('SELECT channel_id, ts FROM messages WHERE thread_ts = ts').fetchall()
+        return [(channel_id, pd.Timestamp(ts, unit='ns')) for channel_id, ts in rows]
+
+    def channel_high_water_marks(self) -> Dict[str, pd.Timestamp]:
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT channel_id, MAX(ts) FROM messages WHERE thread_ts IS NULL OR thread_ts = ts GROUP BY channel_id'
+            ).fetchall()
+        return {channel_id: pd.Timestamp(ts, unit='ns') for channel_id, ts in rows}
+
+    def thread_states(self) -> Dict[Tuple[str, str], Tuple[int, Optional[str]]]:
+        with self.lock:
+            rows = self.conn.execute('SELECT channel_id, thread_ts, reply_count, latest_reply FROM threads').fetchall()
+        return {(channel_id, thread_ts): (reply_count, latest_reply) for channel_id, thread_ts, reply_count, latest_reply in rows}
+
+    def update_thread_states(self, states: Iterable[Tuple[str, str, int, Optional[str]]]):
+        fetched_at = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO threads (channel_id, thread_ts, reply_count, latest_reply, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                [(channel_id, thread_ts, reply_count, latest_reply, fetched_at) for channel_id, thread_ts, reply_count, latest_reply in states]
+            )
+
+    def migrate_from_pickle(self, pickle_path: str) -> int:
+        """
+        One-shot import of a complete_conversations_<workspace>.pkl cache. The pickle is renamed
+        to <path>.migrated afterwards so later runs do not import it again.
+        """
+        if not os.path.exists(pickle_path):
+            return 0
+        old_messages = pd.read_pickle(pickle_path)
+        before = self.count()
+        if not old_messages.empty:
+            rows = self._to_rows(old_messages)
+            with self.lock, self.conn:
+                self.conn.executemany(self._insert_sql(), rows)
+        migrated = self.count() - before
+        os.replace(pickle_path, f'{pickle_path}.migrated')
+        print(f"Migrated {migrated} messages from {pickle_path} to {self.db_path}")
+        return migrated
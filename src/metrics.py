@@ -0,0 +1,246 @@
+# metrics.py
+
+import os
+import time
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+LATENESS_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0.0)
+
+    @contextlib.contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        # Adds the seconds spent in the block, for splitting a total between phases
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.inc(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self.lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(self.values.items())]
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self.lock:
+            return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(self.values.items())]
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # Per label set: per-bucket (non-cumulative) counts, sum and count
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self.lock:
+            counts, total = self.values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels) -> int:
+        with self.lock:
+            counts, _ = self.values.get(self._key(labels), ([0], [0.0]))
+            return sum(counts)
+
+    def sum(self, **labels) -> float:
+        with self.lock:
+            _, total = self.values.get(self._key(labels), ([0], [0.0]))
+            return total[0]
+
+    @contextlib.contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        with self.lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, ('le', _format_value(bound))), cumulative))
+                samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), total[0]))
+                samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+class MetricsRegistry:
+    """
+    Process-wide set of counters, gauges and histograms, rendered in the Prometheus text
+    exposition format. Export by rewriting a file (for node_exporter's textfile collector)
+    or by serving /metrics over HTTP.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, metric_class, name: str, help: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered as a different {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+    def write(self, path: str) -> None:
+        # Written to a temporary file and renamed, so a scraper never reads half a file
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = '') -> ThreadingHTTPServer:
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"Serving metrics on port {server.server_address[1]}")
+        return server
+
+METRICS = MetricsRegistry()
+
+LOOP_DURATION = METRICS.histogram('agentflow_loop_duration_seconds', 'Duration of one polling loop of a workspace', ['workspace'])
+LAST_LOOP = METRICS.gauge('agentflow_last_loop_timestamp_seconds', 'Unix time the last polling loop of a workspace finished', ['workspace'])
+PHASE_SECONDS = METRICS.counter('agentflow_phase_seconds_total',
+                                'Seconds spent per loop phase (fetch, organize, decide, post, due_actions)', ['workspace', 'phase'])
+THREADS_PROCESSED = METRICS.counter('agentflow_threads_processed_total', 'Threads with new messages evaluated by the agents', ['workspace'])
+DECISIONS = METRICS.counter('agentflow_decisions_total', 'Agent decisions by outcome (reply, schedule, both, none)', ['agent', 'outcome'])
+DECISION_DURATION = METRICS.histogram('agentflow_decision_duration_seconds', 'Time for an agent to decide on one thread', ['agent'])
+PREFILTER_DECISIONS = METRICS.counter('agentflow_prefilter_decisions_total', 'Prefilter outcomes (hit, miss, skip)', ['agent', 'result'])
+
+SLACK_CALLS = METRICS.counter('agentflow_slack_api_calls_total', 'Slack Web API calls by outcome (ok, ratelimited, error)',
+                              ['workspace', 'method', 'outcome'])
+SLACK_CALL_DURATION = METRICS.histogram('agentflow_slack_api_call_duration_seconds', 'Slack Web API call latency', ['workspace', 'method'])
+
+LLM_REQUESTS = METRICS.counter('agentflow_llm_requests_total', 'LLM requests by outcome (ok, error)', ['provider', 'model', 'outcome'])
+LLM_DURATION = METRICS.histogram('agentflow_llm_request_duration_seconds', 'LLM request latency, to the last streamed token', ['provider', 'model'])
+LLM_TOKENS = METRICS.counter('agentflow_llm_tokens_total', 'LLM tokens used (input, cache_read, output); estimated for streamed calls',
+                             ['provider', 'model', 'direction'])
+LLM_CACHE = METRICS.counter('agentflow_llm_cache_requests_total', 'LLM response cache lookups (hit, miss)', ['result'])
+
+ACTIONS_DUE = METRICS.counter('agentflow_actions_due_total', 'Scheduled actions found due', ['workspace'])
+ACTIONS_EXECUTED = METRICS.counter('agentflow_actions_executed_total', 'Due actions run, by outcome (posted, no_response)', ['workspace', 'outcome'])
+ACTION_LATENESS = METRICS.histogram('agentflow_action_lateness_seconds', 'Seconds between an action falling due and running',
+                                    ['workspace'], buckets=LATENESS_BUCKETS)
+SCHEDULED_ACTIONS = METRICS.gauge('agentflow_scheduled_actions', 'Actions currently scheduled', ['workspace'])
+STARTUP_SECONDS = METRICS.gauge('agentflow_startup_seconds', 'Seconds from process start to the end of the first loop')
+
+def record_llm_call(provider: str, model: str, seconds: float, ok: bool, input_tokens: int = 0, output_tokens: int = 0,
+                    cache_read_tokens: int = 0) -> None:
+    LLM_REQUESTS.inc(provider=provider, model=model, outcome='ok' if ok else 'error')
+    LLM_DURATION.observe(seconds, provider=provider, model=model)
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, provider=provider, model=model, direction='input')
+    if cache_read_tokens:
+        LLM_TOKENS.inc(cache_read_tokens, provider=provider, model=model, direction='cache_read')
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, provider=provider, model=model, direction='output')
@@ -1,23 +1,127 @@
 from config import CONFIG
+import time
 import openai
-from llm_interface import LLMInterface
+from typing import AsyncIterator, Iterator, Optional
+from llm_interface import LLMInterface, estimate_tokens
 
 class OpenAILLM(LLMInterface):
-    def __init__(self):
-        openai.api_key = CONFIG['openai']['api_key']
-        self.model = "gpt-4o"
+    provider = 'openai'
 
-    def generate_response(self, prompt: str) -> str:
+    def __init__(self, model: Optional[str] = None, rate_limiter=None):
+        # Passed per request rather than set on the openai module, so nothing global is mutated
+        self.api_key = CONFIG['openai']['api_key']
+        self.model = model or "gpt-4o"
+        self.max_tokens = 1024
+        self.rate_limiter = rate_limiter
+
+    def _throttle(self, prompt: str, system: Optional[str]) -> None:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimate_tokens(prompt) + estimate_tokens(system or '') + self.max_tokens)
+
+    async def _athrottle(self, prompt: str, system: Optional[str]) -> None:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimate_tokens(prompt) + estimate_tokens(system or '') + self.max_tokens)
+
+    def _record_response(self, start: float, response) -> None:
+        usage = getattr(response, 'usage', None)
+        self._record_call(start, True, getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0)
+
+    def _messages(self, prompt: str, system: Optional[str]) -> list:
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            # Static instructions go first so OpenAI's automatic prefix caching can reuse them
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = None
+        try:
+            self._throttle(prompt, system)
+            start = time.perf_counter()
+            response = openai.ChatCompletion.create(
+                model=self.model,
+                messages=self._messages(prompt, system),
+                max_tokens=self.max_tokens,
+                api_key=self.api_key
+            )
+            self._record_response(start, response)
+            print(f"OpenAI {self.model} prompt:\n{prompt}\nresponse:\n{response}")
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            if start is not None:
+                self._record_call(start, False)
+            print(f"Error generating response: {e}")
+            return ""
+
+    def generate_response_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        self._throttle(prompt, system)
+        start = time.perf_counter()
+        received = []
+        ok = False
         try:
             response = openai.ChatCompletion.create(
                 model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1024
+                messages=self._messages(prompt, system),
+                max_tokens=self.max_tokens,
+                api_key=self.api_key,
+                stream=True
             )
+            for chunk in response:
+                text = chunk.choices[0].delta.get("content") if chunk.choices else None
+                if text:
+                    received.append(text)
+                    yield text
+            ok = True
+        except GeneratorExit:
+            # The consumer stopped reading early, e.g. once the JSON object closed
+            ok = True
+            raise
+        finally:
+            self._record_stream(start, ok, prompt, system, received)
+        print(f"OpenAI {self.model} prompt:\n{prompt}\nstreamed response:\n{''.join(received)}")
+
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        start = None
+        try:
+            await self._athrottle(prompt, system)
+            start = time.perf_counter()
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=self._messages(prompt, system),
+                max_tokens=self.max_tokens,
+                api_key=self.api_key
+            )
+            self._record_response(start, response)
             print(f"OpenAI {self.model} prompt:\n{prompt}\nresponse:\n{response}")
             return response.choices[0].message.content.strip()
         except Exception as e:
+            if start is not None:
+                self._record_call(start, False)
             print(f"Error generating response: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    async def agenerate_response_stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        await self._athrottle(prompt, system)
+        start = time.perf_counter()
+        received = []
+        ok = False
+        try:
+            response = await openai.ChatCompletion.acreate(
+                model=self.model,
+                messages=self._messages(prompt, system),
+                max_tokens=self.max_tokens,
+                api_key=self.api_key,
+                stream=True
+            )
+            async for chunk in response:
+                text = chunk.choices[0].delta.get("content") if chunk.choices else None
+                if text:
+                    received.append(text)
+                    yield text
+            ok = True
+        except GeneratorExit:
+            ok = True
+            raise
+        finally:
+            self._record_stream(start, ok, prompt, system, received)
+        print(f"OpenAI {self.model} prompt:\n{prompt}\nstreamed response:\n{''.join(received)}")
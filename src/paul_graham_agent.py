@@ -2,6 +2,8 @@ from agent_interface import BaseAgent
 import pandas as pd
 
 class PaulGrahamAgent(BaseAgent):
+    topics = ['startup', 'tech', 'innovation', 'programming', 'business', 'venture capital']
+
     def __init__(self, llm_type: str, action_db, slack_interactor, workspace_name: str):
         super().__init__(
             llm_type, 
@@ -20,5 +22,4 @@ class PaulGrahamAgent(BaseAgent):
         
         # Paul Graham is more likely to respond to messages about startups, technology, or innovation
         last_message = self.current_thread['messages'][-1]['text'].lower()
-        relevant_topics = ['startup', 'tech', 'innovation', 'programming', 'business', 'venture capital']
-        return any(topic in last_message for topic in relevant_topics)
\ No newline at end of file
+        return any(topic in last_message for topic in self.topics)
\ No newline at end of file
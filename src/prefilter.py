@@ -0,0 +1,121 @@
+# prefilter.py
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+from llm_interface import LLMInterface
+from metrics import PREFILTER_DECISIONS
+
+# Signals that a thread is asking for something an agent could act on
+ACTION_PATTERNS = [re.compile(pattern) for pattern in [
+    r'\?',
+    r'\b(can|could|would|will) (someone|anyone|you|we)\b',
+    r'\bremind(er)?\b',
+    r'\bfollow(ing)?[ -]up\b',
+    r'\b(deadline|due|eod|asap)\b',
+    r'\b(todo|to-do|action item)s?\b',
+    r'\bblock(ed|er|ing)?\b',
+    r'\b(help|update|status)\b',
+    r'\b(tomorrow|tonight|next week|monday|tuesday|wednesday|thursday|friday)\b',
+]]
+
+class PrefilterStats:
+    """
+    Per-agent counters for tuning the threshold. A hit is a thread that passed the prefilter
+    and the full model acted on; a miss passed but the full model did nothing (a wasted call);
+    a skip never reached the full model.
+    """
+
+    def __init__(self, agent_name: str = ''):
+        self.agent_name = agent_name
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0
+
+    def record(self, passed: bool, acted: bool = False) -> None:
+        with self.lock:
+            if not passed:
+                self.skips += 1
+                result = 'skip'
+            elif acted:
+                self.hits += 1
+                result = 'hit'
+            else:
+                self.misses += 1
+                result = 'miss'
+        PREFILTER_DECISIONS.inc(agent=self.agent_name, result=result)
+
+    def as_dict(self) -> Dict[str, int]:
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'skips': self.skips}
+
+class Prefilter(ABC):
+    @abstractmethod
+    def score(self, agent, thread: Dict[str, Any]) -> float:
+        """
+        Estimate, between 0 and 1, how likely the agent is to act on the thread.
+        """
+        pass
+
+    async def ascore(self, agent, thread: Dict[str, Any]) -> float:
+        return self.score(agent, thread)
+
+class KeywordPrefilter(Prefilter):
+    """
+    Local heuristic: a mention of the agent always passes, otherwise the score grows with the
+    number of action signals and agent topics in the last message.
+    """
+
+    def __init__(self, extra_patterns: Optional[List[str]] = None):
+        self.patterns = ACTION_PATTERNS + [re.compile(pattern) for pattern in extra_patterns or []]
+
+    def score(self, agent, thread: Dict[str, Any]) -> float:
+        last_message = thread['messages'][-1]
+        text = last_message['text'].lower()
+        if agent.name.lower() in text:
+            return 1.0
+        signals = sum(1 for pattern in self.patterns if pattern.search(text))
+        signals += sum(1 for topic in agent.topics if topic in text)
+        score = min(1.0, 0.25 * signals)
+        if last_message.get('is_bot', False):
+            # Replying to bots is how agents end up talking to each other
+            score /= 2
+        return score
+
+class LLMPrefilter(Prefilter):
+    """
+    Asks a small, cheap model for the score. Any failure to get a number passes the thread
+    through, so an outage of the small model never silences the agents.
+    """
+
+    def __init__(self, llm: LLMInterface, max_messages: int = 5):
+        self.llm = llm
+        self.max_messages = max_messages
+
+    def _prompt(self, agent, thread: Dict[str, Any]) -> str:
+        messages = "\n".join(f"{message.get('user')}: {message['text']}" for message in thread['messages'][-self.max_messages:])
+        return f"""
+        A Slack bot named {agent.name} has this goal: {agent.goal}
+
+        Recent messages:
+        {messages}
+
+        On a scale from 0 to 1, how likely is it that {agent.name} should reply or schedule a follow-up now? Answer with only the number.
+        """
+
+    @staticmethod
+    def _parse(response: str) -> float:
+        # A reply such as "On a scale of 0 to 1: 0.8" names several numbers; rather than guess
+        # which one is the score, the thread is passed through
+        numbers = re.findall(r'\d*\.?\d+', response)
+        if len(numbers) != 1:
+            return 1.0
+        return min(1.0, max(0.0, float(numbers[0])))
+
+    def score(self, agent, thread: Dict[str, Any]) -> float:
+        return self._parse(self.llm.generate_response(self._prompt(agent, thread)))
+
+    async def ascore(self, agent, thread: Dict[str, Any]) -> float:
+        return self._parse(await self.llm.agenerate_response(self._prompt(agent, thread)))
@@ -0,0 +1,137 @@
+# profiler.py
+
+import os
+import sys
+import time
+import cProfile
+import threading
+import contextlib
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+# Phase stack of every thread currently inside a phase marker, keyed by thread id
+_phases: Dict[int, List[str]] = {}
+_active: Optional['LoopProfiler'] = None
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Marks a stage of the loop (fetch, organize, decide, ...) for the profiler. Cheap when not profiling."""
+    ident = threading.get_ident()
+    stack = _phases.setdefault(ident, [])
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stack.pop()
+        if not stack:
+            del _phases[ident]
+            profiler = _active
+            if profiler is not None:
+                profiler.add_phase_time(name, time.perf_counter() - start)
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+class StackSampler:
+    """
+    Samples the stacks of the loop thread, and of any other thread inside a phase marker, every
+    `interval` seconds from a background thread. Stacks are prefixed with their phase and counted
+    in collapsed form, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, loop_thread_id: int, interval: float = 0.005):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        for thread_id, frame in sys._current_frames().items():
+            phases = tuple(_phases.get(thread_id, ()))
+            if thread_id != self.loop_thread_id and not phases:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame))
+                frame = frame.f_back
+            prefix = [f"phase:{name}" for name in phases] if phases else ["phase:other"]
+            self.stacks[';'.join(prefix + frames[::-1])] += 1
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class LoopProfiler:
+    """
+    Profiles one loop in every `every`. Each profiled loop writes loop-NNNNN.folded collapsed stacks
+    from the sampler to `output_dir`; mode 'cprofile' also writes loop-NNNNN.pstats, which covers
+    the loop thread only and adds cProfile's overhead to that loop.
+    """
+
+    def __init__(self, output_dir: str, mode: str = 'cprofile', every: int = 1, loops: int = 0, interval: float = 0.005):
+        if mode not in ('cprofile', 'sample'):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.every = max(1, every)
+        self.loops = loops
+        self.interval = interval
+        self.loop_index = 0
+        self.phase_seconds: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def finished(self) -> bool:
+        return self.loops > 0 and self.loop_index >= self.loops
+
+    def add_phase_time(self, name: str, seconds: float):
+        with self.lock:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def loop(self) -> Iterator[None]:
+        global _active
+        loop_index = self.loop_index
+        self.loop_index += 1
+        if loop_index % self.every:
+            yield
+            return
+
+        path = os.path.join(self.output_dir, f"loop-{loop_index:05d}")
+        self.phase_seconds = {}
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        tracer = None
+        if self.mode == 'cprofile':
+            tracer = cProfile.Profile()
+            tracer.enable()
+        _active = self
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _active = None
+            if tracer is not None:
+                tracer.disable()
+                tracer.dump_stats(f"{path}.pstats")
+            sampler.stop()
+            sampler.write(f"{path}.folded")
+            phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in sorted(self.phase_seconds.items()))
+            print(f"Profiled loop {loop_index} in {elapsed:.2f}s ({phases or 'no phases'}): {path}.*")
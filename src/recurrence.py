@@ -0,0 +1,68 @@
+# recurrence.py
+
+import re
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+INTERVAL_UNITS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+    'week': 604800,
+}
+
+def parse_time_of_day(time_str: str) -> Optional[Tuple[int, int]]:
+    match = re.search(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b', time_str)
+    if not match or (match.group(2) is None and match.group(3) is None):
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if match.group(3) == 'pm' and hour < 12:
+        hour += 12
+    elif match.group(3) == 'am' and hour == 12:
+        hour = 0
+    return hour, minute
+
+def parse_recurrence(time_str: str) -> Optional[Dict[str, Any]]:
+    """
+    Turn a recurring execution time such as 'daily at 9am', 'weekdays at 5:30pm',
+    'every monday at 10am' or 'every 2 hours' into a rule dict, or None if it is one-off.
+    """
+    time_str = time_str.lower().replace(',', ' ')
+    interval = re.search(r'\bevery\s+(\d+)?\s*(minute|hour|day|week)s?\b', time_str)
+    time_of_day = parse_time_of_day(time_str) or (9, 0)
+    hour, minute = time_of_day
+
+    weekday = next((i for i, name in enumerate(WEEKDAYS) if name in time_str), None)
+    if weekday is not None and ('every' in time_str or 'weekly' in time_str):
+        return {'freq': 'weekly', 'weekday': weekday, 'hour': hour, 'minute': minute}
+    if 'weekdays' in time_str or 'every weekday' in time_str:
+        return {'freq': 'weekdays', 'hour': hour, 'minute': minute}
+    if interval and not (interval.group(2) == 'day' and interval.group(1) is None):
+        if interval.group(2) == 'week' and interval.group(1) is None:
+            return {'freq': 'weekly', 'weekday': pd.Timestamp.now().weekday(), 'hour': hour, 'minute': minute}
+        return {'freq': 'interval', 'seconds': int(interval.group(1) or 1) * INTERVAL_UNITS[interval.group(2)]}
+    if 'daily' in time_str or 'every day' in time_str:
+        return {'freq': 'daily', 'hour': hour, 'minute': minute}
+    return None
+
+def next_occurrence(rule: Dict[str, Any], after: pd.Timestamp) -> pd.Timestamp:
+    """
+    First time the rule fires strictly after the given time.
+    """
+    if rule['freq'] == 'interval':
+        return after + pd.Timedelta(seconds=rule['seconds'])
+    candidate = after.replace(hour=rule['hour'], minute=rule['minute'], second=0, microsecond=0, nanosecond=0)
+    if candidate <= after:
+        candidate += pd.Timedelta(days=1)
+    if rule['freq'] == 'daily':
+        return candidate
+    if rule['freq'] == 'weekdays':
+        while candidate.weekday() >= 5:
+            candidate += pd.Timedelta(days=1)
+        return candidate
+    if rule['freq'] == 'weekly':
+        return candidate + pd.Timedelta(days=(rule['weekday'] - candidate.weekday()) % 7)
+    raise ValueError(f"Unknown recurrence rule: {rule}")
@@ -1,21 +1,37 @@
 # runner.py
 
 import time
+# Taken before the heavier imports below, so the startup time reported after the first loop includes them
+STARTED_AT = time.perf_counter()
 import sys
+import queue
+import argparse
+import threading
+import contextlib
 from typing import List, Dict, Any
 import pandas as pd
 from slack_interactor import SlackInteractor
-from claude_llm import ClaudeLLM
+from llm_registry import get_llm
 from db import ActionDatabase
-from config import CONFIG
-from agent_interface import BaseAgent
-from project_manager_agent import ProjectManagerAgent
-from sarcastic_agent import SarcasticAgent
-from paul_graham_agent import PaulGrahamAgent
-from drunk_agent import DrunkAgent
+from config import CONFIG, load_config
+from agent_interface import BaseAgent, REJECTION_PHRASES
+from decision_pool import DecisionPool, AsyncDecisionPool
+from prefilter import KeywordPrefilter, LLMPrefilter
+from llm_cache import LLMResponseCache, CachedLLM
+from thread_context import ThreadContextBuilder
+from slack_events import EventSource, SocketModeEventSource
+from profiler import LoopProfiler, phase
+from metrics import (METRICS, LOOP_DURATION, LAST_LOOP, PHASE_SECONDS, THREADS_PROCESSED, ACTIONS_DUE,
+                     ACTIONS_EXECUTED, ACTION_LATENESS, SCHEDULED_ACTIONS, STARTUP_SECONDS)
+from agent_registry import create_agent
 import random
 
 class Runner:
+    metrics_textfile = None
+    metrics_port = None
+    profiler = None
+    startup_seconds = None
+
     def __init__(self):
         self.reset_from_config()
 
@@ -27,56 +43,144 @@ class Runner:
         }
         self.agents = self._initialize_agents()
         self.sleep_period = CONFIG['runner']['sleep_period']
+        self.reconcile_period = CONFIG['runner'].get('reconcile_period', 1800)
+        decision_concurrency = CONFIG['runner'].get('decision_concurrency', 1)
+        pool_class = AsyncDecisionPool if CONFIG['runner'].get('async_decisions', False) else DecisionPool
+        self.decision_pool = pool_class(decision_concurrency, CONFIG['runner'].get('provider_concurrency')) if decision_concurrency > 1 else None
+        metrics_config = CONFIG.get('metrics') or {}
+        self.metrics_textfile = metrics_config.get('textfile')
+        self.metrics_port = metrics_config.get('port')
 
     def _initialize_agents(self):
         agents = {}
-        agent_classes = {
-            'ProjectManagerAgent': ProjectManagerAgent,
-            'SarcasticAgent': SarcasticAgent,
-            'PaulGrahamAgent': PaulGrahamAgent,
-            'DrunkAgent': DrunkAgent
-        }
+        self.action_dbs = {}
+        agent_types = CONFIG.get('agent_types') or {}
+
+        prefilter_config = CONFIG.get('prefilter') or {}
+        prefilter = self._build_prefilter(prefilter_config)
+        default_threshold = prefilter_config.get('threshold', 0.0)
+        cache_config = CONFIG.get('llm_cache') or {}
+        self.llm_cache = None
+        if cache_config.get('enabled', False):
+            self.llm_cache = LLMResponseCache(cache_config.get('path', 'llm_cache.db'),
+                                              ttl_seconds=cache_config.get('ttl_seconds', 24 * 3600),
+                                              max_entries=cache_config.get('max_entries', 10000))
+
+        context_builder = self._build_context_builder(CONFIG.get('context') or {})
 
         for workspace_config in self.workspaces:
             workspace_name = workspace_config['name']
             slack_interactor = self.slack_interactors[workspace_name]
             action_db = ActionDatabase(workspace_name)
+            self.action_dbs[workspace_name] = action_db
             agents[workspace_name] = []
 
             for agent_config in workspace_config.get('agents', []):
                 agent_name = agent_config['name']
-                llm_type = agent_config['llm_type']
-                if agent_name in agent_classes:
-                    agent_class = agent_classes[agent_name]
-                    agent = agent_class(llm_type, action_db, slack_interactor, workspace_name=workspace_name)
+                agent = create_agent(agent_config, agent_types, action_db, slack_interactor, workspace_name)
+                if agent is not None:
+                    agent.set_prefilter(prefilter, agent_config.get('prefilter_threshold', default_threshold))
+                    agent.context_builder = context_builder
+                    if self.llm_cache is not None:
+                        agent.llm = CachedLLM(agent.llm, self.llm_cache, REJECTION_PHRASES)
                     agents[workspace_name].append(agent)
                 else:
                     print(f"Warning: Unknown agent type '{agent_name}' for workspace '{workspace_name}'")
 
         return agents
 
+    def _build_prefilter(self, prefilter_config: Dict[str, Any]):
+        prefilter_type = prefilter_config.get('type', 'none')
+        if prefilter_type == 'keyword':
+            return KeywordPrefilter(prefilter_config.get('patterns'))
+        if prefilter_type == 'llm':
+            if prefilter_config.get('llm_type', 'claude') == 'openai':
+                return LLMPrefilter(get_llm('openai', prefilter_config.get('model', 'gpt-4o-mini')))
+            return LLMPrefilter(get_llm('claude', prefilter_config.get('model', 'claude-3-haiku-20240307')))
+        if prefilter_type != 'none':
+            print(f"Warning: Unknown prefilter type '{prefilter_type}', running without a prefilter")
+        return None
+
+    def _build_context_builder(self, context_config: Dict[str, Any]):
+        if not context_config.get('enabled', False):
+            return None
+        summarizer = None
+        if context_config.get('summarizer_llm_type') == 'claude':
+            summarizer = get_llm('claude', context_config.get('summarizer_model', 'claude-3-haiku-20240307'))
+        elif context_config.get('summarizer_llm_type') == 'openai':
+            summarizer = get_llm('openai', context_config.get('summarizer_model', 'gpt-4o-mini'))
+        return ThreadContextBuilder(keep_last=context_config.get('keep_last', 30),
+                                    token_budgets=context_config.get('token_budgets'),
+                                    summary_tokens=context_config.get('summary_tokens', 500),
+                                    summarizer=summarizer)
+
+    def prefilter_stats(self, workspace_name: str) -> Dict[str, Dict[str, int]]:
+        return {agent.get_name(): agent.prefilter_stats.as_dict()
+                for agent in self.agents[workspace_name] if agent.prefilter is not None}
+
     def run_one_loop(self):
-        for workspace_name, slack_interactor in self.slack_interactors.items():
-            print(f"\nFetching new messages for workspace: {workspace_name}")
+        with self.profiler.loop() if self.profiler is not None else contextlib.nullcontext():
+            for workspace_name in self.slack_interactors:
+                self.run_workspace_loop(workspace_name)
+
+    def run_workspace_loop(self, workspace_name: str):
+        loop_start = time.perf_counter()
+        slack_interactor = self.slack_interactors[workspace_name]
+        print(f"\nFetching new messages for workspace: {workspace_name}")
+        with PHASE_SECONDS.time(workspace=workspace_name, phase='fetch'), phase('fetch'):
             data = slack_interactor.fetch_new_user_messages()
+        with PHASE_SECONDS.time(workspace=workspace_name, phase='organize'), phase('organize'):
             threads = slack_interactor.organize_threads(data)
-            print(f"Found {len(threads)} threads with new user messages in {workspace_name}.")
+        print(f"Found {len(threads)} threads with new user messages in {workspace_name}.")
 
-            if not slack_interactor.is_first_run:
-                results = self._process_threads(self.agents[workspace_name], threads)
-                print(f"\nChecking for due actions in {workspace_name}...")
+        if not slack_interactor.is_first_run:
+            results = self._process_threads(self.agents[workspace_name], threads)
+            print(f"\nChecking for due actions in {workspace_name}...")
+            with PHASE_SECONDS.time(workspace=workspace_name, phase='due_actions'), phase('due_actions'):
                 self._execute_due_actions(self.agents[workspace_name])
-            else:
-                print(f"First run for {workspace_name}. Skipping thread processing and due actions.")
-                slack_interactor.is_first_run = False
+            for agent_name, stats in self.prefilter_stats(workspace_name).items():
+                print(f"Prefilter {agent_name}: {stats['hits']} hits, {stats['misses']} misses, {stats['skips']} skipped")
+        else:
+            print(f"First run for {workspace_name}. Skipping thread processing and due actions.")
+            slack_interactor.is_first_run = False
+        LOOP_DURATION.observe(time.perf_counter() - loop_start, workspace=workspace_name)
+        LAST_LOOP.set(time.time(), workspace=workspace_name)
+        if self.startup_seconds is None:
+            self.startup_seconds = time.perf_counter() - STARTED_AT
+            STARTUP_SECONDS.set(self.startup_seconds)
+            print(f"First loop finished {self.startup_seconds:.2f}s after start")
+        self.export_metrics()
+
+    def export_metrics(self):
+        if self.metrics_textfile:
+            try:
+                METRICS.write(self.metrics_textfile)
+            except OSError as e:
+                print(f"Error writing metrics to {self.metrics_textfile}: {e}")
 
     def main(self):
         print("Slack Bot Runner started. Press Ctrl+C to stop.")
+        if self.metrics_port is not None:
+            METRICS.serve(self.metrics_port)
 
+        if self.profiler is not None:
+            if CONFIG['runner'].get('event_mode', False) or CONFIG['runner'].get('parallel_workspaces', False):
+                print("Profiling covers the sequential loop only; ignoring event_mode and parallel_workspaces")
+        elif CONFIG['runner'].get('event_mode', False):
+            self.main_events()
+            return
+        elif CONFIG['runner'].get('parallel_workspaces', False):
+            self.main_parallel()
+            return
+
+        stop_event = threading.Event()
         while True:
             try:
                 self.run_one_loop()
-                time.sleep(self.sleep_period)
+                if self.profiler is not None and self.profiler.finished:
+                    print(f"Profiled {self.profiler.loops} loops. Shutting down...")
+                    return
+                self._wait_for_next_loop(list(self.slack_interactors), self.sleep_period, stop_event)
             except KeyboardInterrupt:
                 print("\nInterrupted by user. Shutting down...")
                 sys.exit(0)
@@ -85,10 +189,146 @@ class Runner:
                 print(f"Waiting for {self.sleep_period} seconds before retrying...")
                 time.sleep(self.sleep_period)
 
+    def main_parallel(self):
+        # One worker thread per workspace, so a slow or rate-limited workspace only delays itself
+        stop_event = threading.Event()
+        workers = []
+        for workspace_config in self.workspaces:
+            worker = threading.Thread(
+                target=self._workspace_worker,
+                args=(workspace_config['name'], workspace_config.get('sleep_period', self.sleep_period), stop_event),
+                name=f"workspace-{workspace_config['name']}",
+                daemon=True
+            )
+            worker.start()
+            workers.append(worker)
+
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=1)
+        except KeyboardInterrupt:
+            print("\nInterrupted by user. Shutting down...")
+            stop_event.set()
+            sys.exit(0)
+
+    def main_events(self):
+        # Messages arrive over Socket Mode; polling only reconciles whatever the events missed
+        event_sources = {}
+        for workspace_config in self.workspaces:
+            workspace_name = workspace_config['name']
+            if workspace_config.get('app_token'):
+                bot_client = self.slack_interactors[workspace_name].bot_client
+                event_sources[workspace_name] = SocketModeEventSource(workspace_config['app_token'], bot_client)
+            else:
+                print(f"Warning: No app_token for workspace '{workspace_name}', it will be polled every {self.sleep_period} seconds")
+        try:
+            self.run_event_loop(event_sources, threading.Event())
+        except KeyboardInterrupt:
+            print("\nInterrupted by user. Shutting down...")
+            sys.exit(0)
+
+    def run_event_loop(self, event_sources: Dict[str, EventSource], stop_event: threading.Event, max_wait: float = 1.0):
+        events = queue.Queue()
+        for workspace_name, source in event_sources.items():
+            source.start(lambda event, workspace_name=workspace_name: events.put((workspace_name, event)))
+        workspace_names = list(self.slack_interactors)
+        poll_periods = {name: self.reconcile_period if name in event_sources else self.sleep_period for name in workspace_names}
+        next_poll = {name: time.monotonic() for name in workspace_names}
+        # Polls run every due action; in between, only actions falling due since the last check are run
+        last_due_check = pd.Timestamp.now()
+        try:
+            while not stop_event.is_set():
+                try:
+                    for workspace_name in workspace_names:
+                        if time.monotonic() >= next_poll[workspace_name]:
+                            self.run_workspace_loop(workspace_name)
+                            next_poll[workspace_name] = time.monotonic() + poll_periods[workspace_name]
+                    next_due = self._next_due_time(workspace_names, after=last_due_check)
+                    if next_due is not None and next_due <= pd.Timestamp.now():
+                        last_due_check = pd.Timestamp.now()
+                        self.run_due_actions(workspace_names)
+                        next_due = self._next_due_time(workspace_names, after=last_due_check)
+                    timeout = min(min(next_poll.values()) - time.monotonic(), max_wait)
+                    if next_due is not None:
+                        timeout = min(timeout, (next_due - pd.Timestamp.now()).total_seconds())
+                    try:
+                        workspace_name, event = events.get(timeout=max(0.0, timeout))
+                    except queue.Empty:
+                        continue
+                    self.handle_event(workspace_name, event)
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+        finally:
+            for source in event_sources.values():
+                source.stop()
+
+    def handle_event(self, workspace_name: str, event: Dict[str, Any]):
+        slack_interactor = self.slack_interactors[workspace_name]
+        new_messages = slack_interactor.ingest_event(event)
+        if new_messages.empty or slack_interactor.is_first_run:
+            return []
+        # Only the thread the event belongs to is evaluated
+        threads = slack_interactor.organize_threads(new_messages)
+        print(f"Event in {workspace_name} touched {len(threads)} thread(s)")
+        results = self._process_threads(self.agents[workspace_name], threads)
+        self.export_metrics()
+        return results
+
+    def _workspace_worker(self, workspace_name: str, sleep_period: float, stop_event: threading.Event):
+        while not stop_event.is_set():
+            try:
+                self.run_workspace_loop(workspace_name)
+                self._wait_for_next_loop([workspace_name], sleep_period, stop_event)
+            except Exception as e:
+                print(f"An error occurred in workspace {workspace_name}: {e}")
+                print(f"Waiting for {sleep_period} seconds before retrying {workspace_name}...")
+                stop_event.wait(sleep_period)
+
+    def _next_due_time(self, workspace_names: List[str], after: pd.Timestamp):
+        due_times = [self.action_dbs[name].next_due_time(after) for name in workspace_names if name in self.action_dbs]
+        due_times = [due_time for due_time in due_times if due_time is not None]
+        return min(due_times) if due_times else None
+
+    def _wait_for_next_loop(self, workspace_names: List[str], sleep_period: float, stop_event: threading.Event):
+        # Sleep until the next poll, but wake up to run delayed actions as soon as they fall due
+        next_loop = time.monotonic() + sleep_period
+        last_run = pd.Timestamp.now()
+        while not stop_event.is_set():
+            remaining = next_loop - time.monotonic()
+            if remaining <= 0:
+                return
+            next_due = self._next_due_time(workspace_names, after=last_run)
+            until_due = (next_due - pd.Timestamp.now()).total_seconds() if next_due is not None else None
+            if until_due is None or until_due >= remaining:
+                stop_event.wait(remaining)
+                return
+            if until_due > 0 and stop_event.wait(until_due):
+                return
+            last_run = pd.Timestamp.now()
+            self.run_due_actions(workspace_names)
+
+    def run_due_actions(self, workspace_names: List[str]):
+        for workspace_name in workspace_names:
+            if not self.slack_interactors[workspace_name].is_first_run and self.agents[workspace_name]:
+                print(f"\nRunning due actions in {workspace_name}...")
+                with PHASE_SECONDS.time(workspace=workspace_name, phase='due_actions'):
+                    self._execute_due_actions(self.agents[workspace_name])
+        self.export_metrics()
+
     def _process_threads(self, agents, threads):
         results = []
+        workspace_name = agents[0].workspace_name if agents else ''
+        THREADS_PROCESSED.inc(len(threads), workspace=workspace_name)
+        # Shuffle the agents list for each thread
+        thread_agents = [random.sample(agents, len(agents)) for _ in threads]
+        decisions = None
+        if self.decision_pool is not None:
+            # Every decision for every thread is started up front; posting below stays in shuffled order
+            decisions = [[self.decision_pool.submit(agent, thread) for agent in shuffled_agents]
+                         for thread, shuffled_agents in zip(threads, thread_agents)]
         
-        for thread in threads:
+        for thread_index, thread in enumerate(threads):
             print(f"\n{'='*50}")
             print(f"Processing thread in channel: {thread['channel']}")
             print(f"Thread timestamp: {thread['thread_ts']}")
@@ -101,22 +341,33 @@ class Runner:
                 'new_actions': [],
             }
             
-            # Shuffle the agents list for this thread
-            shuffled_agents = random.sample(agents, len(agents))
+            shuffled_agents = thread_agents[thread_index]
             
-            for agent in shuffled_agents:
+            for agent_index, agent in enumerate(shuffled_agents):
                 agent.read_thread(thread)
-                action_needed, immediate_action, delayed_action = agent.decide_action()
+                if decisions is not None:
+                    # The pool worker profiles the decision itself; here the loop thread only waits for it
+                    with PHASE_SECONDS.time(workspace=workspace_name, phase='decide'), phase('decide_wait'):
+                        action_needed, immediate_action, delayed_action = decisions[thread_index][agent_index].result()
+                else:
+                    with PHASE_SECONDS.time(workspace=workspace_name, phase='decide'), phase('decide'):
+                        action_needed, immediate_action, delayed_action = agent.decide_action()
                 
                 if immediate_action:
-                    result = agent.execute_immediate_action(immediate_action)
+                    with PHASE_SECONDS.time(workspace=workspace_name, phase='post'), phase('post'):
+                        result = agent.execute_immediate_action(immediate_action)
                     thread_result['executed_actions'].append(f"{agent.get_name()}: {result}")
                     print(f"\nExecuted immediate action for {agent.get_name()}: {result}")
                 
                 if delayed_action:
-                    agent.schedule_delayed_action(delayed_action)
-                    thread_result['new_actions'].append(f"{agent.get_name()} Scheduled: {delayed_action['description']} (Execute at: {delayed_action['execution_time']})")
-                    print(f"\nNew action scheduled for {agent.get_name()}: {delayed_action['description']}")
+                    with PHASE_SECONDS.time(workspace=workspace_name, phase='post'), phase('post'):
+                        agent.schedule_delayed_action(delayed_action)
+                    if delayed_action.get('cancel'):
+                        thread_result['new_actions'].append(f"{agent.get_name()} Cancelled: {delayed_action['description']}")
+                        print(f"\nScheduled action cancelled for {agent.get_name()}: {delayed_action['description']}")
+                    else:
+                        thread_result['new_actions'].append(f"{agent.get_name()} Scheduled: {delayed_action['description']} (Execute at: {delayed_action['execution_time']})")
+                        print(f"\nNew action scheduled for {agent.get_name()}: {delayed_action['description']}")
             
             if not thread_result['executed_actions'] and not thread_result['new_actions']:
                 print("\nNo actions needed.")
@@ -131,41 +382,78 @@ class Runner:
         current_time = pd.Timestamp.now()
         action_db = agents[0].action_db  # Assuming all agents share the same action_db
         due_actions = action_db.get_due_actions(current_time)
-        
+        agents_by_name = {agent.get_name(): agent for agent in agents}
+        workspace_name = agents[0].workspace_name
+        ACTIONS_DUE.inc(len(due_actions), workspace=workspace_name)
+
+        # Group by thread so a thread with several due actions is fetched once
+        due_by_thread: Dict[str, List[Dict[str, Any]]] = {}
         for thread_id, action in due_actions:
-            agent_name = action['agent_name']
-            agent = next((a for a in agents if a.get_name() == agent_name), None)
-            
-            if agent:
-                print(f"\nExecuting delayed action for {agent.get_name()} in thread: {thread_id}")
-                print(f"Action: {action['description']}")
-                
-                thread = agent.slack_interactor.fetch_thread(thread_id)
-                if thread:
-                    agent.read_thread(thread)
-                    prompt = agent._generate_prompt(due_task_description=action['description'])
-                    llm_response = agent.llm.generate_response(prompt)
-                    
-                    if not agent._is_rejection_response(llm_response):
-                        actions = agent._extract_actions_from_response(llm_response)
-                        immediate_action = next((a for a in actions if a['type'] == 'immediate'), None)
-                        
-                        if immediate_action:
-                            response = immediate_action['response']
-                            agent.slack_interactor.post_thread_reply(thread, response, username=agent.get_name())
-                            print(f"Posted response in thread: {thread_id}")
-                        else:
-                            print(f"No immediate action generated for due task in thread: {thread_id}")
-                    else:
-                        print(f"LLM rejected generating a response for due task in thread: {thread_id}")
-                    
-                    action_db.remove_action(thread_id, action['description'])
-                    print(f"Removed executed action from database")
-                else:
-                    print(f"Could not fetch thread {thread_id} for action execution")
+            if action['agent_name'] in agents_by_name:
+                due_by_thread.setdefault(thread_id, []).append(action)
             else:
-                print(f"Could not find agent {agent_name} for executing action in thread: {thread_id}")
+                print(f"Could not find agent {action['agent_name']} for executing action in thread: {thread_id}")
+
+        batches = []
+        for thread_id, actions in due_by_thread.items():
+            thread = agents[0].slack_interactor.fetch_thread(thread_id, channel=actions[0]['channel'])
+            if not thread:
+                print(f"Could not fetch thread {thread_id} for action execution")
+                continue
+            if self.decision_pool is not None:
+                # Prompts for every due thread are in flight while the remaining threads are fetched
+                responses = [self.decision_pool.submit_due_task(agents_by_name[action['agent_name']], thread, action['description'])
+                             for action in actions]
+            else:
+                responses = None
+            batches.append((thread_id, thread, actions, responses))
+
+        completed = []
+        try:
+            for thread_id, thread, actions, responses in batches:
+                for action_index, action in enumerate(actions):
+                    agent = agents_by_name[action['agent_name']]
+                    print(f"\nExecuting delayed action for {agent.get_name()} in thread: {thread_id}")
+                    print(f"Action: {action['description']}")
+                    if responses is not None:
+                        response = responses[action_index].result()
+                    else:
+                        response = agent.respond_to_due_task(thread, action['description'])
+                    if response:
+                        agent.slack_interactor.post_thread_reply(thread, response, username=agent.get_name())
+                        print(f"Posted response in thread: {thread_id}")
+                    # Measured once the reply is out, which is when the user sees the action happen
+                    ACTION_LATENESS.observe(max(0.0, (pd.Timestamp.now() - pd.Timestamp(action['execution_time'])).total_seconds()),
+                                            workspace=workspace_name)
+                    ACTIONS_EXECUTED.inc(workspace=workspace_name, outcome='posted' if response else 'no_response')
+                    completed.append((thread_id, action))
+        finally:
+            # Whatever ran before a failed post is still completed, so it is not posted again next loop
+            if completed:
+                next_times = action_db.complete_actions(completed)
+                rearmed = sum(next_time is not None for next_time in next_times)
+                print(f"Completed {len(completed)} due actions ({rearmed} recurring re-armed)")
+            SCHEDULED_ACTIONS.set(len(action_db.schedule), workspace=workspace_name)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the AgentFlow Slack agents.")
+    parser.add_argument('--config', default='config.yaml', help="Path of the YAML config file")
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=['cprofile', 'sample'],
+                        help="Profile runner loops: sample writes collapsed stacks, cprofile (default) also writes pstats")
+    parser.add_argument('--profile-loops', type=int, default=0, metavar='N',
+                        help="Stop after N loops; 0 keeps running (default)")
+    parser.add_argument('--profile-every', type=int, default=1, metavar='K',
+                        help="Profile one loop in every K, so profiling can stay on in production")
+    parser.add_argument('--profile-dir', default='profiles', help="Directory for the per-loop profile files")
+    parser.add_argument('--profile-interval', type=float, default=0.005,
+                        help="Seconds between stack samples for --profile sample")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    load_config(args.config)
     runner = Runner()
+    if args.profile:
+        runner.profiler = LoopProfiler(args.profile_dir, args.profile, every=args.profile_every,
+                                       loops=args.profile_loops, interval=args.profile_interval)
     runner.main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+# slack_directory.py
+
+import threading
+from typing import List, Dict, Any, Callable, Optional
+import pandas as pd
+from slack_sdk.errors import SlackApiError
+
+class SlackDirectory:
+    """
+    TTL cache of a workspace's users and channels with id/name indexes. Entries expire after
+    their TTL, and a lookup that misses triggers a refresh (at most once per miss_refresh_interval
+    so unknown ids cannot cause a refresh on every message). A failed user refresh is not retried
+    within miss_refresh_interval either.
+    """
+
+    def __init__(self, fetch_users: Callable[[], List[Dict[str, Any]]], fetch_channels: Callable[[], List[Dict[str, Any]]],
+                 user_ttl: pd.Timedelta = pd.Timedelta(minutes=5), channel_ttl: pd.Timedelta = pd.Timedelta(minutes=5),
+                 miss_refresh_interval: pd.Timedelta = pd.Timedelta(minutes=1)):
+        self.fetch_users = fetch_users
+        self.fetch_channels = fetch_channels
+        self.user_ttl = user_ttl
+        self.channel_ttl = channel_ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self.lock = threading.RLock()
+        self.users_by_id: Dict[str, Dict[str, Any]] = {}
+        self.users_df = pd.DataFrame(columns=['id', 'user_name', 'is_bot'])
+        self.channel_list: List[Dict[str, Any]] = []
+        self.channel_names: Dict[str, str] = {}
+        self.channel_ids: Dict[str, str] = {}
+        self.users_fetched_at: Optional[pd.Timestamp] = None
+        self.users_failed_at: Optional[pd.Timestamp] = None
+        self.channels_fetched_at: Optional[pd.Timestamp] = None
+
+    @staticmethod
+    def _expired(fetched_at: Optional[pd.Timestamp], ttl: pd.Timedelta) -> bool:
+        return fetched_at is None or pd.Timestamp.now() - fetched_at >= ttl
+
+    def refresh_users(self) -> None:
+        try:
+            members = self.fetch_users()
+        except SlackApiError as e:
+            print(f"Error fetching user list: {e}")
+            with self.lock:
+                self.users_failed_at = pd.Timestamp.now()
+            return
+        users = [{
+            'id': member['id'],
+            'user_name': member.get('real_name', member['name']).capitalize(),
+            'is_bot': member.get('is_bot', False)
+        } for member in members]
+        with self.lock:
+            self.users_by_id = {user['id']: user for user in users}
+            self.users_df = pd.DataFrame(users, columns=['id', 'user_name', 'is_bot'])
+            self.users_fetched_at = pd.Timestamp.now()
+
+    def refresh_channels(self) -> None:
+        channels = self.fetch_channels()
+        with self.lock:
+            self.channel_list = channels
+            self.channel_names = {channel['id']: channel['name'] for channel in channels}
+            self.channel_ids = {channel['name']: channel['id'] for channel in channels}
+            self.channels_fetched_at = pd.Timestamp.now()
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.users_fetched_at = None
+            self.users_failed_at = None
+            self.channels_fetched_at = None
+
+    def _users_due(self, interval: pd.Timedelta) -> bool:
+        # During an outage or rate limiting, failures are retried no more than once per miss_refresh_interval
+        return self._expired(self.users_fetched_at, interval) and self._expired(self.users_failed_at, self.miss_refresh_interval)
+
+    def _ensure_users(self) -> None:
+        with self.lock:
+            if self._users_due(self.user_ttl):
+                self.refresh_users()
+
+    def _ensure_channels(self) -> None:
+        with self.lock:
+            if self._expired(self.channels_fetched_at, self.channel_ttl):
+                self.refresh_channels()
+
+    def users(self) -> pd.DataFrame:
+        self._ensure_users()
+        return self.users_df
+
+    def user_names(self) -> Dict[str, str]:
+        self._ensure_users()
+        return {user_id: user['user_name'] for user_id, user in self.users_by_id.items()}
+
+    def user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_users()
+        with self.lock:
+            if user_id not in self.users_by_id and user_id and self._users_due(self.miss_refresh_interval):
+                self.refresh_users()
+            return self.users_by_id.get(user_id)
+
+    def channels(self) -> List[Dict[str, Any]]:
+        self._ensure_channels()
+        return self.channel_list
+
+    def channel_id(self, name: str) -> Optional[str]:
+        self._ensure_channels()
+        with self.lock:
+            if name not in self.channel_ids and self._expired(self.channels_fetched_at, self.miss_refresh_interval):
+                self.refresh_channels()
+            return self.channel_ids.get(name)
+
+    def channel_name(self, channel_id: str) -> Optional[str]:
+        self._ensure_channels()
+        with self.lock:
+            if channel_id not in self.channel_names and self._expired(self.channels_fetched_at, self.miss_refresh_interval):
+                self.refresh_channels()
+            return self.channel_names.get(channel_id)
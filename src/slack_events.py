@@ -0,0 +1,77 @@
+# slack_events.py
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Callable, List, Optional
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+class EventSource(ABC):
+    @abstractmethod
+    def start(self, handler: EventHandler) -> None:
+        """
+        Begin delivering Slack event payloads (the inner "event" object) to handler.
+        """
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        pass
+
+class SocketModeEventSource(EventSource):
+    """
+    Receives Events API payloads over a Socket Mode websocket, so no public endpoint is needed.
+    Requires an app-level token (xapp-...) with connections:write and the app subscribed to
+    message.channels events.
+    """
+
+    def __init__(self, app_token: str, web_client=None):
+        from slack_sdk.socket_mode import SocketModeClient
+        self.client = SocketModeClient(app_token=app_token, web_client=web_client)
+        self.handler: Optional[EventHandler] = None
+        self.client.socket_mode_request_listeners.append(self._on_request)
+
+    def _on_request(self, client, request) -> None:
+        from slack_sdk.socket_mode.response import SocketModeResponse
+        if request.type != 'events_api':
+            return
+        # Ack first: Slack retries envelopes that are not acknowledged within 3 seconds
+        client.send_socket_mode_response(SocketModeResponse(envelope_id=request.envelope_id))
+        if self.handler is not None:
+            self.handler(request.payload.get('event', {}))
+
+    def start(self, handler: EventHandler) -> None:
+        self.handler = handler
+        self.client.connect()
+
+    def stop(self) -> None:
+        self.client.close()
+
+class FakeEventSource(EventSource):
+    """
+    Offline event source for tests and benchmarks; emit() delivers an event as Slack would.
+    """
+
+    def __init__(self):
+        self.handler: Optional[EventHandler] = None
+        self.started = threading.Event()
+        self.stopped = False
+        self.emitted: List[Dict[str, Any]] = []
+
+    def start(self, handler: EventHandler) -> None:
+        self.handler = handler
+        self.started.set()
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        self.started.wait()
+        self.emitted.append(event)
+        self.handler(event)
+
+    def emit_message(self, channel: str, user: str, text: str, ts: str, thread_ts: Optional[str] = None) -> None:
+        event = {'type': 'message', 'channel': channel, 'user': user, 'text': text, 'ts': ts}
+        if thread_ts is not None:
+            event['thread_ts'] = thread_ts
+        self.emit(event)
@@ -1,14 +1,23 @@
 import os
 import time
 import random
-from typing import List, Dict, Any, Callable, Optional
-from collections import defaultdict
+import re
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from tqdm import tqdm
-from config import CONFIG
+from message_store import MessageStore
+from slack_rate_limiter import SlackRateLimiter
+from slack_directory import SlackDirectory
+from metrics import SLACK_CALLS, SLACK_CALL_DURATION
+
+# Reply state stored for threads whose replies could not be fetched (deleted thread, lost channel
+# access), so they are not polled again unless the parent shows up in channel history with new replies
+UNAVAILABLE_THREAD_STATE = (-1, None)
+
+MENTION_PATTERN = re.compile(r'<@([^>|]+)>')
 
 class SlackInteractor:
     def __init__(self, workspace_config: Dict[str, Any], max_retries: int = 10, base_delay: float = 1):
@@ -17,22 +26,58 @@ class SlackInteractor:
         self.bot_token = workspace_config['bot_token']
         self.user_client = WebClient(token=self.user_token)
         self.bot_client = WebClient(token=self.bot_token)
-        self.conversations_oldest = None
+        self.channel_high_water_marks: Dict[str, str] = {}
+        # Parents get no new history entry when someone replies, so history is re-read this far behind the mark
+        self.thread_lookback = pd.Timedelta(hours=workspace_config.get('thread_lookback_hours', 24))
+        # Threads whose parent fell out of the lookback and that have been quiet as long are only re-checked this often
+        self.dormant_thread_interval = pd.Timedelta(hours=workspace_config.get('dormant_thread_check_hours', 24))
+        self.last_dormant_sweep = pd.Timestamp.now()
         self.max_retries = max_retries
         self.base_delay = base_delay
+        self.rate_limiter = SlackRateLimiter(workspace_config.get('rate_limits'))
+        self.fetch_concurrency = workspace_config.get('fetch_concurrency', 4)
         self.is_first_run = True
+        self.message_store = MessageStore(workspace_config.get('message_store_path', f'messages_{self.workspace_name}.db'))
+        self.message_store.migrate_from_pickle(f'complete_conversations_{self.workspace_name}.pkl')
+        self.last_sync = None
+        self.directory = SlackDirectory(
+            self.fetch_users,
+            self.fetch_conversations,
+            user_ttl=pd.Timedelta(seconds=workspace_config.get('user_cache_seconds', 300)),
+            channel_ttl=pd.Timedelta(seconds=workspace_config.get('channel_cache_seconds', 300))
+        )
+        # fetch_thread serves a thread from the store when the last sync is at most this old
+        self.thread_cache_max_age = pd.Timedelta(seconds=workspace_config.get('thread_cache_seconds', 60))
 
     def exponential_backoff(self, func: Callable, *args, **kwargs) -> Any:
+        method = self.rate_limiter.method_name(func)
         for attempt in range(self.max_retries):
+            self.rate_limiter.acquire(method)
+            start = time.perf_counter()
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
+                SLACK_CALLS.inc(workspace=self.workspace_name, method=method, outcome='ok')
+                return result
             except SlackApiError as e:
-                if e.response["error"] == "ratelimited":
-                    delay = (2 ** attempt + random.random()) * self.base_delay
-                    print(f"Rate limited. Retrying in {delay:.2f} seconds (attempt {attempt + 1}/{self.max_retries})")
-                    time.sleep(delay)
+                ratelimited = e.response["error"] == "ratelimited"
+                SLACK_CALLS.inc(workspace=self.workspace_name, method=method, outcome='ratelimited' if ratelimited else 'error')
+                if ratelimited:
+                    retry_after = e.response.headers.get("Retry-After") if e.response.headers else None
+                    if retry_after is not None:
+                        delay = float(retry_after)
+                    else:
+                        delay = (2 ** attempt + random.random()) * self.base_delay
+                    # Hold back every worker calling this method, not just this one
+                    self.rate_limiter.pause(method, delay)
+                    print(f"Rate limited on {method}. Retrying in {delay:.2f} seconds (attempt {attempt + 1}/{self.max_retries})")
                 else:
                     raise e
+            except Exception:
+                # Network failures and timeouts, which the Slack SDK raises as plain exceptions
+                SLACK_CALLS.inc(workspace=self.workspace_name, method=method, outcome='error')
+                raise
+            finally:
+                SLACK_CALL_DURATION.observe(time.perf_counter() - start, workspace=self.workspace_name, method=method)
         raise Exception(f"Failed after {self.max_retries} attempts")
 
     @staticmethod
@@ -63,10 +108,11 @@ class SlackInteractor:
         )
 
     @paginate('messages')
-    def fetch_channel_messages(self, channel_id: str, cursor: str = None) -> Dict[str, Any]:
+    def fetch_channel_messages(self, channel_id: str, oldest: str = None, cursor: str = None) -> Dict[str, Any]:
         return self.exponential_backoff(
             self.user_client.conversations_history,
             channel=channel_id,
+            oldest=oldest,
             limit=200,
             cursor=cursor
         )
@@ -94,9 +140,81 @@ class SlackInteractor:
         else:
             return str(pd.to_datetime(float(timestamp), unit='s'))
 
-    def fetch_thread(self, thread_ts: str) -> Optional[Dict[str, Any]]:
-        all_channels = self.fetch_conversations()
-        users = self.fetch_user_list()
+    def fetch_thread(self, thread_ts: str, channel: str = None, max_age: pd.Timedelta = None) -> Optional[Dict[str, Any]]:
+        if max_age is None:
+            max_age = self.thread_cache_max_age
+        thread_key = pd.Timestamp(thread_ts)
+        location = self.message_store.channel_for_thread(thread_key)
+        if location is not None and self.last_sync is not None and pd.Timestamp.now() - self.last_sync <= max_age:
+            return self.thread_from_store(thread_ts, thread_key, location[1])
+        if location is None and channel is not None:
+            channel_id = self.directory.channel_id(channel)
+            if channel_id is not None:
+                location = (channel_id, channel)
+        if location is None:
+            return self.probe_thread(thread_ts)
+        channel_id, channel_name = location
+        try:
+            messages = self.fetch_thread_messages(channel_id, self.convert_timestamp(thread_ts, to_slack=True))
+        except SlackApiError as e:
+            print(f"Error fetching thread {thread_ts} in channel {channel_name}: {e}")
+            return None
+        if not messages:
+            print(f"Thread with ts {thread_ts} not found in channel {channel_name}")
+            return None
+        return self.thread_from_api(thread_ts, channel_name, messages)
+
+    def thread_from_store(self, thread_ts: str, thread_key: pd.Timestamp, channel_name: str) -> Dict[str, Any]:
+        messages = self.message_store.load_threads([thread_key]).sort_values('ts')
+        current_time = pd.Timestamp.now()
+        thread_data = {
+            'channel': channel_name,
+            'thread_ts': thread_ts,
+            'messages': []
+        }
+        for msg in messages.to_dict('records'):
+            thread_data['messages'].append({
+                'ts': str(msg['ts']),
+                'user': msg['user'] if pd.notna(msg['user']) else 'Unknown',
+                'user_name': msg['user_name'] if pd.notna(msg['user_name']) else 'Unknown User',
+                'text': msg['text'],
+                'is_bot': bool(msg['is_bot']) if pd.notna(msg['is_bot']) else False,
+                'minutes_ago': int((current_time - msg['ts']).total_seconds() / 60),
+                'username': msg['username'] if pd.notna(msg['username']) else 'Unknown'
+            })
+        return thread_data
+
+    def thread_from_api(self, thread_ts: str, channel_name: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        thread_data = {
+            'channel': channel_name,
+            'thread_ts': thread_ts,
+            'messages': []
+        }
+        current_time = pd.Timestamp.now()
+        for msg in messages:
+            message_time = pd.to_datetime(float(msg['ts']), unit='s')
+            minutes_ago = int((current_time - message_time).total_seconds() / 60)
+            user_info = self.directory.user(msg.get('user', ''))
+            if user_info is not None:
+                user_name = user_info['user_name']
+                is_bot = user_info['is_bot']
+            else:
+                user_name = 'Unknown User'
+                is_bot = False
+            thread_data['messages'].append({
+                'ts': self.convert_timestamp(msg['ts'], to_slack=False),
+                'user': msg.get('user', 'Unknown'),
+                'user_name': user_name,
+                'text': msg['text'],
+                'is_bot': is_bot,
+                'minutes_ago': minutes_ago,
+                'username': msg.get('username', 'Unknown')
+            })
+        return thread_data
+
+    def probe_thread(self, thread_ts: str) -> Optional[Dict[str, Any]]:
+        # Last resort for threads we know nothing about: try every channel until one has it
+        all_channels = self.directory.channels()
         slack_ts = self.convert_timestamp(thread_ts, to_slack=True)
         for channel in all_channels:
             try:
@@ -106,79 +224,71 @@ class SlackInteractor:
                     ts=slack_ts
                 )
                 if result['ok'] and result['messages']:
-                    messages = result['messages']
-                    thread_data = {
-                        'channel': channel['name'],
-                        'thread_ts': thread_ts,
-                        'messages': []
-                    }
-                    current_time = pd.Timestamp.now()
-                    for msg in messages:
-                        message_time = pd.to_datetime(float(msg['ts']), unit='s')
-                        minutes_ago = int((current_time - message_time).total_seconds() / 60)
-                        user_info = users[users['id'] == msg.get('user', '')]
-                        if not user_info.empty:
-                            user_name = user_info.iloc[0]['user_name']
-                            is_bot = user_info.iloc[0]['is_bot']
-                        else:
-                            user_name = 'Unknown User'
-                            is_bot = False
-                        thread_data['messages'].append({
-                            'ts': self.convert_timestamp(msg['ts'], to_slack=False),
-                            'user': msg.get('user', 'Unknown'),
-                            'user_name': user_name,
-                            'text': msg['text'],
-                            'is_bot': is_bot,
-                            'minutes_ago': minutes_ago,
-                            'username': msg.get('username', 'Unknown')
-                        })
-                    return thread_data
+                    return self.thread_from_api(thread_ts, channel['name'], result['messages'])
             except SlackApiError as e:
                 if e.response['error'] != 'thread_not_found':
                     print(f"Error fetching thread in channel {channel['name']}: {e}")
         print(f"Thread with ts {thread_ts} not found in any channel")
         return None
 
+    @paginate('members')
+    def fetch_users(self, cursor: str = None) -> Dict[str, Any]:
+        return self.exponential_backoff(
+            self.user_client.users_list,
+            limit=200,
+            cursor=cursor
+        )
+
     def fetch_user_list(self) -> pd.DataFrame:
-        try:
-            result = self.exponential_backoff(self.user_client.users_list)
-            users = []
-            for member in result['members']:
-                users.append({
-                    'id': member['id'],
-                    'user_name': member.get('real_name', member['name']),
-                    'is_bot': member.get('is_bot', False)
-                })
-            users_df = pd.DataFrame(users)
-            users_df['user_name'] = users_df['user_name'].str.capitalize()
-            return users_df
-        except SlackApiError as e:
-            print(f"Error fetching user list: {e}")
-            return pd.DataFrame(columns=['id', 'user_name', 'is_bot'])
+        return self.directory.users()
 
     def fetch_mess_from_multi_channels(self, channels: List[str]) -> pd.DataFrame:
-        out = []
-        for channel in channels:
-            temp = pd.DataFrame(self.fetch_channel_messages(channel_id=channel))
+        columns = ['type', 'subtype', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username', 'reply_count', 'latest_reply']
+        def fetch(channel):
+            # Only ask Slack for messages newer than what we already hold for this channel
+            oldest = self.channel_oldest(channel)
+            temp = pd.DataFrame(self.fetch_channel_messages(channel_id=channel, oldest=oldest))
             temp['channel_id'] = channel
-            out.append(temp)
-        out = pd.concat(out)
-        if len(out) > 0:
-            out['subtype'] = out.get('subtype', np.nan)
-            out['thread_ts'] = out.get('thread_ts', np.nan)
-            out['user'] = out.get('user', np.nan)
-            out['username'] = out.get('username', np.nan)
-            out = out[['type', 'subtype', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username']]
-            # Filter out messages with non-NaN subtypes
-            out = out[out['subtype'].isna()]
+            return temp
+        out = self.map_concurrently(fetch, list(channels))
+        out = pd.concat(out) if out else pd.DataFrame()
+        if len(out) == 0:
+            return pd.DataFrame(columns=columns)
+        out['subtype'] = out.get('subtype', np.nan)
+        out['thread_ts'] = out.get('thread_ts', np.nan)
+        out['user'] = out.get('user', np.nan)
+        out['username'] = out.get('username', np.nan)
+        out['reply_count'] = out.get('reply_count', np.nan)
+        out['latest_reply'] = out.get('latest_reply', np.nan)
+        out = out[columns]
+        # Filter out messages with non-NaN subtypes
+        out = out[out['subtype'].isna()]
         return out
 
-    def fetch_multi_threads(self, channels: List[str], time_stamps: List[str]) -> pd.DataFrame:
-        all_threads = []
-        for channel, ts in zip(channels, time_stamps):
-            thread_messages = self.fetch_thread_messages(channel, ts)
+    def map_concurrently(self, func: Callable, items: List[Any]) -> List[Any]:
+        # Results keep the order of items; throttling is left to the shared rate limiter
+        if self.fetch_concurrency <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.fetch_concurrency, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    def fetch_multi_threads(self, channels: List[str], time_stamps: List[str],
+                            unavailable: Optional[List[Tuple[str, str]]] = None) -> pd.DataFrame:
+        def fetch(channel_and_ts):
+            channel, ts = channel_and_ts
+            try:
+                thread_messages = self.fetch_thread_messages(channel, ts)
+            except SlackApiError as e:
+                # One deleted thread or channel must not abort the sync of the whole workspace
+                print(f"Could not fetch thread {ts} in channel {channel}: {e.response['error']}")
+                if unavailable is not None:
+                    unavailable.append((channel, ts))
+                return []
             for message in thread_messages:
                 message['channel_id'] = channel
+            return thread_messages
+        all_threads = []
+        for thread_messages in self.map_concurrently(fetch, list(zip(channels, time_stamps))):
             all_threads.extend(thread_messages)
         if not all_threads:
             return pd.DataFrame(columns=['type', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username'])
@@ -203,77 +313,168 @@ class SlackInteractor:
         all_channels_convos['username'] = all_channels_convos['username'].fillna(all_channels_convos['user'])
         return all_channels_convos
 
-    def set_conversations_oldest(self, old_messages: pd.DataFrame):
-        if not old_messages.empty:
-            self.conversations_oldest = old_messages['ts'].min().timestamp()
-            print(f"Set conversations_oldest to {self.conversations_oldest}")
-        else:
-            self.conversations_oldest = None
-            print("No old messages, will fetch all available messages")
-
-    def fetch_new_messages(self, chunk_len: int = 1000, file_path: str = None) -> pd.DataFrame:
-        if file_path is None:
-            file_path = f'complete_conversations_{self.workspace_name}.pkl'
-        old_messages = pd.DataFrame()
-        if os.path.exists(file_path):
-            old_messages = self.load_old_messages(file_path)
-            self.set_conversations_oldest(old_messages)
-            print(f"Loaded {len(old_messages)} old messages")
+    @staticmethod
+    def compute_high_water_marks(messages: pd.DataFrame) -> Dict[str, str]:
+        # Replies are fetched after channel history, so only top-level messages may advance a cursor
+        if messages.empty:
+            return {}
+        ts = messages['ts']
+        thread_ts = messages['thread_ts']
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts.astype(float), unit='s')
+            thread_ts = pd.to_datetime(thread_ts.astype(float), unit='s')
+        top_level = thread_ts.isna() | (thread_ts == ts)
+        if not top_level.any():
+            return {}
+        latest = ts[top_level].groupby(messages.loc[top_level, 'channel_id']).max()
+        return {channel_id: SlackInteractor.convert_timestamp(value, to_slack=True) for channel_id, value in latest.items()}
+
+    def set_channel_high_water_marks(self):
+        marks = self.message_store.channel_high_water_marks()
+        self.channel_high_water_marks = {channel_id: self.convert_timestamp(ts, to_slack=True) for channel_id, ts in marks.items()}
+        print(f"Set high-water marks for {len(self.channel_high_water_marks)} channels")
+
+    def channel_oldest(self, channel_id: str) -> Optional[str]:
+        mark = self.channel_high_water_marks.get(channel_id)
+        if mark is None:
+            return None
+        return f"{float(mark) - self.thread_lookback.total_seconds():.6f}"
+
+    def advance_channel_high_water_marks(self, messages: pd.DataFrame):
+        for channel_id, ts in self.compute_high_water_marks(messages).items():
+            current = self.channel_high_water_marks.get(channel_id)
+            if current is None or float(ts) > float(current):
+                self.channel_high_water_marks[channel_id] = ts
+
+    @staticmethod
+    def normalize_slack_ts(ts: Any) -> str:
+        return f"{float(ts):.6f}"
+
+    def find_changed_threads(self, history: pd.DataFrame) -> Tuple[List[Tuple[str, str]], Dict[Tuple[str, str], Tuple[int, Optional[str]]]]:
+        """
+        Pick the threads whose replies need fetching. Parents present in the history window carry
+        reply_count/latest_reply, so they are fetched only when those advance. Parents outside the
+        window are polled while their last reply is within the lookback, and otherwise only on the
+        periodic dormant sweep. Known parents with no recorded state yet are always fetched once.
+        Threads that could not be fetched are not polled again.
+
+        Returns the threads to fetch and the new reply state of the history parents among them.
+        """
+        known_states = self.message_store.thread_states()
+        changed = []
+        new_states = {}
+        parents = history[history['thread_ts'].notna() & (history['thread_ts'] == history['ts'])]
+        for channel_id, ts, reply_count, latest_reply in zip(parents['channel_id'], parents['ts'], parents['reply_count'], parents['latest_reply']):
+            key = (channel_id, self.normalize_slack_ts(ts))
+            state = (0 if pd.isna(reply_count) else int(reply_count), None if pd.isna(latest_reply) else self.normalize_slack_ts(latest_reply))
+            if key not in new_states and known_states.get(key) != state:
+                changed.append(key)
+                new_states[key] = state
+        seen = {(channel_id, self.normalize_slack_ts(ts)) for channel_id, ts in zip(parents['channel_id'], parents['ts'])}
+        now = pd.Timestamp.now()
+        sweep_dormant = now - self.last_dormant_sweep >= self.dormant_thread_interval
+        active_since = (now - self.thread_lookback).timestamp()
+        for key, (reply_count, latest_reply) in known_states.items():
+            if key in seen or (reply_count, latest_reply) == UNAVAILABLE_THREAD_STATE:
+                continue
+            if sweep_dormant or (latest_reply is not None and float(latest_reply) >= active_since):
+                changed.append(key)
+        for channel_id, ts in self.message_store.thread_parents():
+            key = (channel_id, self.normalize_slack_ts(self.convert_timestamp(ts, to_slack=True)))
+            if key not in known_states and key not in seen:
+                changed.append(key)
+        if sweep_dormant:
+            self.last_dormant_sweep = now
+        return changed, new_states
+
+    def thread_states_from_replies(self, replies: pd.DataFrame, exclude: Dict[Tuple[str, str], Any]) -> Dict[Tuple[str, str], Tuple[int, Optional[str]]]:
+        states = {}
+        replies = replies[replies['thread_ts'].notna()]
+        for (channel_id, thread_ts), group in replies.groupby(['channel_id', 'thread_ts']):
+            key = (channel_id, self.normalize_slack_ts(thread_ts))
+            if key in exclude:
+                continue
+            reply_ts = group.loc[group['ts'] != group['thread_ts'], 'ts']
+            latest_reply = self.normalize_slack_ts(reply_ts.astype(float).max()) if not reply_ts.empty else None
+            states[key] = (len(reply_ts), latest_reply)
+        return states
+
+    def fetch_new_messages(self, chunk_len: int = 1000) -> pd.DataFrame:
+        if not self.message_store.is_empty():
+            if not self.channel_high_water_marks:
+                self.set_channel_high_water_marks()
             self.is_first_run = False
         else:
             print("No existing messages found. Will fetch all available messages.")
             self.is_first_run = True
         all_users = self.fetch_user_list()
-        all_channels = pd.DataFrame(self.fetch_conversations())
+        all_channels = pd.DataFrame(self.directory.channels(), columns=['id', 'name'])
         all_channels = all_channels[['id', 'name']]
         all_channels.rename({'name': 'channel_name'}, axis=1, inplace=True)
         all_channels_convos = self.fetch_mess_from_multi_channels(all_channels.id)
-        thread_parents = all_channels_convos[all_channels_convos['thread_ts'].notna()]
-        if not thread_parents.empty:
-            all_threads = self.fetch_multi_threads(thread_parents['channel_id'].tolist(), thread_parents['ts'].tolist())
+        changed_threads, thread_states = self.find_changed_threads(all_channels_convos)
+        print(f"{len(changed_threads)} threads have new replies")
+        if changed_threads:
+            unavailable = []
+            all_threads = self.fetch_multi_threads([channel for channel, _ in changed_threads], [ts for _, ts in changed_threads], unavailable)
+            thread_states.update(self.thread_states_from_replies(all_threads, exclude=thread_states))
+            thread_states.update((key, UNAVAILABLE_THREAD_STATE) for key in unavailable)
             new_data = pd.concat([all_channels_convos, all_threads], ignore_index=True)
         else:
             new_data = all_channels_convos
-        new_data = self.clean_convo_data(new_data)
+        new_data = self.enrich_messages(new_data, all_users, all_channels)
+        new_messages = self.message_store.append(new_data).reset_index(drop=True)
+        self.message_store.update_thread_states(
+            (channel, ts, reply_count, latest_reply) for (channel, ts), (reply_count, latest_reply) in thread_states.items()
+        )
+        self.advance_channel_high_water_marks(all_channels_convos)
+        self.last_sync = pd.Timestamp.now()
+        print(f"Found {len(new_messages)} new messages")
+        return new_messages
+
+    def enrich_messages(self, raw_messages: pd.DataFrame, all_users: pd.DataFrame, all_channels: pd.DataFrame) -> pd.DataFrame:
+        new_data = self.clean_convo_data(raw_messages)
         new_data = new_data.merge(all_users, left_on='user', right_on='id', how='left')
         new_data = new_data.merge(all_channels, left_on='channel_id', right_on='id', how='left')
         new_data = new_data.drop(['id_x', 'id_y'], axis=1)
-        new_data = new_data.reset_index(drop=True)
-        if not old_messages.empty:
-            old_messages['message_id'] = old_messages['ts'].astype(str) + '_' + old_messages['channel_id'].astype(str) + '_' + old_messages['user'].astype(str)
-            new_data['message_id'] = new_data['ts'].astype(str) + '_' + new_data['channel_id'].astype(str) + '_' + new_data['user'].astype(str)
-            new_message_ids = set(new_data['message_id']) - set(old_messages['message_id'])
-            new_messages = new_data[new_data['message_id'].isin(new_message_ids)].drop('message_id', axis=1)
-        else:
-            new_messages = new_data
-        new_messages = new_messages.sort_values('ts', ascending=False).reset_index(drop=True)
-        print(f"Found {len(new_messages)} new messages")
-        if not old_messages.empty:
-            old_messages = old_messages.drop('message_id', axis=1)
-        updated_data = pd.concat([new_messages, old_messages]).drop_duplicates(subset=['ts', 'channel_id', 'user'], keep='first')
-        updated_data = updated_data.sort_values('ts', ascending=False).reset_index(drop=True)
-        self.save_conversations(updated_data, file_path)
-        print(f"Updated {file_path} with new messages")
-        return new_messages
+        return new_data.sort_values('ts', ascending=False).reset_index(drop=True)
 
-    def fetch_new_user_messages(self, chunk_len: int = 1000, file_path: str = None) -> pd.DataFrame:
-        new_messages = self.fetch_new_messages(chunk_len, file_path)
+    def ingest_event(self, event: Dict[str, Any]) -> pd.DataFrame:
+        """
+        Store a message event received from the Events API / Socket Mode and return it, in the
+        shape fetch_new_user_messages returns, if it is a new message from a user.
+        """
+        columns = ['type', 'subtype', 'ts', 'user', 'thread_ts', 'text', 'channel_id', 'username']
+        # Edits, deletes, joins and bot posts carry a subtype; polling skips them too
+        if event.get('type') != 'message' or event.get('subtype') is not None or 'ts' not in event:
+            return pd.DataFrame()
+        if self.directory.channel_name(event.get('channel')) is None:
+            return pd.DataFrame()
+        raw = pd.DataFrame([{
+            'type': 'message',
+            'subtype': np.nan,
+            'ts': event['ts'],
+            'user': event.get('user', np.nan),
+            'thread_ts': event.get('thread_ts', np.nan),
+            'text': event.get('text', ''),
+            'channel_id': event['channel'],
+            'username': event.get('username', np.nan),
+        }], columns=columns)
+        all_channels = pd.DataFrame(self.directory.channels(), columns=['id', 'name']).rename({'name': 'channel_name'}, axis=1)
+        new_data = self.enrich_messages(raw, self.fetch_user_list(), all_channels)
+        new_messages = self.message_store.append(new_data).reset_index(drop=True)
+        new_messages['is_bot'] = new_messages['is_bot'].astype(bool)
+        return new_messages[~new_messages['is_bot']]
+
+    def fetch_new_user_messages(self, chunk_len: int = 1000) -> pd.DataFrame:
+        new_messages = self.fetch_new_messages(chunk_len)
         new_messages['is_bot'] = new_messages['is_bot'].astype(bool)
         user_messages = new_messages[~new_messages['is_bot']]
         return user_messages
 
-    def fetch_all_data(self, chunk_len: int = 1000, file_path: str = None) -> pd.DataFrame:
-        if file_path is None:
-            file_path = f'complete_conversations_{self.workspace_name}.pkl'
-        new_messages = self.fetch_new_messages(chunk_len, file_path)
-        all_messages = self.load_old_messages(file_path)
-        return all_messages
-
-    def load_old_messages(self, file_path: str) -> pd.DataFrame:
-        return pd.read_pickle(file_path)
-
-    def save_conversations(self, data: pd.DataFrame, file_path: str) -> None:
-        data.to_pickle(file_path)
+    def fetch_all_data(self, chunk_len: int = 1000) -> pd.DataFrame:
+        self.fetch_new_messages(chunk_len)
+        return self.message_store.load_all()
 
     def post_message(self, channel: str, text: str, username: str = None) -> Dict[str, Any]:
         return self.exponential_backoff(
@@ -296,63 +497,76 @@ class SlackInteractor:
                 username=username
             )
             print(f"Posted reply to thread {thread_ts} in channel {channel}")
-            return result
         except SlackApiError as e:
             print(f"Error posting reply to thread: {e}")
             raise e
+        self.store_posted_reply(result, slack_ts, reply_text, username)
+        return result
+
+    def store_posted_reply(self, result, thread_ts: str, text: str, username: Optional[str]) -> None:
+        # Bot posts carry a subtype and are skipped by polling and events alike, so the reply is
+        # stored here; otherwise the agents would not see it in the thread until the next full sync
+        try:
+            raw = pd.DataFrame([{
+                'type': 'message',
+                'subtype': np.nan,
+                'ts': result['ts'],
+                'user': (result.get('message') or {}).get('user'),
+                'thread_ts': thread_ts,
+                'text': text,
+                'channel_id': result['channel'],
+                'username': username,
+            }])
+            all_channels = pd.DataFrame(self.directory.channels(), columns=['id', 'name']).rename({'name': 'channel_name'}, axis=1)
+            stored = self.enrich_messages(raw, self.fetch_user_list(), all_channels)
+            stored['is_bot'] = True
+            stored['user_name'] = username
+            self.message_store.append(stored)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Could not store posted reply in thread {thread_ts}: {e}")
 
-    def organize_threads(self, new_messages: pd.DataFrame, file_path: str = None) -> List[Dict[str, Any]]:
-        if file_path is None:
-            file_path = f'complete_conversations_{self.workspace_name}.pkl'
+    def organize_threads(self, new_messages: pd.DataFrame) -> List[Dict[str, Any]]:
         if new_messages is None or new_messages.empty:
             return []
-        if os.path.exists(file_path):
-            cached_messages = self.load_old_messages(file_path)
-        else:
-            cached_messages = pd.DataFrame()
+        new_message_threads = set(new_messages['thread_ts'].dropna().unique()) | set(new_messages['ts'])
+        # Only the threads touched by new messages are read back from the store
+        cached_messages = self.message_store.load_threads(new_message_threads)
         all_messages = pd.concat([new_messages, cached_messages]).drop_duplicates(subset=['ts', 'channel_id', 'user'], keep='first')
         sorted_messages = all_messages.sort_values('ts')
-        new_message_threads = set(new_messages['thread_ts'].dropna().unique()) | set(new_messages['ts'])
+        thread_keys = sorted_messages['thread_ts'].where(sorted_messages['thread_ts'].notna(), sorted_messages['ts'])
+        touched = thread_keys.isin(list(new_message_threads))
+        sorted_messages = sorted_messages[touched].assign(thread_key=thread_keys[touched])
+        if sorted_messages.empty:
+            return []
+
+        # Replace @ mentions in one regex pass, resolving ids from the cached directory
+        users = self.directory.user_names()
+        def replace_mention(match):
+            user_id = match.group(1)
+            return f'@{users[user_id]}' if user_id in users else match.group(0)
+        sorted_messages['text'] = sorted_messages['text'].str.replace(MENTION_PATTERN, replace_mention, regex=True)
         current_time = pd.Timestamp.now()
-        threads = defaultdict(list)
-        
-        # Fetch user list once
-        users = {user['id']: user['user_name'] for user in self.fetch_user_list().to_dict('records')}
-        
-        for _, message in sorted_messages.iterrows():
-            thread_ts = message['thread_ts'] if pd.notna(message['thread_ts']) else message['ts']
-            if thread_ts in new_message_threads:
-                # Replace @ mentions in the message text
-                text = message['text']
-                for user_id, user_name in users.items():
-                    text = text.replace(f'<@{user_id}>', f'@{user_name}')
-                
-                message_dict = message.to_dict()
-                message_dict['text'] = text
-                threads[thread_ts].append(message_dict)
-        
+        sorted_messages['minutes_ago'] = ((current_time - sorted_messages['ts']).dt.total_seconds() / 60).astype(int)
+        sorted_messages = sorted_messages.drop_duplicates(subset=['thread_key', 'ts', 'user', 'text'], keep='first')
+
         organized_threads = []
-        for thread_ts, messages in threads.items():
-            thread = {
-                'channel': messages[0]['channel_name'],
+        for thread_ts, messages in sorted_messages.groupby('thread_key', sort=True):
+            organized_threads.append({
+                'channel': messages['channel_name'].iloc[0],
                 'thread_ts': thread_ts,
-                'messages': []
-            }
-            seen_messages = set()
-            for message in messages:
-                message_key = (message['ts'], message['user'], message['text'])
-                if message_key not in seen_messages:
-                    message_time = pd.to_datetime(message['ts'])
-                    minutes_ago = int((current_time - message_time).total_seconds() / 60)
-                    thread['messages'].append({
-                        'ts': message['ts'],
-                        'user': message['user_name'],
-                        'text': message['text'],  # This now contains the text with replaced @ mentions
-                        'is_bot': message.get('is_bot', False),
+                'messages': [
+                    {
+                        'ts': ts,
+                        'user': user_name,
+                        'text': text,
+                        'is_bot': is_bot,
                         'minutes_ago': minutes_ago,
-                        'username': message.get('username', 'Unknown')
-                    })
-                    seen_messages.add(message_key)
-            organized_threads.append(thread)
-        organized_threads.sort(key=lambda x: x['thread_ts'])
-        return organized_threads
\ No newline at end of file
+                        'username': username
+                    }
+                    for ts, user_name, text, is_bot, minutes_ago, username in zip(
+                        messages['ts'].tolist(), messages['user_name'].tolist(), messages['text'].tolist(),
+                        messages['is_bot'].tolist(), messages['minutes_ago'].tolist(), messages['username'].tolist()
+                    )
+                ]
+            })
+        return organized_threads
@@ -0,0 +1,86 @@
+# slack_rate_limiter.py
+
+import time
+import threading
+from typing import Dict, Optional
+
+# Requests per minute for each Slack Web API rate limit tier
+TIER_LIMITS = {
+    1: 1,
+    2: 20,
+    3: 50,
+    4: 100,
+}
+
+METHOD_TIERS = {
+    'conversations.list': 2,
+    'users.list': 2,
+    'conversations.history': 3,
+    'conversations.replies': 3,
+    'users.info': 4,
+}
+
+# chat.postMessage is a "special" tier of roughly one message per second per channel
+SPECIAL_LIMITS = {
+    'chat.postMessage': 60,
+}
+
+DEFAULT_LIMIT = TIER_LIMITS[3]
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, min(per_minute, 10.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take amount tokens and return how long the caller has to wait before using them.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+class SlackRateLimiter:
+    """
+    Client-side throttle shared by every worker of a SlackInteractor. Each Web API method gets
+    a token bucket sized from its Slack tier, and a 429 pauses that method for all workers for
+    the Retry-After the server asked for.
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, float]] = None):
+        self.overrides = overrides or {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def method_name(func) -> str:
+        return getattr(func, '__name__', str(func)).replace('_', '.')
+
+    def limit_for(self, method: str) -> float:
+        if method in self.overrides:
+            return self.overrides[method]
+        if method in SPECIAL_LIMITS:
+            return SPECIAL_LIMITS[method]
+        return TIER_LIMITS.get(METHOD_TIERS.get(method), DEFAULT_LIMIT)
+
+    def _bucket(self, method: str) -> TokenBucket:
+        if method not in self.buckets:
+            self.buckets[method] = TokenBucket(self.limit_for(method))
+        return self.buckets[method]
+
+    def acquire(self, method: str) -> None:
+        with self.lock:
+            wait = self._bucket(method).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, method: str, seconds: float) -> None:
+        with self.lock:
+            bucket = self._bucket(method)
+            bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
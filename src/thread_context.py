@@ -0,0 +1,103 @@
+# thread_context.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from llm_interface import LLMInterface, estimate_tokens
+
+class ThreadContextBuilder:
+    """
+    Builds the conversation part of an agent prompt within a token budget. With a summarizer,
+    the last keep_last messages are kept verbatim (fewer if they alone exceed the budget) and
+    everything before them is replaced by a rolling summary. Summaries are cached per thread and
+    extended with only the messages that dropped out of the window since the last call. Without
+    one, messages are only dropped, oldest first, when the thread exceeds the budget.
+    """
+
+    def __init__(self, keep_last: int = 30, token_budgets: Optional[Dict[str, int]] = None, default_budget: int = 20000,
+                 summary_tokens: int = 500, summarizer: Optional[LLMInterface] = None, max_cached_threads: int = 1000):
+        self.keep_last = keep_last
+        self.token_budgets = token_budgets or {}
+        self.default_budget = default_budget
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.max_cached_threads = max_cached_threads
+        self.lock = threading.Lock()
+        # (channel, thread_ts) -> (number of messages summarized, summary)
+        self.summaries: "OrderedDict[Tuple[str, str], Tuple[int, str]]" = OrderedDict()
+        self.thread_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def budget_for(self, llm_type: str) -> int:
+        return self.token_budgets.get(llm_type, self.default_budget)
+
+    def build(self, thread: Dict[str, Any], format_message: Callable[[Dict[str, Any]], str], llm_type: str) -> str:
+        messages = thread['messages']
+        lines = [format_message(message) for message in messages]
+        line_tokens = [estimate_tokens(line) for line in lines]
+        budget = self.budget_for(llm_type)
+
+        # The local digest loses most of what it replaces, so it is only used to fit the budget
+        window = min(self.keep_last, len(lines)) if self.summarizer is not None else len(lines)
+        reserve = self.summary_tokens if window < len(lines) else 0
+        recent_tokens = sum(line_tokens[len(lines) - window:])
+        while window > 1 and recent_tokens + reserve > budget:
+            recent_tokens -= line_tokens[len(lines) - window]
+            window -= 1
+            reserve = self.summary_tokens
+
+        recent = lines[len(lines) - window:]
+        if recent and recent_tokens + reserve > budget:
+            # A single message larger than the budget; keep its end, which is usually the ask
+            recent[-1] = '...' + recent[-1][-max(1, (budget - reserve - 1) * 4):]
+        older_count = len(lines) - window
+        if older_count == 0:
+            return "\n".join(recent)
+        summary = self._summary(thread, messages[:older_count], lines[:older_count])
+        return "\n".join([f"Summary of {older_count} earlier messages: {summary}"] + recent)
+
+    def _summary(self, thread: Dict[str, Any], messages: List[Dict[str, Any]], lines: List[str]) -> str:
+        key = (thread['channel'], str(thread['thread_ts']))
+        with self.lock:
+            thread_lock = self.thread_locks.setdefault(key, threading.Lock())
+        with thread_lock:
+            with self.lock:
+                summarized, summary = self.summaries.get(key, (0, ''))
+            if summarized > len(lines):
+                summarized, summary = 0, ''
+            if summarized < len(lines):
+                summary = self._extend_summary(summary, messages, lines, summarized)
+                with self.lock:
+                    self.summaries[key] = (len(lines), summary)
+                    self.summaries.move_to_end(key)
+                    while len(self.summaries) > self.max_cached_threads:
+                        evicted, _ = self.summaries.popitem(last=False)
+                        self.thread_locks.pop(evicted, None)
+            return summary
+
+    def _extend_summary(self, summary: str, messages: List[Dict[str, Any]], lines: List[str], start: int) -> str:
+        if self.summarizer is not None:
+            new_lines = "\n".join(lines[start:])
+            prompt = f"""
+            Summarize this Slack thread history for a bot that will only see your summary and the latest messages.
+            Keep decisions, open questions, owners and dates. Use at most {self.summary_tokens * 3 // 4} words.
+
+            Summary so far:
+            {summary or 'None'}
+
+            New messages:
+            {new_lines}
+
+            Updated summary:
+            """
+            updated = self.summarizer.generate_response(prompt)
+            if updated:
+                return updated[:self.summary_tokens * 4]
+        return self._digest(messages, lines)
+
+    def _digest(self, messages: List[Dict[str, Any]], lines: List[str]) -> str:
+        """
+        Local fallback when there is no summarizer: who took part, and how the thread started.
+        """
+        participants = list(dict.fromkeys(str(message.get('username') or message.get('user')) for message in messages))
+        digest = f"participants {', '.join(participants)}. It started with: {lines[0]}"
+        return digest[:self.summary_tokens * 4]
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from config import load_config
+
+load_config(os.path.join(ROOT, 'config.template.yaml'))
+# Action databases and message stores are written to the working directory
+os.chdir(tempfile.mkdtemp(prefix='agentflow-tests-'))
@@ -0,0 +1,52 @@
+import asyncio
+import re
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from fake_llm import FakeLLM, reply_response
+from project_manager_agent import ProjectManagerAgent
+
+def make_thread(i):
+    return {
+        "channel": "agentflow",
+        "thread_ts": f"2024-08-12 22:{i // 60:02d}:{i % 60:02d}",
+        "messages": [{"text": f"Question number {i}?", "user": "Alice", "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]
+    }
+
+def echo_question(prompt):
+    number = re.search(r'Question number (\d+)', prompt).group(1)
+    return reply_response(f"Answer to {number}")
+
+class AsyncDecisionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = ProjectManagerAgent('claude', MagicMock(), MagicMock(), workspace_name='test')
+        self.agent.llm = FakeLLM(echo_question, latency=0.2)
+
+    def test_many_decisions_share_one_event_loop(self):
+        async def decide_all():
+            return await asyncio.gather(*(self.agent.adecide_action(make_thread(i)) for i in range(200)))
+
+        start = time.monotonic()
+        decisions = asyncio.run(decide_all())
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertEqual(self.agent.llm.calls, 200)
+        for i, (action_needed, immediate_action, delayed_action) in enumerate(decisions):
+            self.assertTrue(action_needed)
+            self.assertEqual(immediate_action['response'], f"Answer to {i}")
+            self.assertIsNone(delayed_action)
+
+    def test_async_and_sync_decisions_agree(self):
+        self.agent.llm.latency = 0
+        thread = make_thread(7)
+        self.agent.read_thread(thread)
+        self.assertEqual(asyncio.run(self.agent.adecide_action(thread)), self.agent.decide_action())
+
+    def test_streaming_stops_early(self):
+        self.agent.llm = FakeLLM(reply_response("hi") + " and then a long explanation" * 20, chunk_size=8)
+        asyncio.run(self.agent.adecide_action(make_thread(1)))
+        self.assertLess(self.agent.llm.chunks_streamed, len(reply_response("hi")) // 8 + 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import time
+import unittest
+from slack_sdk.errors import SlackApiError
+
+from benchmark import seed_store, attach_fakes, measure_loops
+from db import ActionDatabase
+from fake_llm import FakeLLM, reply_response, parse_latency
+from fake_slack import SyntheticWorkspace, FakeWebClient, CHANNEL_SHIFT
+from project_manager_agent import ProjectManagerAgent
+from runner import Runner
+from slack_interactor import SlackInteractor
+
+class FakeWebClientTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = SyntheticWorkspace(messages=2000, channels=3, users=10, end_time=time.time() - 600, seed=1)
+        self.client = FakeWebClient(self.workspace)
+
+    def test_history_is_paginated_newest_first(self):
+        channel = self.workspace.channel_ids[0]
+        expected = self.workspace.history(channel)
+        pages = []
+        cursor = None
+        while True:
+            response = self.client.conversations_history(channel=channel, limit=200, cursor=cursor)
+            pages.append(response['messages'])
+            cursor = response.data['response_metadata']['next_cursor']
+            if not cursor:
+                break
+        messages = [message for page in pages for message in page]
+        self.assertGreater(len(pages), 1)
+        self.assertEqual(len(messages), len(expected))
+        self.assertEqual(self.client.calls['conversations.history'], len(pages))
+        timestamps = [float(message['ts']) for message in messages]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertTrue(all('thread_ts' not in message or message['thread_ts'] == message['ts'] for message in messages))
+
+    def test_replies_start_with_parent(self):
+        index = int(self.workspace.parent_index[0])
+        parent = self.workspace._base_message(index)
+        channel = self.workspace.channel_ids[int(self.workspace.keys[index] >> CHANNEL_SHIFT)]
+        messages = self.client.conversations_replies(channel=channel, ts=parent['ts'], limit=1000)['messages']
+        self.assertEqual(messages[0]['ts'], parent['ts'])
+        self.assertEqual(len(messages), parent['reply_count'] + 1)
+        self.assertEqual(messages[-1]['ts'], parent['latest_reply'])
+        with self.assertRaises(SlackApiError) as raised:
+            self.client.conversations_replies(channel=channel, ts='1.000001')
+        self.assertEqual(raised.exception.response['error'], 'thread_not_found')
+
+    def test_rate_limit_answers_with_retry_after(self):
+        client = FakeWebClient(self.workspace, rate_limits={'users.list': 2})
+        client.users_list()
+        client.users_list()
+        with self.assertRaises(SlackApiError) as raised:
+            client.users_list()
+        self.assertEqual(raised.exception.response.status_code, 429)
+        self.assertEqual(raised.exception.response['error'], 'ratelimited')
+        self.assertGreaterEqual(int(raised.exception.response.headers['Retry-After']), 1)
+        self.assertEqual(client.rate_limited['users.list'], 1)
+
+    def test_latency_specs(self):
+        self.assertEqual(parse_latency('0.25'), 0.25)
+        sample = parse_latency('lognormal:0.5:0.3')
+        samples = [sample() for _ in range(200)]
+        self.assertTrue(all(value > 0 for value in samples))
+        self.assertLess(abs(sorted(samples)[100] - 0.5), 0.1)
+
+class BenchmarkLoopTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workspace = SyntheticWorkspace(messages=3000, channels=4, users=10, end_time=time.time() - 900, seed=2)
+        self.client = FakeWebClient(self.workspace)
+        self.slack_interactor = SlackInteractor({
+            'name': 'bench',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_bench.db'),
+        })
+        self.slack_interactor.user_client = self.client
+        self.action_db = ActionDatabase('bench_test')
+        agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='bench')
+        self.runner = Runner.__new__(Runner)
+        self.runner.slack_interactors = {'bench': self.slack_interactor}
+        self.runner.agents = {'bench': [agent]}
+        self.runner.action_dbs = {'bench': self.action_db}
+        self.runner.decision_pool = None
+        self.llm = FakeLLM(reply_response("On it!"))
+        attach_fakes(self.runner, self.client, self.llm)
+
+    def tearDown(self):
+        self.slack_interactor.message_store.close()
+        self.action_db.close()
+
+    def test_seeded_loop_only_fetches_recent_traffic(self):
+        self.assertEqual(seed_store(self.slack_interactor, self.workspace), 3000)
+        self.client.calls.clear()
+
+        results = measure_loops(self.runner, self.workspace, self.client, self.llm, loops=2, sleep_period=300)
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertGreater(result['new_messages'], 0)
+            self.assertGreater(result['llm_calls'], 0)
+            # One history page per channel: the seeded month is not fetched again
+            self.assertEqual(result['api_calls_by_method']['conversations.history'], 4)
+        self.assertGreater(self.client.calls['chat.postMessage'], 0)
+        self.assertGreater(self.slack_interactor.message_store.count(), 3000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from claude_llm import ClaudeLLM
+from llm_interface import estimate_tokens
+from metrics import LLM_TOKENS
+from project_manager_agent import ProjectManagerAgent
+
+class StubStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+    @property
+    def text_stream(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+class StubMessages:
+    def __init__(self):
+        self.requests = []
+        self.chunks = [' {"immediate_action": ', '{"needed": false}', '} ']
+        self.streams = []
+        self.usage = None
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(text=''.join(self.chunks))], usage=self.usage)
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        self.streams.append(StubStream(self.chunks))
+        return self.streams[-1]
+
+class StubClient:
+    def __init__(self):
+        self.messages = StubMessages()
+
+class ClaudeLLMTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = StubClient()
+        self.agent = ProjectManagerAgent('claude', MagicMock(), MagicMock(), workspace_name='test')
+        self.agent.llm = ClaudeLLM(client=self.client)
+
+    def _decide(self, text):
+        self.agent.read_thread({
+            "channel": "agentflow",
+            "thread_ts": "2024-08-12 22:43:44",
+            "messages": [{"text": text, "user": "Alice", "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]
+        })
+        self.agent.decide_action()
+        return self.client.messages.requests[-1]
+
+    def test_static_instructions_are_sent_as_a_cached_system_block(self):
+        first = self._decide("Can someone review the launch plan?")
+        second = self._decide("Any update on the invoices?")
+
+        self.assertEqual(first['system'], second['system'])
+        # The agent instructions are below the minimum cacheable prefix, where a breakpoint is ignored
+        self.assertNotIn('cache_control', first['system'][0])
+        self.assertIn(self.agent.goal, first['system'][0]['text'])
+        self.assertIn("JSON response with the following structure", first['system'][0]['text'])
+
+        user_content = second['messages'][0]['content']
+        self.assertIn("Any update on the invoices?", user_content)
+        self.assertNotIn(self.agent.goal, user_content)
+
+    def test_long_system_blocks_are_cache_breakpoints(self):
+        system = "Follow the style guide. " * 250
+        self.assertGreaterEqual(estimate_tokens(system), self.agent.llm.min_cacheable_tokens)
+        self.agent.llm.generate_response("Hello", system=system)
+        self.assertEqual(self.client.messages.requests[-1]['system'][0]['cache_control'], {"type": "ephemeral"})
+
+        # Indentation is not counted as if every four spaces were a token
+        self.agent.llm.generate_response("Hello", system="        Be brief.\n" * 300)
+        self.assertNotIn('cache_control', self.client.messages.requests[-1]['system'][0])
+
+    def test_short_system_blocks_and_cache_reads(self):
+        self.client.messages.usage = SimpleNamespace(input_tokens=40, cache_creation_input_tokens=0, cache_read_input_tokens=1400,
+                                                     output_tokens=12)
+        model = self.agent.llm.model
+        cache_reads = LLM_TOKENS.value(provider='claude', model=model, direction='cache_read')
+        inputs = LLM_TOKENS.value(provider='claude', model=model, direction='input')
+
+        self.agent.llm.generate_response("Hello", system="Be brief")
+
+        self.assertNotIn('cache_control', self.client.messages.requests[-1]['system'][0])
+        self.assertEqual(LLM_TOKENS.value(provider='claude', model=model, direction='cache_read'), cache_reads + 1400)
+        self.assertEqual(LLM_TOKENS.value(provider='claude', model=model, direction='input'), inputs + 40)
+        self.assertEqual(ClaudeLLM(client=self.client, model='claude-3-haiku-20240307').min_cacheable_tokens, 2048)
+
+    def test_without_system_only_the_prompt_is_sent(self):
+        self.assertEqual(self.agent.llm.generate_response("Hello"), '{"immediate_action": {"needed": false}}')
+        self.assertNotIn('system', self.client.messages.requests[-1])
+
+    def test_streaming_stops_when_the_json_object_closes(self):
+        self.client.messages.chunks = ['{"immediate_action": {"needed": true, "description": "Reply", ',
+                                       '"response": "Use {braces} and \\"quotes\\"", "execution_time": "Immediately"}, ',
+                                       '"delayed_action": {"needed": false}}',
+                                       '\n\nLet me explain my reasoning...', ' at length.']
+        response = self.agent.llm.generate_json_response("Hello", system="Be brief")
+
+        stream = self.client.messages.streams[-1]
+        self.assertEqual(stream.consumed, 3)
+        self.assertTrue(stream.closed)
+        self.assertEqual(response, ''.join(self.client.messages.chunks[:3]))
+
+    def test_streaming_short_circuits_on_a_rejection(self):
+        self.client.messages.chunks = ["I'm ", "sorry, but", " I can't help with that.", " {}"]
+        self._decide("Say something rude")
+
+        stream = self.client.messages.streams[-1]
+        self.assertEqual(stream.consumed, 2)
+        self.assertTrue(stream.closed)
+
+if __name__ == '__main__':
+    unittest.main()
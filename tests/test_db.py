@@ -0,0 +1,106 @@
+import json
+import os
+import unittest
+import pandas as pd
+
+from db import ActionDatabase
+
+class ActionDatabaseTests(unittest.TestCase):
+
+    def setUp(self):
+        self.action_db = ActionDatabase('db_test')
+        self.now = pd.Timestamp("2024-08-12 12:00:00")
+
+    def tearDown(self):
+        self.action_db.close()
+        for path in (self.action_db.file_path, self.action_db.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_due_actions_come_from_the_schedule_in_time_order(self):
+        self.action_db.add_action("t1", "agentflow", "Later", self.now + pd.Timedelta(hours=1), "PM Agent")
+        self.action_db.add_action("t2", "agentflow", "Second", self.now - pd.Timedelta(minutes=5), "PM Agent")
+        self.action_db.add_action("t3", "agentflow", "First", self.now - pd.Timedelta(minutes=10), "Sarcastic Agent")
+
+        due = self.action_db.get_due_actions(self.now)
+        self.assertEqual([(thread_id, action['description']) for thread_id, action in due], [("t3", "First"), ("t2", "Second")])
+        self.assertEqual(self.action_db.next_due_time(), self.now - pd.Timedelta(minutes=10))
+        self.assertEqual(self.action_db.next_due_time(after=self.now), self.now + pd.Timedelta(hours=1))
+
+    def test_replacing_and_removing_actions_updates_the_schedule(self):
+        self.action_db.add_action("t1", "agentflow", "Old", self.now - pd.Timedelta(minutes=5), "PM Agent")
+        self.action_db.add_action("t1", "agentflow", "New", self.now + pd.Timedelta(minutes=5), "PM Agent")
+        self.assertEqual(self.action_db.get_due_actions(self.now), [])
+        self.assertEqual(len(self.action_db.schedule), 1)
+
+        self.action_db.remove_action("t1", "New")
+        self.assertEqual(self.action_db.schedule, [])
+        self.assertIsNone(self.action_db.next_due_time())
+
+    def test_completing_a_recurring_action_re_arms_it(self):
+        rule = {'freq': 'daily', 'hour': 9, 'minute': 0}
+        self.action_db.add_action("t1", "agentflow", "Standup", self.now - pd.Timedelta(hours=3), "PM Agent", recurrence=rule)
+        self.action_db.add_action("t2", "agentflow", "Once", self.now - pd.Timedelta(hours=1), "PM Agent")
+
+        for thread_id, action in self.action_db.get_due_actions(self.now):
+            self.action_db.complete_action(thread_id, action, now=self.now)
+
+        self.assertEqual(self.action_db.get_due_actions(self.now), [])
+        self.assertEqual(self.action_db.get_actions("t2"), [])
+        self.assertEqual(self.action_db.next_due_time(), pd.Timestamp("2024-08-13 09:00:00"))
+
+        self.action_db.close()
+        reloaded = ActionDatabase('db_test')
+        self.assertEqual(reloaded.get_actions("t1")[0]['recurrence'], rule)
+        self.assertEqual(reloaded.next_due_time(), pd.Timestamp("2024-08-13 09:00:00"))
+        reloaded.close()
+
+    def test_schedule_is_rebuilt_on_load(self):
+        self.action_db.add_action("t1", "agentflow", "Check in", self.now, "PM Agent")
+        reloaded = ActionDatabase('db_test')
+        self.assertEqual(reloaded.next_due_time(), self.now)
+        self.assertEqual(len(reloaded.get_due_actions(self.now)), 1)
+        reloaded.close()
+
+    def test_mutations_are_appended_to_the_log_and_replayed(self):
+        self.action_db.add_action("t1", "agentflow", "Check in", self.now, "PM Agent")
+        self.action_db.add_action("t2", "agentflow", "Joke", self.now, "Sarcastic Agent")
+        self.action_db.remove_action("t2", "Joke")
+        self.assertFalse(os.path.exists(self.action_db.file_path))
+        with open(self.action_db.log_path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+        reloaded = ActionDatabase('db_test')
+        self.assertEqual(reloaded.actions, self.action_db.actions)
+        reloaded.close()
+
+    def test_torn_log_record_is_skipped_on_replay(self):
+        self.action_db.add_action("t1", "agentflow", "Check in", self.now, "PM Agent")
+        with open(self.action_db.log_path, 'a') as f:
+            f.write('{"op": "add", "thread_id": "t2", "act')
+        reloaded = ActionDatabase('db_test')
+        self.assertEqual(reloaded.get_all_thread_ids(), ["t1"])
+        reloaded.close()
+
+    def test_log_is_compacted_into_the_snapshot(self):
+        self.action_db.compact_after = 3
+        for i in range(3):
+            self.action_db.add_action(f"t{i}", "agentflow", "Check in", self.now, "PM Agent")
+        self.assertEqual(os.path.getsize(self.action_db.log_path), 0)
+        with open(self.action_db.file_path) as f:
+            self.assertEqual(sorted(json.load(f)), ["t0", "t1", "t2"])
+
+        self.action_db.remove_action("t0", "Check in")
+        reloaded = ActionDatabase('db_test')
+        self.assertEqual(sorted(reloaded.get_all_thread_ids()), ["t1", "t2"])
+        reloaded.close()
+
+    def test_timezone_aware_times_are_rejected_before_anything_changes(self):
+        self.action_db.add_action("t1", "agentflow", "Check in", self.now, "PM Agent")
+        with self.assertRaises(ValueError):
+            self.action_db.add_action("t1", "agentflow", "Check in", pd.Timestamp("2024-08-12T13:00:00Z"), "PM Agent")
+        self.assertEqual(pd.Timestamp(self.action_db.get_actions("t1")[0]['execution_time']), self.now)
+        self.assertEqual(self.action_db.schedule, [(self.now, "t1", "PM Agent")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+from json_stream import JsonObjectScanner, collect_json_object, starts_with_any
+
+class JsonStreamTests(unittest.TestCase):
+
+    def test_scanner_ignores_braces_inside_strings(self):
+        scanner = JsonObjectScanner()
+        self.assertIsNone(scanner.feed('Sure! Here is "the" answer: {"text": "a } and a \\'))
+        self.assertIsNone(scanner.feed('" {", "nested": {"x": 1}'))
+        self.assertEqual(scanner.feed('} trailing'), 1)
+
+    def test_collect_stops_at_the_end_of_the_object(self):
+        consumed = []
+        def chunks():
+            for chunk in ['{"a": ', '{"b": 1}', '}', ' more text', ' and more']:
+                consumed.append(chunk)
+                yield chunk
+        self.assertEqual(collect_json_object(chunks()), '{"a": {"b": 1}}')
+        self.assertEqual(len(consumed), 3)
+
+    def test_stop_prefixes(self):
+        self.assertIsNone(starts_with_any("  I'm so", ["I'm sorry"]))
+        self.assertTrue(starts_with_any("I'm sorry, no", ["I'm sorry"]))
+        self.assertFalse(starts_with_any('{"immediate', ["I'm sorry"]))
+        self.assertEqual(collect_json_object(iter(["I ca", "nnot do", " that {}"]), ["I cannot"]), "I cannot do")
+        self.assertEqual(collect_json_object(iter(["Here", ": {}", " done"]), ["I cannot"]), "Here: {}")
+
+if __name__ == '__main__':
+    unittest.main()
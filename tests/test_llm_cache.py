@@ -0,0 +1,88 @@
+import os
+import re
+import time
+import unittest
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta, timezone
+
+from llm_cache import LLMResponseCache, CachedLLM
+from llm_interface import LLMInterface
+from project_manager_agent import ProjectManagerAgent
+
+class EchoLLM(LLMInterface):
+    def __init__(self):
+        self.model = "echo-1"
+        self.calls = 0
+
+    def generate_response(self, prompt: str, system=None) -> str:
+        self.calls += 1
+        return f"{system or ''}|{prompt}|{self.calls}" if prompt else ""
+
+class LLMCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LLMResponseCache('llm_cache_test.db', ttl_seconds=60, max_entries=2)
+        self.llm = EchoLLM()
+        self.cached = CachedLLM(self.llm, self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists('llm_cache_test.db' + suffix):
+                os.remove('llm_cache_test.db' + suffix)
+
+    def test_identical_requests_are_served_from_the_cache(self):
+        first = self.cached.generate_response("hello", system="be brief")
+        self.assertEqual(self.cached.generate_response("hello", system="be brief"), first)
+        self.assertNotEqual(self.cached.generate_response("hello", system="be long"), first)
+        self.assertEqual(self.cached.generate_json_response("hello"), self.cached.generate_json_response("hello"))
+        self.assertEqual(self.llm.calls, 3)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 3))
+
+        # Empty responses are errors and are retried
+        self.cached.generate_response("")
+        self.cached.generate_response("")
+        self.assertEqual(self.llm.calls, 5)
+
+    def test_refusals_are_not_cached(self):
+        cached = CachedLLM(self.llm, self.cache, rejection_phrases=["I'm sorry"])
+        self.llm.generate_response = lambda prompt, system=None: "I'm sorry, I can't help with that."
+        cached.generate_response("hello")
+        cached.generate_json_response("hello", stop_prefixes=["I'm sorry"])
+        self.assertEqual(self.cache.count(), 0)
+
+    def test_agent_prompts_show_local_times_and_the_current_time(self):
+        agent = ProjectManagerAgent('claude', MagicMock(), MagicMock(), workspace_name='test')
+        agent.read_thread({"channel": "agentflow", "thread_ts": "2024-08-12 22:43:44", "messages": [
+            {"text": "Can someone review this?", "user": "Alice", "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]})
+        prompt = agent._generate_prompt()
+
+        posted_at = datetime(2024, 8, 12, 22, 43, 44, tzinfo=timezone.utc).astimezone().strftime('%Y-%m-%d %H:%M')
+        self.assertIn(f"Human Alice ({posted_at}): Can someone review this?", prompt)
+        current_time = re.search(r"Current time: (\d{4}-\d{2}-\d{2} \d{2}:\d{2})", prompt).group(1)
+        self.assertLess(abs(datetime.strptime(current_time, '%Y-%m-%d %H:%M') - datetime.now()), timedelta(minutes=2))
+
+    def test_cache_survives_reopening(self):
+        first = self.cached.generate_response("hello")
+        self.cache.close()
+        self.cache = LLMResponseCache('llm_cache_test.db')
+        self.assertEqual(CachedLLM(EchoLLM(), self.cache).generate_response("hello"), first)
+
+    def test_ttl_and_lru_eviction(self):
+        self.cached.generate_response("a")
+        self.cached.generate_response("b")
+        self.cached.generate_response("a")
+        self.cached.generate_response("c")
+        self.assertEqual(self.cache.count(), 2)
+        self.cached.generate_response("a")
+        self.assertEqual(self.llm.calls, 3)
+        self.cached.generate_response("b")
+        self.assertEqual(self.llm.calls, 4)
+
+        self.cache.ttl_seconds = 0
+        time.sleep(0.01)
+        self.cached.generate_response("b")
+        self.assertEqual(self.llm.calls, 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+import openai
+
+from llm_registry import LLMRegistry, LLMRateLimiter, get_llm
+from project_manager_agent import ProjectManagerAgent
+from sarcastic_agent import SarcasticAgent
+
+class LLMRegistryTests(unittest.TestCase):
+
+    def test_llms_and_clients_are_shared(self):
+        registry = LLMRegistry()
+        opus = registry.get('claude')
+        haiku = registry.get('claude', 'claude-3-haiku-20240307')
+        self.assertIs(registry.get('claude'), opus)
+        self.assertIsNot(haiku, opus)
+        self.assertIs(haiku.client, opus.client)
+        self.assertIs(haiku.rate_limiter, opus.rate_limiter)
+        self.assertIsNot(registry.get('openai').rate_limiter, opus.rate_limiter)
+        with self.assertRaises(ValueError):
+            registry.get('llama')
+
+    def test_agents_share_the_process_wide_llm(self):
+        first = ProjectManagerAgent('openai', MagicMock(), MagicMock(), workspace_name='one')
+        second = SarcasticAgent('openai', MagicMock(), MagicMock(), workspace_name='two')
+        self.assertIs(first.llm, second.llm)
+        self.assertIs(first.llm, get_llm('openai'))
+        self.assertIsNone(openai.api_key)
+
+    def test_rate_limiter_enforces_the_token_budget(self):
+        limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=6000)
+        start = time.monotonic()
+        limiter.acquire(1000)
+        self.assertLess(time.monotonic() - start, 0.05)
+        limiter.acquire(50)
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from message_store import MessageStore
+
+class MessageStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = MessageStore(os.path.join(self.tmp_dir, 'messages_test.db'))
+        self.thread_ts = pd.Timestamp("2024-08-12 22:43:44.565398932")
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _messages(self):
+        t = self.thread_ts
+        return pd.DataFrame({
+            'type': ['message'] * 3,
+            'subtype': [np.nan] * 3,
+            'ts': [t, t + pd.Timedelta(seconds=1), t + pd.Timedelta(seconds=2)],
+            'user': ['U1', np.nan, 'U2'],
+            'thread_ts': [t, t, pd.NaT],
+            'text': ['Any updates?', 'Bot reply', 'Lunch?'],
+            'channel_id': ['C1', 'C1', 'C2'],
+            'username': ['U1', 'bot', 'U2'],
+            'text_clean': ['Any updates?', 'Bot reply', 'Lunch?'],
+            'text_len': [12, 9, 6],
+            'user_name': ['Alice', np.nan, 'Bob'],
+            'is_bot': [False, np.nan, False],
+            'channel_name': ['general', 'general', 'random'],
+        })
+
+    def test_append_returns_only_new_rows(self):
+        messages = self._messages()
+        self.assertEqual(len(self.store.append(messages)), 3)
+        self.assertEqual(len(self.store.append(messages)), 0)
+        self.assertEqual(self.store.count(), 3)
+
+    def test_round_trip_preserves_timestamps_and_missing_values(self):
+        messages = self._messages()
+        self.store.append(messages)
+        loaded = self.store.load_all().sort_values('ts').reset_index(drop=True)
+        self.assertTrue((loaded['ts'] == messages['ts']).all())
+        self.assertTrue(pd.isna(loaded.loc[1, 'user']))
+        self.assertEqual(loaded.loc[1, 'thread_ts'], self.thread_ts)
+        self.assertTrue(pd.isna(loaded.loc[2, 'thread_ts']))
+        self.assertEqual(loaded.loc[0, 'is_bot'], False)
+
+    def test_load_threads_reads_only_requested_threads(self):
+        self.store.append(self._messages())
+        thread = self.store.load_threads([self.thread_ts])
+        self.assertEqual(sorted(thread['text']), ['Any updates?', 'Bot reply'])
+
+    def test_high_water_marks_ignore_replies(self):
+        self.store.append(self._messages())
+        marks = self.store.channel_high_water_marks()
+        self.assertEqual(marks['C1'], self.thread_ts)
+        self.assertEqual(marks['C2'], self.thread_ts + pd.Timedelta(seconds=2))
+
+    def test_thread_states_are_upserted(self):
+        self.store.update_thread_states([('C1', '1723502624.565399', 1, '1723502625.565399')])
+        self.store.update_thread_states([('C1', '1723502624.565399', 2, '1723502690.000100')])
+        self.assertEqual(self.store.thread_states(), {('C1', '1723502624.565399'): (2, '1723502690.000100')})
+
+    def test_migrate_from_pickle(self):
+        pickle_path = os.path.join(self.tmp_dir, 'complete_conversations_test.pkl')
+        self._messages().to_pickle(pickle_path)
+        self.assertEqual(self.store.migrate_from_pickle(pickle_path), 3)
+        self.assertFalse(os.path.exists(pickle_path))
+        self.assertEqual(self.store.migrate_from_pickle(pickle_path), 0)
+
+if __name__ == '__main__':
+    unittest.main()
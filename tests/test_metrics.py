@@ -0,0 +1,158 @@
+import os
+import tempfile
+import time
+import unittest
+import urllib.request
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+import pandas as pd
+from slack_sdk.errors import SlackApiError
+
+from db import ActionDatabase
+from fake_llm import FakeLLM, reply_response
+from fake_slack import SyntheticWorkspace, FakeWebClient
+from metrics import (MetricsRegistry, PHASE_SECONDS, LOOP_DURATION, LAST_LOOP, SLACK_CALLS, ACTIONS_EXECUTED,
+                     ACTION_LATENESS, SCHEDULED_ACTIONS)
+from project_manager_agent import ProjectManagerAgent
+from runner import Runner
+from slack_interactor import SlackInteractor
+
+class MetricsRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render_counter_and_histogram(self):
+        counter = self.registry.counter('test_calls_total', 'Calls', ['method'])
+        counter.inc(method='a')
+        counter.inc(2, method='b')
+        histogram = self.registry.histogram('test_seconds', 'Latency', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = self.registry.render()
+        self.assertIn('# TYPE test_calls_total counter', text)
+        self.assertIn('test_calls_total{method="a"} 1', text)
+        self.assertIn('test_calls_total{method="b"} 2', text)
+        self.assertIn('# TYPE test_seconds histogram', text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('test_seconds_sum 5.55', text)
+        self.assertIn('test_seconds_count 3', text)
+
+    def test_labels_must_match(self):
+        counter = self.registry.counter('test_labels_total', 'Labelled', ['method'])
+        with self.assertRaises(ValueError):
+            counter.inc(outcome='ok')
+        with self.assertRaises(ValueError):
+            self.registry.gauge('test_labels_total', 'Labelled', ['method'])
+
+    def test_write_textfile(self):
+        self.registry.gauge('test_last_timestamp_seconds', 'Last').set(1700000000)
+        path = os.path.join(tempfile.mkdtemp(), 'agentflow.prom')
+        self.registry.write(path)
+        with open(path) as f:
+            self.assertIn('test_last_timestamp_seconds 1700000000', f.read())
+        self.assertFalse(os.path.exists(f'{path}.tmp'))
+
+    def test_serve_over_http(self):
+        self.registry.counter('test_served_total', 'Served').inc()
+        server = self.registry.serve(0, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertIn('test_served_total 1', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class RunnerMetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workspace = SyntheticWorkspace(messages=500, channels=2, users=5, end_time=time.time() - 600, seed=3)
+        self.client = FakeWebClient(self.workspace)
+        self.slack_interactor = SlackInteractor({
+            'name': 'metrics',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_metrics.db'),
+            'rate_limits': {method: 1e9 for method in FakeWebClient.tier_limits()},
+        })
+        self.slack_interactor.user_client = self.client
+        self.slack_interactor.bot_client = self.client
+        self.action_db = ActionDatabase('metrics_test')
+        self.agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='metrics')
+        self.agent.llm = FakeLLM(reply_response("On it!"))
+        self.runner = Runner.__new__(Runner)
+        self.runner.slack_interactors = {'metrics': self.slack_interactor}
+        self.runner.agents = {'metrics': [self.agent]}
+        self.runner.action_dbs = {'metrics': self.action_db}
+        self.runner.decision_pool = None
+        self.runner.metrics_textfile = os.path.join(self.tmp_dir, 'agentflow.prom')
+
+    def tearDown(self):
+        self.slack_interactor.message_store.close()
+        self.action_db.close()
+        for path in (self.action_db.file_path, self.action_db.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_slack_calls_counted_by_outcome(self):
+        ok_before = SLACK_CALLS.value(workspace='metrics', method='users.list', outcome='ok')
+        error_before = SLACK_CALLS.value(workspace='metrics', method='conversations.replies', outcome='error')
+        self.slack_interactor.exponential_backoff(self.client.users_list)
+        with self.assertRaises(SlackApiError):
+            self.slack_interactor.exponential_backoff(self.client.conversations_replies,
+                                                      channel=self.workspace.channel_ids[0], ts='1.000001')
+        self.assertEqual(SLACK_CALLS.value(workspace='metrics', method='users.list', outcome='ok'), ok_before + 1)
+        self.assertEqual(SLACK_CALLS.value(workspace='metrics', method='conversations.replies', outcome='error'), error_before + 1)
+
+    def test_connection_errors_counted_as_errors(self):
+        def chat_postMessage(**kwargs):
+            raise ConnectionError("Connection reset by peer")
+
+        error_before = SLACK_CALLS.value(workspace='metrics', method='chat.postMessage', outcome='error')
+        with self.assertRaises(ConnectionError):
+            self.slack_interactor.exponential_backoff(chat_postMessage, channel='C1', text='hi')
+        self.assertEqual(SLACK_CALLS.value(workspace='metrics', method='chat.postMessage', outcome='error'), error_before + 1)
+
+    def test_loop_records_phases_and_exports(self):
+        loops_before = LOOP_DURATION.count(workspace='metrics')
+        self.runner.run_workspace_loop('metrics')
+        self.workspace.advance(300)
+        self.runner.run_workspace_loop('metrics')
+
+        self.assertEqual(LOOP_DURATION.count(workspace='metrics'), loops_before + 2)
+        self.assertAlmostEqual(LAST_LOOP.value(workspace='metrics'), time.time(), delta=60)
+        for phase in ('fetch', 'organize', 'decide', 'due_actions'):
+            self.assertGreater(PHASE_SECONDS.value(workspace='metrics', phase=phase), 0, phase)
+        with open(self.runner.metrics_textfile) as f:
+            text = f.read()
+        self.assertIn('agentflow_loop_duration_seconds_count{workspace="metrics"}', text)
+        self.assertIn('agentflow_llm_requests_total{provider="fake"', text)
+
+    def test_due_action_lateness(self):
+        slack_interactor = MagicMock(spec=SlackInteractor)
+        self.agent.slack_interactor = slack_interactor
+        thread_id = "2024-08-12 22:43:44.565398932"
+        slack_interactor.fetch_thread.return_value = {
+            "channel": "agentflow",
+            "thread_ts": thread_id,
+            "messages": [{"text": "Tell me a joke later", "user": "U123456", "ts": thread_id, "minutes_ago": 5}],
+        }
+        due_time = datetime.now() - timedelta(seconds=90)
+        self.action_db.add_action(thread_id, "agentflow", "Tell a joke", pd.Timestamp(due_time), self.agent.get_name())
+        lateness_before = ACTION_LATENESS.sum(workspace='metrics')
+        posted_before = ACTIONS_EXECUTED.value(workspace='metrics', outcome='posted')
+
+        self.runner._execute_due_actions([self.agent])
+
+        self.assertGreaterEqual(ACTION_LATENESS.sum(workspace='metrics') - lateness_before, 90)
+        self.assertEqual(ACTIONS_EXECUTED.value(workspace='metrics', outcome='posted'), posted_before + 1)
+        self.assertEqual(SCHEDULED_ACTIONS.value(workspace='metrics'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
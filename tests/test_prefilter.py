@@ -0,0 +1,66 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from llm_interface import LLMInterface
+from prefilter import KeywordPrefilter, LLMPrefilter
+from paul_graham_agent import PaulGrahamAgent
+from project_manager_agent import ProjectManagerAgent
+
+class CountingLLM(LLMInterface):
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def generate_response(self, prompt: str, system=None) -> str:
+        self.calls += 1
+        return self.response
+
+def make_thread(text, is_bot=False):
+    return {
+        "channel": "agentflow",
+        "thread_ts": "2024-08-12 22:43:44",
+        "messages": [{"text": text, "user": "Alice", "is_bot": is_bot, "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]
+    }
+
+class PrefilterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = ProjectManagerAgent('claude', MagicMock(), MagicMock(), workspace_name='test')
+        self.agent.llm = CountingLLM(json.dumps({
+            "immediate_action": {"needed": True, "description": "Reply", "response": "On it", "execution_time": "Immediately"},
+            "delayed_action": {"needed": False}
+        }))
+
+    def test_keyword_scores(self):
+        prefilter = KeywordPrefilter()
+        self.assertEqual(prefilter.score(self.agent, make_thread("lol nice")), 0.0)
+        self.assertEqual(prefilter.score(self.agent, make_thread("Hey PM Agent")), 1.0)
+        self.assertEqual(prefilter.score(self.agent, make_thread("Can someone send a status update?")), 0.75)
+        self.assertEqual(prefilter.score(self.agent, make_thread("Can someone send a status update?", is_bot=True)), 0.375)
+
+        paul = PaulGrahamAgent('claude', MagicMock(), MagicMock(), workspace_name='test')
+        self.assertEqual(prefilter.score(paul, make_thread("thinking about my startup")), 0.25)
+
+    def test_decisions_below_threshold_skip_the_main_model(self):
+        self.agent.set_prefilter(KeywordPrefilter(), 0.5)
+        for text in ["lol nice", "great lunch today", "Can someone send a status update?"]:
+            self.agent.read_thread(make_thread(text))
+            action_needed, _, _ = self.agent.decide_action()
+            self.assertEqual(action_needed, text.endswith('?'))
+
+        self.assertEqual(self.agent.llm.calls, 1)
+        self.assertEqual(self.agent.prefilter_stats.as_dict(), {'hits': 1, 'misses': 0, 'skips': 2})
+
+    def test_llm_prefilter_parses_the_score_and_fails_open(self):
+        self.assertEqual(LLMPrefilter(CountingLLM("0.15")).score(self.agent, make_thread("lol")), 0.15)
+        self.assertEqual(LLMPrefilter(CountingLLM("Score: 1")).score(self.agent, make_thread("lol")), 1.0)
+        self.assertEqual(LLMPrefilter(CountingLLM("")).score(self.agent, make_thread("lol")), 1.0)
+
+    def test_llm_prefilter_passes_ambiguous_scores_through(self):
+        self.assertEqual(LLMPrefilter(CountingLLM(" 0.2\n")).score(self.agent, make_thread("lol")), 0.2)
+        self.assertEqual(LLMPrefilter(CountingLLM("On a scale of 0 to 1: 0.8")).score(self.agent, make_thread("lol")), 1.0)
+        self.assertEqual(LLMPrefilter(CountingLLM("Between 0.1 and 0.3")).score(self.agent, make_thread("lol")), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
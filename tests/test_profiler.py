@@ -0,0 +1,117 @@
+import os
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+
+from benchmark import seed_store, attach_fakes
+from db import ActionDatabase
+from decision_pool import DecisionPool
+from fake_llm import FakeLLM, reply_response
+from fake_slack import SyntheticWorkspace, FakeWebClient
+from profiler import LoopProfiler, StackSampler, phase
+from project_manager_agent import ProjectManagerAgent
+from runner import Runner, parse_args
+from slack_interactor import SlackInteractor
+
+def wait_in_decide(started: threading.Event, release: threading.Event):
+    with phase('decide'):
+        started.set()
+        release.wait(5)
+
+class StackSamplerTests(unittest.TestCase):
+
+    def test_samples_worker_threads_inside_phases(self):
+        started, release = threading.Event(), threading.Event()
+        worker = threading.Thread(target=wait_in_decide, args=(started, release))
+        worker.start()
+        started.wait(5)
+        sampler = StackSampler(threading.get_ident())
+        sampler.sample()
+        release.set()
+        worker.join()
+
+        stacks = list(sampler.stacks)
+        self.assertTrue(any(stack.startswith('phase:decide;') and 'test_profiler:wait_in_decide' in stack for stack in stacks))
+        self.assertTrue(any(stack.startswith('phase:other;') and 'test_profiler:test_samples_worker_threads_inside_phases' in stack
+                            for stack in stacks))
+
+class LoopProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workspace = SyntheticWorkspace(messages=2000, channels=3, users=10, end_time=time.time() - 900, seed=4)
+        self.client = FakeWebClient(self.workspace)
+        self.slack_interactor = SlackInteractor({
+            'name': 'profile',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_profile.db'),
+            'rate_limits': {method: 1e9 for method in FakeWebClient.tier_limits()},
+        })
+        self.action_db = ActionDatabase('profile_test')
+        agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='profile')
+        self.runner = Runner.__new__(Runner)
+        self.runner.slack_interactors = {'profile': self.slack_interactor}
+        self.runner.agents = {'profile': [agent]}
+        self.runner.action_dbs = {'profile': self.action_db}
+        self.runner.decision_pool = None
+        attach_fakes(self.runner, self.client, FakeLLM(reply_response("On it!"), latency=0.01))
+        seed_store(self.slack_interactor, self.workspace)
+
+    def tearDown(self):
+        self.slack_interactor.message_store.close()
+        self.action_db.close()
+        for path in (self.action_db.file_path, self.action_db.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_profiles_one_loop_in_every_k(self):
+        output_dir = os.path.join(self.tmp_dir, 'profiles')
+        self.runner.profiler = LoopProfiler(output_dir, 'cprofile', every=2, loops=3, interval=0.001)
+        for _ in range(3):
+            self.workspace.advance(300)
+            self.runner.run_one_loop()
+
+        self.assertTrue(self.runner.profiler.finished)
+        self.assertEqual(sorted(os.listdir(output_dir)),
+                         ['loop-00000.folded', 'loop-00000.pstats', 'loop-00002.folded', 'loop-00002.pstats'])
+        stats = pstats.Stats(os.path.join(output_dir, 'loop-00002.pstats'))
+        functions = {name for _, _, name in stats.stats}
+        self.assertIn('fetch_new_user_messages', functions)
+        self.assertIn('decide_action', functions)
+        with open(os.path.join(output_dir, 'loop-00002.folded')) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+        phases = {line.split(';', 1)[0] for line in lines}
+        self.assertIn('phase:fetch', phases)
+        self.assertIn('phase:decide', phases)
+
+    def test_pooled_decisions_are_not_counted_twice(self):
+        self.runner.decision_pool = DecisionPool(4, {'claude': 4})
+        output_dir = os.path.join(self.tmp_dir, 'pooled')
+        self.runner.profiler = LoopProfiler(output_dir, 'sample', loops=1, interval=0.001)
+        try:
+            self.workspace.advance(300)
+            self.runner.run_one_loop()
+        finally:
+            self.runner.decision_pool.shutdown()
+
+        self.assertIn('decide', self.runner.profiler.phase_seconds)
+        self.assertIn('decide_wait', self.runner.profiler.phase_seconds)
+        with open(os.path.join(output_dir, 'loop-00000.folded')) as f:
+            stacks = [line.rsplit(' ', 1)[0] for line in f.read().splitlines()]
+        # Only pool workers are in the decide phase; the loop thread waiting on them is in decide_wait
+        self.assertTrue(all('decision_pool:_decide' in stack for stack in stacks if stack.startswith('phase:decide;')))
+        self.assertTrue(any(stack.startswith('phase:decide_wait;') for stack in stacks))
+
+    def test_profile_arguments(self):
+        args = parse_args(['--profile', '--profile-every', '10'])
+        self.assertEqual(args.profile, 'cprofile')
+        self.assertEqual(args.profile_every, 10)
+        self.assertEqual(args.profile_loops, 0)
+        self.assertIsNone(parse_args([]).profile)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+import pandas as pd
+
+from recurrence import parse_recurrence, next_occurrence
+
+class RecurrenceTests(unittest.TestCase):
+
+    def setUp(self):
+        # A Monday
+        self.now = pd.Timestamp("2024-08-12 12:00:00")
+
+    def test_parse_recurrence(self):
+        self.assertEqual(parse_recurrence("daily at 9am"), {'freq': 'daily', 'hour': 9, 'minute': 0})
+        self.assertEqual(parse_recurrence("Daily at 5:30pm"), {'freq': 'daily', 'hour': 17, 'minute': 30})
+        self.assertEqual(parse_recurrence("weekdays at 9am"), {'freq': 'weekdays', 'hour': 9, 'minute': 0})
+        self.assertEqual(parse_recurrence("every friday at 4pm"), {'freq': 'weekly', 'weekday': 4, 'hour': 16, 'minute': 0})
+        self.assertEqual(parse_recurrence("every 2 hours"), {'freq': 'interval', 'seconds': 7200})
+        self.assertIsNone(parse_recurrence("9am tomorrow"))
+        self.assertIsNone(parse_recurrence("2 hours"))
+
+    def test_next_occurrence(self):
+        self.assertEqual(next_occurrence(parse_recurrence("daily at 9am"), self.now), pd.Timestamp("2024-08-13 09:00:00"))
+        self.assertEqual(next_occurrence(parse_recurrence("daily at 5pm"), self.now), pd.Timestamp("2024-08-12 17:00:00"))
+        self.assertEqual(next_occurrence(parse_recurrence("every friday at 4pm"), self.now), pd.Timestamp("2024-08-16 16:00:00"))
+        self.assertEqual(next_occurrence(parse_recurrence("every monday at 9am"), self.now), pd.Timestamp("2024-08-19 09:00:00"))
+        self.assertEqual(next_occurrence(parse_recurrence("weekdays at 9am"), pd.Timestamp("2024-08-16 12:00:00")), pd.Timestamp("2024-08-19 09:00:00"))
+        self.assertEqual(next_occurrence(parse_recurrence("every 30 minutes"), self.now), pd.Timestamp("2024-08-12 12:30:00"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+import pandas as pd
+
+from db import ActionDatabase
+from decision_pool import DecisionPool, AsyncDecisionPool
+from fake_llm import FakeLLM, reply_response
+from llm_interface import LLMInterface
+from project_manager_agent import ProjectManagerAgent
+from runner import Runner
+
+class SlowLLM(LLMInterface):
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def generate_response(self, prompt: str, system=None) -> str:
+        time.sleep(self.delay)
+        return json.dumps({
+            "immediate_action": {"needed": True, "description": "Reply", "response": "On it", "execution_time": "Immediately"},
+            "delayed_action": {"needed": False}
+        })
+
+def make_thread(thread_ts):
+    return {
+        "channel": "agentflow",
+        "thread_ts": thread_ts,
+        "messages": [{"text": "Can someone pick this up?", "user": "Alice", "ts": thread_ts, "minutes_ago": 5}]
+    }
+
+class ProcessThreadsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.action_db = ActionDatabase('runner_test')
+        self.slack_interactor = MagicMock()
+        self.agents = []
+        for i in range(4):
+            agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='test')
+            agent.name = f"Agent {i}"
+            agent.llm = SlowLLM(0.2)
+            self.agents.append(agent)
+        self.runner = Runner.__new__(Runner)
+        self.runner.decision_pool = None
+
+    def _posters(self):
+        return [(call.args[0]['thread_ts'], call.kwargs['username']) for call in self.slack_interactor.post_thread_reply.call_args_list]
+
+    def test_concurrent_decisions_keep_posting_order(self):
+        self.runner.decision_pool = DecisionPool(8, {'claude': 8})
+        threads = [make_thread("2024-08-12 22:43:44"), make_thread("2024-08-12 23:00:00")]
+        start = time.monotonic()
+        results = self.runner._process_threads(self.agents, threads)
+        elapsed = time.monotonic() - start
+        self.runner.decision_pool.shutdown()
+
+        self.assertLess(elapsed, 0.2 * 8 / 2)
+        posters = self._posters()
+        self.assertEqual(len(posters), 8)
+        for result, thread in zip(results, threads):
+            order = [executed.split(':')[0] for executed in result['executed_actions']]
+            self.assertEqual([name for ts, name in posters if ts == thread['thread_ts']], order)
+        self.assertEqual([ts for ts, _ in posters], [threads[0]['thread_ts']] * 4 + [threads[1]['thread_ts']] * 4)
+
+    def test_async_pool_keeps_posting_order(self):
+        self.runner.decision_pool = AsyncDecisionPool(8, {'claude': 8})
+        for agent in self.agents:
+            agent.llm = FakeLLM(reply_response("On it"), latency=0.2)
+        threads = [make_thread("2024-08-12 22:43:44"), make_thread("2024-08-12 23:00:00")]
+        start = time.monotonic()
+        self.runner._process_threads(self.agents, threads)
+        elapsed = time.monotonic() - start
+        self.runner.decision_pool.shutdown()
+
+        self.assertLess(elapsed, 0.2 * 8 / 2)
+        self.assertEqual([ts for ts, _ in self._posters()], [threads[0]['thread_ts']] * 4 + [threads[1]['thread_ts']] * 4)
+
+    def test_sequential_mode_without_pool(self):
+        results = self.runner._process_threads(self.agents[:1], [make_thread("2024-08-12 22:43:44")])
+        self.assertEqual(len(results[0]['executed_actions']), 1)
+
+class ExecuteDueActionsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.action_db = ActionDatabase('runner_due_test')
+        self.slack_interactor = MagicMock()
+        self.slack_interactor.fetch_thread.side_effect = lambda thread_ts, channel=None: make_thread(thread_ts)
+        self.agents = []
+        for i in range(3):
+            agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='test')
+            agent.name = f"Agent {i}"
+            agent.llm = SlowLLM(0.2)
+            self.agents.append(agent)
+        self.runner = Runner.__new__(Runner)
+        self.runner.decision_pool = DecisionPool(8, {'claude': 8})
+        due = pd.Timestamp.now() - pd.Timedelta(minutes=1)
+        for agent in self.agents:
+            self.action_db.add_action("t1", "agentflow", f"Check in from {agent.name}", due, agent.name)
+        self.action_db.add_action("t2", "agentflow", "Standup", due, "Agent 0", recurrence={'freq': 'interval', 'seconds': 3600})
+
+    def tearDown(self):
+        self.runner.decision_pool.shutdown()
+        self.action_db.close()
+
+    def test_due_actions_fetch_each_thread_once_and_run_concurrently(self):
+        start = time.monotonic()
+        self.runner._execute_due_actions(self.agents)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(sorted(call.args[0] for call in self.slack_interactor.fetch_thread.call_args_list), ["t1", "t2"])
+        self.assertEqual(self.slack_interactor.post_thread_reply.call_count, 4)
+        self.assertLess(elapsed, 0.2 * 4 / 2)
+        self.assertEqual(self.action_db.get_actions("t1"), [])
+        self.assertEqual([action['description'] for action in self.action_db.get_actions("t2")], ["Standup"])
+        self.assertEqual(self.action_db.get_due_actions(pd.Timestamp.now()), [])
+
+    def test_actions_posted_before_a_failure_are_completed(self):
+        self.slack_interactor.post_thread_reply.side_effect = [None, RuntimeError("Slack is down")]
+        first = self.action_db.get_due_actions(pd.Timestamp.now())[0]
+
+        with self.assertRaises(RuntimeError):
+            self.runner._execute_due_actions(self.agents)
+
+        remaining = [action['description'] for action in self.action_db.get_actions(first[0])]
+        self.assertNotIn(first[1]['description'], remaining)
+        self.assertEqual(len(self.action_db.get_due_actions(pd.Timestamp.now())), 3)
+
+class WaitForNextLoopTests(unittest.TestCase):
+
+    def test_wakes_up_for_due_actions_before_next_loop(self):
+        action_db = ActionDatabase('runner_wait_test')
+        action_db.add_action("t1", "agentflow", "Check in", pd.Timestamp.now() + pd.Timedelta(seconds=0.3), "PM Agent")
+        runner = Runner.__new__(Runner)
+        runner.action_dbs = {'test': action_db}
+        runs = []
+        runner.run_due_actions = lambda names: runs.append(time.monotonic())
+
+        start = time.monotonic()
+        runner._wait_for_next_loop(['test'], 1.0, threading.Event())
+        self.assertEqual(len(runs), 1)
+        self.assertLess(runs[0] - start, 0.6)
+        self.assertGreaterEqual(time.monotonic() - start, 0.95)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,28 +1,34 @@
+import os
 import unittest
 from unittest.mock import patch, MagicMock
 import json
 from datetime import datetime, timedelta
 import pandas as pd
 
-from slack import SlackInteractor
-from claude_llm import ClaudeLLM
+from slack_interactor import SlackInteractor
+from fake_llm import FakeLLM, reply_response
 from project_manager_agent import ProjectManagerAgent
 from db import ActionDatabase
-from runner import process_threads, execute_due_actions
+from runner import Runner
 
 class SlackBotSanityTests(unittest.TestCase):
 
     def setUp(self):
         self.slack_interactor = MagicMock(spec=SlackInteractor)
-        self.llm = MagicMock(spec=ClaudeLLM)
-        self.action_db = ActionDatabase('test_actions.json')
-        self.agent = ProjectManagerAgent(self.llm, self.action_db, self.slack_interactor)
+        self.llm = FakeLLM()
+        self.action_db = ActionDatabase('sanity_test')
+        self.agent = ProjectManagerAgent('claude', self.action_db, self.slack_interactor, workspace_name='test')
+        self.agent.llm = self.llm
+        self.runner = Runner.__new__(Runner)
+        self.runner.decision_pool = None
+        self.next_year = datetime.now().year + 1
 
     def tearDown(self):
         # Clean up the test database
-        import os
-        if os.path.exists('test_actions.json'):
-            os.remove('test_actions.json')
+        self.action_db.close()
+        for path in (self.action_db.file_path, self.action_db.log_path):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_action_scheduling(self):
         # Simulate scheduling an action
@@ -40,11 +46,11 @@ class SlackBotSanityTests(unittest.TestCase):
             ]
         }
         
-        self.llm.generate_response.return_value = json.dumps({
+        self.llm.response = json.dumps({
             "delayed_action": {
                 "needed": True,
                 "description": "Delayed task: Tell a joke to the human",
-                "execution_time": "2024-08-17T09:00:00"
+                "execution_time": f"{self.next_year}-08-17T09:00:00"
             }
         })
 
@@ -57,13 +63,13 @@ class SlackBotSanityTests(unittest.TestCase):
         self.assertEqual(len(actions), 1)
         self.assertEqual(actions[0]['description'], "Delayed task: Tell a joke to the human")
         self.assertEqual(actions[0]['channel'], "agentflow")
-        self.assertEqual(pd.Timestamp(actions[0]['execution_time']), pd.Timestamp("2024-08-17T09:00:00"))
+        self.assertEqual(pd.Timestamp(actions[0]['execution_time']), pd.Timestamp(f"{self.next_year}-08-17T09:00:00"))
 
     def test_due_action_execution(self):
         # Schedule an action that's due
         thread_id = "2024-08-12 22:43:44.565398932"
         due_time = datetime.now() + timedelta(seconds=1)
-        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Tell a joke to the human", pd.Timestamp(due_time))
+        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Tell a joke to the human", pd.Timestamp(due_time), self.agent.get_name())
 
         # Wait for the action to become due
         import time
@@ -73,11 +79,13 @@ class SlackBotSanityTests(unittest.TestCase):
         self.slack_interactor.fetch_thread.return_value = {
             "channel": "agentflow",
             "thread_ts": thread_id,
-            "messages": [{"text": "Previous message"}]
+            "messages": [{"text": "Previous message", "user": "U123456", "ts": thread_id, "minutes_ago": 5}]
         }
 
+        self.llm.response = reply_response("Why did the scheduler cross the road?")
+
         # Simulate executing the due action
-        execute_due_actions(self.agent)
+        self.runner._execute_due_actions([self.agent])
 
         # Verify the action was removed after execution
         actions = self.action_db.get_actions(thread_id)
@@ -100,16 +108,16 @@ class SlackBotSanityTests(unittest.TestCase):
         }
 
         # Mock the LLM response to schedule a delayed action
-        self.llm.generate_response.return_value = json.dumps({
+        self.llm.response = json.dumps({
             "delayed_action": {
                 "needed": True,
                 "description": "Delayed task: Tell a joke to the human",
-                "execution_time": "2024-08-13T09:00:00"
+                "execution_time": f"{self.next_year}-08-13T09:00:00"
             }
         })
 
         # Process the thread
-        results = process_threads(self.agent, [thread])
+        results = self.runner._process_threads([self.agent], [thread])
 
         # Verify that a delayed action was scheduled
         self.assertEqual(len(results), 1)
@@ -120,10 +128,10 @@ class SlackBotSanityTests(unittest.TestCase):
         thread_id = "2024-08-12 22:43:44.565398932"
         
         # Schedule first action
-        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Tell a joke to the human", pd.Timestamp("2024-08-17T09:00:00"))
+        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Tell a joke to the human", pd.Timestamp("2024-08-17T09:00:00"), self.agent.get_name())
         
         # Try to schedule a second action for the same thread
-        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Remind about the meeting", pd.Timestamp("2024-08-18T10:00:00"))
+        self.action_db.add_action(thread_id, "agentflow", "Delayed task: Remind about the meeting", pd.Timestamp("2024-08-18T10:00:00"), self.agent.get_name())
 
         # Verify that only one action is scheduled
         actions = self.action_db.get_actions(thread_id)
@@ -145,7 +153,7 @@ class SlackBotSanityTests(unittest.TestCase):
             ]
         }
         
-        self.llm.generate_response.return_value = json.dumps({
+        self.llm.response = json.dumps({
             "delayed_action": {
                 "needed": True,
                 "description": "Remind about lunch decision",
@@ -169,6 +177,77 @@ class SlackBotSanityTests(unittest.TestCase):
         self.action_db.save_actions()
         loaded_actions = self.action_db.load_actions()
         self.assertIn(thread_id, loaded_actions)
-        
+
+    def test_delayed_action_with_utc_timestamp(self):
+        thread_id = "2024-08-12 22:43:44.565398932"
+        self.action_db.add_action("other", "agentflow", "Earlier task", pd.Timestamp("2024-08-17T08:00:00"), self.agent.get_name())
+        thread = {
+            "channel": "agentflow",
+            "thread_ts": thread_id,
+            "messages": [{"text": "Remind us on Sunday morning", "user": "U123456", "ts": thread_id, "minutes_ago": 5}]
+        }
+        self.llm.response = json.dumps({
+            "delayed_action": {
+                "needed": True,
+                "description": "Sunday reminder",
+                "execution_time": f"{self.next_year}-10-18T09:00:00Z"
+            }
+        })
+
+        self.agent.read_thread(thread)
+        _, _, delayed_action = self.agent.decide_action()
+        self.agent.schedule_delayed_action(delayed_action)
+
+        expected = pd.Timestamp(datetime.fromisoformat(f"{self.next_year}-10-18T09:00:00+00:00").astimezone()).tz_localize(None)
+        execution_time = pd.Timestamp(self.action_db.get_actions(thread_id)[0]['execution_time'])
+        self.assertIsNone(execution_time.tzinfo)
+        self.assertEqual(execution_time, expected)
+        self.assertEqual([thread for _, thread, _ in self.action_db.schedule], ["other", thread_id])
+
+    def test_bare_clock_times_are_scheduled_for_their_next_occurrence(self):
+        self.agent.read_thread({"channel": "agentflow", "thread_ts": "t1", "messages": [
+            {"text": "Remind me at 9am", "user": "U123456", "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]})
+        now = pd.Timestamp.now()
+        for execution_time, hour, minute in (("9am", 9, 0), ("10:30", 10, 30)):
+            self.agent.schedule_delayed_action({'description': "Reminder", 'execution_time': execution_time})
+            scheduled = pd.Timestamp(self.action_db.get_actions("t1")[0]['execution_time'])
+            self.assertEqual((scheduled.hour, scheduled.minute), (hour, minute), execution_time)
+            self.assertGreater(scheduled, now, execution_time)
+            self.assertLessEqual(scheduled - now, pd.Timedelta(days=1), execution_time)
+        self.assertEqual(self.action_db.get_due_actions(pd.Timestamp.now()), [])
+
+    def test_recurring_action_can_be_cancelled(self):
+        thread_id = "2024-08-12 22:43:44.565398932"
+        thread = {
+            "channel": "agentflow",
+            "thread_ts": thread_id,
+            "messages": [{"text": "Please remind us every weekday at 9am", "user": "U123456", "ts": thread_id, "minutes_ago": 5}]
+        }
+        self.llm.response = json.dumps({
+            "delayed_action": {"needed": True, "description": "Standup reminder", "execution_time": "weekdays at 9am"}
+        })
+        self.runner._process_threads([self.agent], [thread])
+        self.assertEqual(len(self.action_db.get_actions(thread_id)), 1)
+
+        thread["messages"].append({"text": "You can stop the standup reminder now", "user": "U123456", "ts": thread_id, "minutes_ago": 1})
+        self.llm.response = json.dumps({
+            "delayed_action": {"needed": False, "cancel": True, "description": "Stop the standup reminder"}
+        })
+        self.agent.read_thread(thread)
+        self.assertIn("Your scheduled task in this thread: Standup reminder", self.agent._generate_prompt())
+        results = self.runner._process_threads([self.agent], [thread])
+
+        self.assertEqual(self.action_db.get_actions(thread_id), [])
+        self.assertEqual(self.action_db.schedule, [])
+        self.assertIn("Cancelled: Stop the standup reminder", results[0]['new_actions'][0])
+
+    def test_past_or_partial_execution_times_are_rejected(self):
+        self.agent.read_thread({"channel": "agentflow", "thread_ts": "t1", "messages": [
+            {"text": "Remind me", "user": "U123456", "ts": "2024-08-12 22:43:44", "minutes_ago": 5}]})
+        for execution_time in ("2024-08-17T09:00:00", "9", "25:00", "soon"):
+            with self.assertRaises(ValueError, msg=execution_time):
+                self.agent.schedule_delayed_action({'description': "Reminder", 'execution_time': execution_time})
+        self.assertEqual(self.action_db.get_actions("t1"), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
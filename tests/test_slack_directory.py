@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+import pandas as pd
+from slack_sdk.errors import SlackApiError
+
+from slack_directory import SlackDirectory
+
+class SlackDirectoryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.members = [{'id': 'U1', 'name': 'alice', 'real_name': 'alice smith'}]
+        self.channels = [{'id': 'C1', 'name': 'general'}]
+        self.user_calls = 0
+        self.channel_calls = 0
+
+    def fetch_users(self):
+        self.user_calls += 1
+        return list(self.members)
+
+    def fetch_channels(self):
+        self.channel_calls += 1
+        return list(self.channels)
+
+    def test_lookups_are_cached_within_ttl(self):
+        directory = SlackDirectory(self.fetch_users, self.fetch_channels)
+        self.assertEqual(directory.user('U1')['user_name'], 'Alice smith')
+        self.assertEqual(directory.user_names(), {'U1': 'Alice smith'})
+        self.assertEqual(directory.channel_id('general'), 'C1')
+        self.assertEqual(directory.channel_name('C1'), 'general')
+        self.assertEqual((self.user_calls, self.channel_calls), (1, 1))
+
+    def test_expired_entries_are_refreshed(self):
+        directory = SlackDirectory(self.fetch_users, self.fetch_channels, user_ttl=pd.Timedelta(0))
+        directory.users()
+        directory.users()
+        self.assertEqual(self.user_calls, 2)
+
+    def test_miss_refreshes_once_per_interval(self):
+        directory = SlackDirectory(self.fetch_users, self.fetch_channels, miss_refresh_interval=pd.Timedelta(0))
+        directory.channels()
+        self.channels.append({'id': 'C2', 'name': 'random'})
+        self.assertEqual(directory.channel_id('random'), 'C2')
+        self.assertEqual(self.channel_calls, 2)
+
+        directory.miss_refresh_interval = pd.Timedelta(minutes=1)
+        self.assertIsNone(directory.user('U404'))
+        self.assertIsNone(directory.user('U404'))
+        self.assertEqual(self.user_calls, 1)
+
+    def test_failed_refreshes_are_retried_once_per_interval(self):
+        response = MagicMock(data={'ok': False, 'error': 'ratelimited'})
+        failures = []
+
+        def fetch_users():
+            failures.append(1)
+            raise SlackApiError("ratelimited", response)
+
+        directory = SlackDirectory(fetch_users, self.fetch_channels)
+        for _ in range(3):
+            self.assertIsNone(directory.user('U1'))
+            self.assertTrue(directory.users().empty)
+        self.assertEqual(len(failures), 1)
+
+        directory.users_failed_at -= pd.Timedelta(minutes=2)
+        self.assertIsNone(directory.user('U1'))
+        self.assertEqual(len(failures), 2)
+
+if __name__ == '__main__':
+    unittest.main()
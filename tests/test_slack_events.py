@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+import pandas as pd
+
+from db import ActionDatabase
+from fake_llm import FakeLLM, reply_response
+from project_manager_agent import ProjectManagerAgent
+from runner import Runner
+from slack_directory import SlackDirectory
+from slack_events import FakeEventSource
+from slack_interactor import SlackInteractor
+
+class EventModeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.interactor = SlackInteractor({
+            'name': 'test',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_test.db'),
+        })
+        members = [{'id': 'U1', 'name': 'alice', 'real_name': 'alice'}]
+        self.interactor.directory = SlackDirectory(lambda: members, lambda: [{'id': 'C1', 'name': 'general'}])
+        self.interactor.post_thread_reply = MagicMock()
+        self.interactor.is_first_run = False
+
+        self.action_db = ActionDatabase('events_test')
+        self.agent = ProjectManagerAgent('claude', self.action_db, self.interactor, workspace_name='test')
+        self.agent.llm = FakeLLM(reply_response("On it"))
+
+        self.runner = Runner.__new__(Runner)
+        self.runner.slack_interactors = {'test': self.interactor}
+        self.runner.agents = {'test': [self.agent]}
+        self.runner.action_dbs = {'test': self.action_db}
+        self.runner.decision_pool = None
+        self.runner.sleep_period = 300
+        self.runner.reconcile_period = 1800
+        self.polls = []
+        self.runner.run_workspace_loop = lambda workspace_name: self.polls.append(workspace_name)
+
+        self.source = FakeEventSource()
+        self.stop_event = threading.Event()
+        self.loop = threading.Thread(target=self.runner.run_event_loop, args=({'test': self.source}, self.stop_event))
+        self.loop.start()
+
+    def tearDown(self):
+        self.stop_event.set()
+        self.loop.join()
+        self.action_db.close()
+        self.interactor.message_store.close()
+
+    def _wait_for_posts(self, count, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while self.interactor.post_thread_reply.call_count < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.interactor.post_thread_reply.call_count
+
+    def test_message_events_are_answered_without_waiting_for_a_poll(self):
+        parent_ts = f"{time.time() - 60:.6f}"
+        start = time.monotonic()
+        self.source.emit_message('C1', 'U1', 'Kicking off the launch plan', parent_ts)
+        self.source.emit_message('C1', 'U1', 'PM Agent can you track this?', f"{time.time():.6f}", thread_ts=parent_ts)
+        self.assertEqual(self._wait_for_posts(2), 2)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        thread = self.interactor.post_thread_reply.call_args.args[0]
+        self.assertEqual(thread['thread_ts'], pd.to_datetime(float(parent_ts), unit='s'))
+        self.assertEqual([message['text'] for message in thread['messages']],
+                         ['Kicking off the launch plan', 'PM Agent can you track this?'])
+        self.assertEqual(self.polls, ['test'])
+
+    def test_duplicate_and_non_message_events_are_ignored(self):
+        ts = f"{time.time():.6f}"
+        self.source.emit_message('C1', 'U1', 'PM Agent ping', ts)
+        self.source.emit_message('C1', 'U1', 'PM Agent ping', ts)
+        self.source.emit({'type': 'message', 'subtype': 'message_changed', 'channel': 'C1', 'ts': ts})
+        self.source.emit({'type': 'message', 'channel': 'D123', 'user': 'U1', 'text': 'PM Agent dm', 'ts': ts})
+        self.source.emit({'type': 'reaction_added', 'user': 'U1'})
+        self._wait_for_posts(1)
+        time.sleep(0.2)
+        self.assertEqual(self.interactor.post_thread_reply.call_count, 1)
+        self.assertEqual(self.agent.llm.calls, 1)
+        self.assertEqual(self.interactor.message_store.count(), 1)
+
+    def test_follow_up_events_see_the_agents_earlier_replies(self):
+        prompts = []
+        self.agent.llm = FakeLLM(lambda prompt: prompts.append(prompt) or reply_response("On it"))
+        # The real post_thread_reply, against a bot client that answers like chat.postMessage
+        del self.interactor.post_thread_reply
+        posted = []
+        def chat_post_message(channel, text, thread_ts=None, username=None):
+            posted.append(text)
+            ts = f"{time.time():.6f}"
+            return {'ok': True, 'channel': 'C1', 'ts': ts, 'message': {'text': text, 'username': username, 'ts': ts}}
+        self.interactor.bot_client = MagicMock()
+        self.interactor.bot_client.chat_postMessage.side_effect = chat_post_message
+
+        parent_ts = f"{time.time() - 60:.6f}"
+        self.source.emit_message('C1', 'U1', 'PM Agent can you track the launch?', parent_ts)
+        deadline = time.monotonic() + 2
+        while not posted and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.source.emit_message('C1', 'U1', 'PM Agent any news?', f"{time.time():.6f}", thread_ts=parent_ts)
+        while len(prompts) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(prompts), 2)
+        self.assertIn("Bot PM Agent", prompts[1])
+        self.assertLess(prompts[1].index("On it"), prompts[1].index("PM Agent any news?"))
+
+if __name__ == '__main__':
+    unittest.main()
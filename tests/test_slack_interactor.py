@@ -0,0 +1,165 @@
+import os
+import tempfile
+import time
+import unittest
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+from benchmark import seed_store
+from fake_slack import SyntheticWorkspace, FakeWebClient
+from slack_directory import SlackDirectory
+from slack_interactor import SlackInteractor, UNAVAILABLE_THREAD_STATE
+
+def reference_organize_threads(new_messages, cached_messages, users):
+    # The original iterrows implementation, kept to check organize_threads against
+    all_messages = pd.concat([new_messages, cached_messages]).drop_duplicates(subset=['ts', 'channel_id', 'user'], keep='first')
+    sorted_messages = all_messages.sort_values('ts')
+    new_message_threads = set(new_messages['thread_ts'].dropna().unique()) | set(new_messages['ts'])
+    current_time = pd.Timestamp.now()
+    threads = defaultdict(list)
+    for _, message in sorted_messages.iterrows():
+        thread_ts = message['thread_ts'] if pd.notna(message['thread_ts']) else message['ts']
+        if thread_ts in new_message_threads:
+            text = message['text']
+            for user_id, user_name in users.items():
+                text = text.replace(f'<@{user_id}>', f'@{user_name}')
+            message_dict = message.to_dict()
+            message_dict['text'] = text
+            threads[thread_ts].append(message_dict)
+    organized_threads = []
+    for thread_ts, messages in threads.items():
+        thread = {'channel': messages[0]['channel_name'], 'thread_ts': thread_ts, 'messages': []}
+        seen_messages = set()
+        for message in messages:
+            message_key = (message['ts'], message['user'], message['text'])
+            if message_key not in seen_messages:
+                minutes_ago = int((current_time - pd.to_datetime(message['ts'])).total_seconds() / 60)
+                thread['messages'].append({
+                    'ts': message['ts'],
+                    'user': message['user_name'],
+                    'text': message['text'],
+                    'is_bot': message.get('is_bot', False),
+                    'minutes_ago': minutes_ago,
+                    'username': message.get('username', 'Unknown')
+                })
+                seen_messages.add(message_key)
+        organized_threads.append(thread)
+    organized_threads.sort(key=lambda x: x['thread_ts'])
+    return organized_threads
+
+class OrganizeThreadsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.interactor = SlackInteractor({
+            'name': 'test',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_test.db'),
+        })
+        members = [
+            {'id': 'U1', 'name': 'alice', 'real_name': 'alice'},
+            {'id': 'U2', 'name': 'bob', 'real_name': 'bob'},
+            {'id': 'B1', 'name': 'agentflow', 'is_bot': True},
+        ]
+        self.interactor.directory = SlackDirectory(lambda: members, lambda: [{'id': 'C1', 'name': 'general'}])
+        self.users = self.interactor.directory.user_names()
+
+    def tearDown(self):
+        self.interactor.message_store.close()
+
+    def _message(self, minutes_ago, user, text, thread_ts=pd.NaT, channel='C1'):
+        ts = pd.Timestamp.now().floor('min') - pd.Timedelta(minutes=minutes_ago, seconds=-30)
+        user_name = self.users.get(user, np.nan)
+        return {
+            'type': 'message', 'subtype': np.nan, 'ts': ts, 'user': user, 'thread_ts': thread_ts, 'text': text,
+            'channel_id': channel, 'username': user, 'text_clean': text, 'text_len': len(text),
+            'user_name': user_name, 'is_bot': user == 'B1', 'channel_name': 'general',
+        }
+
+    def test_matches_reference_implementation(self):
+        parent = self._message(600, 'U1', 'Kickoff <@U2>, can you own this?')
+        parent_ts = parent['ts']
+        parent['thread_ts'] = parent_ts
+        old = [
+            parent,
+            self._message(590, 'U2', 'Sure <@U1>', thread_ts=parent_ts),
+            self._message(300, 'U2', 'Unrelated chatter'),
+            self._message(100, 'B1', 'Reminder for <@U2> and <@U9>', thread_ts=parent_ts),
+        ]
+        new = [
+            self._message(5, 'U1', 'Status <@U2>? <@U2|bob>', thread_ts=parent_ts),
+            self._message(2, 'U2', 'New top-level question for <@U1>'),
+        ]
+        self.interactor.message_store.append(pd.DataFrame(old + new))
+        new_messages = pd.DataFrame(new)
+
+        expected = reference_organize_threads(new_messages, self.interactor.message_store.load_threads(
+            set(new_messages['thread_ts'].dropna()) | set(new_messages['ts'])), self.users)
+        actual = self.interactor.organize_threads(new_messages)
+
+        self.assertEqual(actual, expected)
+        self.assertEqual([len(thread['messages']) for thread in actual], [4, 1])
+        self.assertEqual(actual[0]['messages'][0]['text'], 'Kickoff @Bob, can you own this?')
+        self.assertEqual(actual[0]['messages'][2]['text'], 'Reminder for @Bob and <@U9>')
+
+    def test_no_new_messages(self):
+        self.assertEqual(self.interactor.organize_threads(pd.DataFrame()), [])
+
+class RecordingWebClient(FakeWebClient):
+    def __init__(self, workspace):
+        super().__init__(workspace)
+        self.replies_requested = []
+
+    def conversations_replies(self, channel, ts, **kwargs):
+        self.replies_requested.append((channel, ts))
+        return super().conversations_replies(channel, ts, **kwargs)
+
+class MissingThreadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workspace = SyntheticWorkspace(messages=300, channels=2, users=5, end_time=time.time() - 600, seed=5)
+        self.client = RecordingWebClient(self.workspace)
+        self.interactor = SlackInteractor({
+            'name': 'missing',
+            'user_token': 'xoxp-test',
+            'bot_token': 'xoxb-test',
+            'message_store_path': os.path.join(self.tmp_dir, 'messages_missing.db'),
+            'rate_limits': {method: 1e9 for method in FakeWebClient.tier_limits()},
+        })
+        self.interactor.user_client = self.client
+        self.interactor.bot_client = self.client
+        seed_store(self.interactor, self.workspace)
+
+    def tearDown(self):
+        self.interactor.message_store.close()
+
+    def test_deleted_thread_does_not_abort_the_sync(self):
+        # A stored parent that Slack no longer has, so conversations.replies fails with thread_not_found
+        channel = self.workspace.channel_ids[0]
+        missing_ts = f"{time.time() - 86400:.6f}"
+        raw = pd.DataFrame([{'type': 'message', 'subtype': np.nan, 'ts': missing_ts, 'user': None, 'thread_ts': missing_ts,
+                             'text': 'Deleted thread', 'channel_id': channel, 'username': None}])
+        channels = pd.DataFrame(self.interactor.directory.channels(), columns=['id', 'name']).rename({'name': 'channel_name'}, axis=1)
+        self.interactor.message_store.append(self.interactor.enrich_messages(raw, self.interactor.fetch_user_list(), channels))
+
+        self.workspace.advance(300)
+        self.workspace.post(channel, 'Anyone around?', None)
+        new_messages = self.interactor.fetch_new_messages()
+
+        self.assertIn('Anyone around?', new_messages['text'].tolist())
+        self.assertIn((channel, missing_ts), self.client.replies_requested)
+        self.assertEqual(self.interactor.message_store.thread_states()[(channel, missing_ts)], UNAVAILABLE_THREAD_STATE)
+
+        # Not polled again, not even by the dormant sweep
+        self.client.replies_requested.clear()
+        self.interactor.last_dormant_sweep = pd.Timestamp(0)
+        self.workspace.advance(300)
+        self.interactor.fetch_new_messages()
+        self.assertNotIn((channel, missing_ts), self.client.replies_requested)
+        self.assertTrue(self.client.replies_requested)
+
+if __name__ == '__main__':
+    unittest.main()
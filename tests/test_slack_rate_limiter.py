@@ -0,0 +1,36 @@
+import time
+import unittest
+
+from slack_rate_limiter import SlackRateLimiter, TokenBucket
+
+class SlackRateLimiterTests(unittest.TestCase):
+
+    def test_limits_follow_method_tiers(self):
+        limiter = SlackRateLimiter({'conversations.history': 5})
+        self.assertEqual(limiter.limit_for('users.list'), 20)
+        self.assertEqual(limiter.limit_for('conversations.replies'), 50)
+        self.assertEqual(limiter.limit_for('conversations.history'), 5)
+
+    def test_method_name_from_client_method(self):
+        def conversations_replies():
+            pass
+        self.assertEqual(SlackRateLimiter.method_name(conversations_replies), 'conversations.replies')
+
+    def test_bucket_waits_once_burst_is_spent(self):
+        bucket = TokenBucket(per_minute=60, burst=2)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 1.0, places=1)
+
+    def test_pause_applies_retry_after_to_method(self):
+        limiter = SlackRateLimiter()
+        limiter.pause('conversations.replies', 0.2)
+        start = time.monotonic()
+        limiter.acquire('conversations.replies')
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        start = time.monotonic()
+        limiter.acquire('users.list')
+        self.assertLess(time.monotonic() - start, 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
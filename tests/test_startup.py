@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import and construction time of a Runner whose workspace uses only OpenAI agents. Before the
+# provider SDKs were imported lazily this was about 2s; anthropic alone took 1.1s to import.
+STARTUP_BUDGET_SECONDS = 1.5
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import runner
+imported = time.perf_counter() - start
+loaded = {name: name in sys.modules for name in ('anthropic', 'openai', 'tqdm', 'sarcastic_agent', 'drunk_agent')}
+runner.load_config('config.yaml')
+agents = runner.Runner().agents
+print(json.dumps({
+    'import_seconds': imported,
+    'startup_seconds': time.perf_counter() - start,
+    'loaded_on_import': loaded,
+    'loaded_after_init': {name: name in sys.modules for name in loaded},
+    'agents': {workspace: [agent.get_name() for agent in workspace_agents] for workspace, workspace_agents in agents.items()},
+}))
+"""
+
+def run_startup(config):
+    workdir = tempfile.mkdtemp(prefix='agentflow-startup-')
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'src'))
+    completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=workdir, env=env, capture_output=True, text=True, timeout=60)
+    if completed.returncode != 0:
+        raise AssertionError(completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+class StartupTests(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(ROOT, 'config.template.yaml')) as f:
+            self.config = yaml.safe_load(f)
+        self.config['workspaces'] = [{
+            'name': 'startup',
+            'bot_token': 'xoxb-test',
+            'user_token': 'xoxp-test',
+            'agents': [{'name': 'SarcasticAgent', 'llm_type': 'openai'}, {'name': 'ReleaseAgent', 'llm_type': 'openai'}],
+        }]
+        self.config['llm_cache'] = {'enabled': False}
+        self.config['context'] = dict(self.config.get('context') or {}, summarizer_llm_type=None)
+        self.config['prefilter'] = {'type': 'keyword'}
+        self.config['metrics'] = {}
+
+    def test_imports_only_what_the_config_uses(self):
+        result = run_startup(self.config)
+
+        self.assertFalse(any(result['loaded_on_import'].values()), result['loaded_on_import'])
+        self.assertEqual(result['loaded_after_init'],
+                         {'anthropic': False, 'openai': True, 'tqdm': False, 'sarcastic_agent': True, 'drunk_agent': False})
+        self.assertEqual(result['agents'], {'startup': ['Sarcastic Agent', 'Release Agent']})
+
+    def test_startup_time_budget(self):
+        # Best of three, so one slow start on a busy machine does not fail the test
+        startup = min(run_startup(self.config)['startup_seconds'] for _ in range(3))
+        self.assertLess(startup, STARTUP_BUDGET_SECONDS)
+
+if __name__ == '__main__':
+    unittest.main()
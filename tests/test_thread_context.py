@@ -0,0 +1,68 @@
+import unittest
+
+from llm_interface import LLMInterface
+from thread_context import ThreadContextBuilder, estimate_tokens
+
+class RecordingSummarizer(LLMInterface):
+    def __init__(self):
+        self.prompts = []
+
+    def generate_response(self, prompt: str, system=None) -> str:
+        self.prompts.append(prompt)
+        return f"summary #{len(self.prompts)}"
+
+def make_thread(count, text="message"):
+    return {
+        "channel": "agentflow",
+        "thread_ts": "2024-08-12 22:43:44",
+        "messages": [{"text": f"{text} {i}", "user": "Alice", "minutes_ago": count - i} for i in range(count)]
+    }
+
+def format_message(message):
+    return f"{message['user']}: {message['text']}"
+
+class ThreadContextBuilderTests(unittest.TestCase):
+
+    def test_short_threads_are_unchanged(self):
+        builder = ThreadContextBuilder(keep_last=10)
+        thread = make_thread(5)
+        self.assertEqual(builder.build(thread, format_message, 'claude'),
+                         "\n".join(format_message(message) for message in thread['messages']))
+
+    def test_older_messages_are_summarized_incrementally(self):
+        summarizer = RecordingSummarizer()
+        builder = ThreadContextBuilder(keep_last=10, summarizer=summarizer)
+
+        context = builder.build(make_thread(100), format_message, 'claude')
+        lines = context.split("\n")
+        self.assertEqual(lines[0], "Summary of 90 earlier messages: summary #1")
+        self.assertEqual(lines[1:], [f"Alice: message {i}" for i in range(90, 100)])
+
+        builder.build(make_thread(100), format_message, 'openai')
+        self.assertEqual(len(summarizer.prompts), 1)
+
+        context = builder.build(make_thread(105), format_message, 'claude')
+        self.assertTrue(context.startswith("Summary of 95 earlier messages: summary #2"))
+        new_messages = summarizer.prompts[1].split("New messages:")[1]
+        self.assertIn("summary #1", summarizer.prompts[1])
+        self.assertIn("message 94", new_messages)
+        self.assertNotIn("message 89", new_messages)
+
+    def test_without_a_summarizer_threads_within_the_budget_are_unchanged(self):
+        builder = ThreadContextBuilder(keep_last=10, token_budgets={'claude': 1000})
+        thread = make_thread(100)
+        self.assertEqual(builder.build(thread, format_message, 'claude'),
+                         "\n".join(format_message(message) for message in thread['messages']))
+
+    def test_token_budget_bounds_the_context(self):
+        builder = ThreadContextBuilder(keep_last=30, token_budgets={'claude': 1000}, summary_tokens=100)
+        for count in (50, 500):
+            context = builder.build(make_thread(count, text="x" * 400), format_message, 'claude')
+            self.assertLessEqual(estimate_tokens(context), 1000)
+            self.assertIn("earlier messages: participants Alice", context)
+
+        context = builder.build(make_thread(1, text="y" * 10000), format_message, 'claude')
+        self.assertLessEqual(estimate_tokens(context), 1000)
+
+if __name__ == '__main__':
+    unittest.main()